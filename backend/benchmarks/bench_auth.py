@@ -0,0 +1,69 @@
+"""
+Benchmarks for authentication.
+
+- login throughput: concurrent password verifications through the process pool
+- per-request auth overhead: token verification with and without the LRU
+
+Usage:
+    cd backend && python benchmarks/bench_auth.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from services import passwords, tokens
+
+LOGINS = 200
+VERIFICATIONS = 100_000
+
+
+async def bench_login_throughput():
+    encoded = passwords.hash_password("correct horse battery staple")
+    # Warm the pool so worker start-up is not measured
+    await asyncio.gather(*(passwords.verify_password_async("x", encoded) for _ in range(8)))
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(passwords.verify_password_async("correct horse battery staple", encoded) for _ in range(LOGINS))
+    )
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    return LOGINS / elapsed
+
+
+def bench_single_hash():
+    encoded = passwords.hash_password("pw")
+    start = time.perf_counter()
+    passwords.verify_password("pw", encoded)
+    return time.perf_counter() - start
+
+
+def bench_token_verify():
+    token = tokens.create_token("user@example.com")
+
+    start = time.perf_counter()
+    for _ in range(VERIFICATIONS):
+        tokens.decode_token(token)
+    uncached = (time.perf_counter() - start) / VERIFICATIONS
+
+    tokens.verify_token(token)
+    start = time.perf_counter()
+    for _ in range(VERIFICATIONS):
+        tokens.verify_token(token)
+    cached = (time.perf_counter() - start) / VERIFICATIONS
+    return uncached, cached
+
+
+if __name__ == "__main__":
+    single = bench_single_hash()
+    throughput = asyncio.run(bench_login_throughput())
+    passwords.shutdown_executor()
+    uncached, cached = bench_token_verify()
+    print(f"single scrypt verify:      {single * 1e3:.1f} ms")
+    print(f"login throughput (pool):   {throughput:.0f} logins/s")
+    print(f"token verify (HMAC+JSON):  {uncached * 1e6:.2f} us/request")
+    print(f"token verify (LRU hit):    {cached * 1e6:.2f} us/request")
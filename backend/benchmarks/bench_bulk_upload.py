@@ -0,0 +1,69 @@
+"""
+Throughput of the streaming bulk calculator on a synthetic inventory.
+
+Generates ROWS facility-month rows, feeds them to compute_csv_stream in
+64 KB pieces (as an HTTP upload would arrive) and reports rows/second and
+the parent process' peak RSS.
+
+Usage:
+    cd backend && python benchmarks/bench_bulk_upload.py [rows]
+"""
+import asyncio
+import os
+import resource
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from services import bulk
+from services.calculator import INDUSTRIES, INDUSTRY_DATA
+
+ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+PIECE = 64 * 1024
+COLUMNS = sorted(bulk.ALL_PARAMETERS)
+
+
+def make_inventory(rows: int) -> bytes:
+    lines = [",".join(["facility_id", "month", "industry"] + COLUMNS)]
+    for n in range(rows):
+        industry = INDUSTRIES[n % len(INDUSTRIES)]
+        params = INDUSTRY_DATA[industry]["parameters"]
+        cells = [str((n * 37 + k) % 5000) if c in params else "" for k, c in enumerate(COLUMNS)]
+        lines.append(",".join([f"fac-{n // 12}", f"2026-{n % 12 + 1:02d}", industry] + cells))
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def upload(data: bytes):
+    for i in range(0, len(data), PIECE):
+        yield data[i:i + PIECE]
+        await asyncio.sleep(0)
+
+
+async def main():
+    data = make_inventory(ROWS)
+    # Warm the pool so worker start-up is not measured
+    warm = await bulk.compute_csv_stream(upload(make_inventory(10)))
+    warm.close()
+
+    start = time.perf_counter()
+    out = await bulk.compute_csv_stream(upload(data))
+    compute_s = time.perf_counter() - start
+    size = 0
+    for block in bulk.iter_file(out):
+        size += len(block)
+    total_s = time.perf_counter() - start
+    bulk.shutdown_executor()
+
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"rows:               {ROWS:,} ({len(data) / 1e6:.1f} MB in, {size / 1e6:.1f} MB out)")
+    print(f"workers:            {bulk.BULK_WORKERS}, chunk rows {bulk.CHUNK_ROWS:,}")
+    print(f"upload -> results:  {compute_s:.2f} s ({ROWS / compute_s:,.0f} rows/s)")
+    print(f"including download: {total_s:.2f} s")
+    print(f"parent peak RSS:    {peak_mb:.0f} MB (includes the generated input held in memory)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""
+Dashboard rendering cost: four separate requests versus one
+``GET /api/dashboard/{user_id}``.
+
+The separate requests are user rewards, leaderboard, badges and price, as
+the page used to fetch them. "after write" runs right after a recorded
+action, so the shared ranking has to be rebuilt once; "cached" reuses it.
+The "uncached" row rebuilds the ranking on every request, like the old
+per-request sorts did.
+
+Usage:
+    cd backend && python benchmarks/bench_dashboard.py [users] [runs]
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+from fastapi.testclient import TestClient
+
+import main
+from routers import rewards
+
+
+def separate(client, user_id):
+    client.get(f"/api/rewards/user/{user_id}")
+    client.get("/api/rewards/leaderboard", params={"limit": 10})
+    client.get("/api/rewards/badges")
+    client.get("/api/credits/price")
+
+
+def combined(client, user_id):
+    client.get(f"/api/dashboard/{user_id}")
+
+
+def timed(fn, runs, before=None):
+    samples = []
+    for i in range(runs):
+        if before:
+            before(i)
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main_():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    with tempfile.TemporaryDirectory() as tmp:
+        rewards.REWARDS_DB_FILE = os.path.join(tmp, "rewards_db.json")
+        rewards.REWARDS_SNAPSHOT = False
+        rewards.save_rewards_db({
+            f"user-{i}": {"ecoPoints": (i * 7919) % 100_000, "badges": ["carbon_saver"] if i % 3 else [],
+                          "rank": 1, "actions": []}
+            for i in range(users)
+        })
+        client = TestClient(main.app)
+        user_id = f"user-{users // 2}"
+
+        def write(_):
+            rewards.apply_reward_action("user-1", "calculator_use")
+
+        def invalidate(_):
+            rewards._ranking_cache["version"] = None
+
+        rows = [
+            ("4 requests, after write", timed(lambda: separate(client, user_id), runs, write)),
+            ("4 requests, cached", timed(lambda: separate(client, user_id), runs)),
+            ("dashboard, uncached", timed(lambda: combined(client, user_id), runs, invalidate)),
+            ("dashboard, after write", timed(lambda: combined(client, user_id), runs, write)),
+            ("dashboard, cached", timed(lambda: combined(client, user_id), runs)),
+        ]
+    print(f"{users} users, median of {runs}")
+    for name, ms in rows:
+        print(f"{name:<26}{ms:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main_()
@@ -0,0 +1,88 @@
+"""
+Benchmark for time-windowed leaderboards.
+
+Builds ``users`` synthetic users with ``actions`` actions each, spread over
+the last 60 days, and compares a weekly top-100 computed by scanning every
+user's action history with the day buckets of
+``services.leaderboard_windows``. Also reports the one-off rebuild after a
+load and the cost of keeping the buckets current on each write.
+
+Usage:
+    cd backend && python benchmarks/bench_leaderboard.py [users] [actions]
+"""
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from services.leaderboard_windows import WindowedLeaderboard
+
+
+def make_users(users, actions):
+    rng = random.Random(7)
+    now = datetime.now()
+    data = {}
+    for i in range(users):
+        stamps = sorted(now - timedelta(minutes=rng.randint(0, 60 * 24 * 60)) for _ in range(actions))
+        history = [{"type": "calculator_use", "amount": 1.0, "points_earned": rng.choice((10, 15, 20, 50)),
+                    "timestamp": stamp.isoformat(), "metadata": {}} for stamp in stamps]
+        data[f"user-{i}"] = {"ecoPoints": sum(a["points_earned"] for a in history), "badges": [], "rank": 1,
+                             "actions": history, "updated_at": history[-1]["timestamp"] if history else ""}
+    return data
+
+
+def scan_week(data, limit):
+    """Weekly ranking the way it would be done without buckets"""
+    since = (datetime.now() - timedelta(days=6)).date().isoformat()
+    totals = []
+    for user_id, user in data.items():
+        points = sum(a["points_earned"] for a in user["actions"] if a["timestamp"][:10] >= since)
+        if points:
+            totals.append((points, user_id))
+    totals.sort(reverse=True)
+    return totals[:limit]
+
+
+def timed(fn, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    actions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    data = make_users(users, actions)
+    board = WindowedLeaderboard()
+
+    rebuild = timed(lambda: board.rebuild(data), 1)
+    scan = timed(lambda: scan_week(data, 100), 3)
+    query = timed(lambda: board.top("week", 100), 200)
+
+    ids = list(data)
+    rng = random.Random(1)
+
+    def write():
+        user_id = rng.choice(ids)
+        data[user_id]["actions"].append({"type": "calculator_use", "amount": 1.0, "points_earned": 10,
+                                         "timestamp": datetime.now().isoformat(), "metadata": {}})
+        board.sync_user(data, user_id)
+
+    sync = timed(write, 2000)
+    assert [p for p, _ in scan_week(data, 100)] == [p for _, p in board.top("week", 100)[0]]
+
+    print(f"{users} users x {actions} actions")
+    print(f"{'rebuild after load':<28}{rebuild * 1000:10.1f} ms")
+    print(f"{'weekly top-100, full scan':<28}{scan * 1000:10.1f} ms")
+    print(f"{'weekly top-100, buckets':<28}{query * 1000:10.3f} ms")
+    print(f"{'bucket update per write':<28}{sync * 1000:10.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
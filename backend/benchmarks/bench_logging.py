@@ -0,0 +1,124 @@
+"""
+Logging overhead on the request thread, before and after the queued pipeline.
+
+"before" is the old setup: ``logging.basicConfig`` text handler writing
+synchronously, and ``traceback.format_exc()`` logged in error paths.
+"after" is ``services.log_pipeline`` (JSON, formatted on the listener
+thread, ``exc_info=True``), with hot-route success logs sampled at
+``LOG_SAMPLE_RATE``.
+
+Two sinks are measured: a local file, and a slow sink that takes
+``SLOW_WRITE`` seconds per write. The slow sink stands in for a full stdout
+pipe or a slow log collector. The time reported is what the calling thread
+pays per log call, plus per-request latency of a small FastAPI route that
+logs like ``update_rewards``.
+
+Usage:
+    cd backend && python benchmarks/bench_logging.py [calls]
+"""
+import logging
+import os
+import sys
+import tempfile
+import time
+import traceback
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services import log_pipeline
+
+SLOW_WRITE = 0.0002
+
+
+class SlowStream:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text):
+        time.sleep(SLOW_WRITE)
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+def configure(mode, stream):
+    root = logging.getLogger()
+    log_pipeline.shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    if mode == "before":
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter(log_pipeline.TEXT_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    else:
+        log_pipeline.configure_logging("INFO", "json", log_pipeline.LOG_SAMPLE_RATE, stream)
+
+
+def success(log, mode, user_id):
+    if mode == "before":
+        log.info(f"Successfully updated rewards for {user_id}: +10 points")
+    else:
+        log.info(f"Successfully updated rewards for {user_id}: +10 points", extra={"sample": "rewards.update"})
+
+
+def failure(log, mode):
+    try:
+        {}["ecoPoints"]
+    except KeyError as e:
+        if mode == "before":
+            log.error(f"Error in update_user_rewards: {e}")
+            log.error(traceback.format_exc())
+        else:
+            log.error(f"Error in update_user_rewards: {e}", exc_info=True)
+
+
+def per_call(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def make_client(mode):
+    app = FastAPI()
+    log = logging.getLogger("bench.rewards")
+
+    @app.post("/update/{user_id}")
+    def update(user_id: str):
+        success(log, mode, user_id)
+        return {"success": True}
+
+    return TestClient(app)
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    log = logging.getLogger("bench.rewards")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for sink in ("file", "slow sink"):
+            for mode in ("before", "after"):
+                with open(os.path.join(tmp, f"{mode}.log"), "w", encoding="utf-8") as f:
+                    configure(mode, f if sink == "file" else SlowStream(f))
+                    info = per_call(lambda i: success(log, mode, f"user-{i}"), calls)
+                    error = per_call(lambda i: failure(log, mode), calls // 10)
+                    client = make_client(mode)
+                    request = per_call(lambda i: client.post(f"/update/user-{i}"), calls // 5)
+                    log_pipeline.shutdown_logging()
+                rows.append((sink, mode, info, error, request))
+
+    configure("before", sys.stdout)
+    print(f"{'sink':<11}{'setup':<8}{'success log':>14}{'error log':>12}{'request':>12}   (us on request thread)")
+    for sink, mode, info, error, request in rows:
+        print(f"{sink:<11}{mode:<8}{info:>14.1f}{error:>12.1f}{request:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
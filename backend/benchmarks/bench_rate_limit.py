@@ -0,0 +1,81 @@
+"""
+Microbenchmark for the rate limiting middleware.
+
+Measures the cost of a single limiter check and of a full pass through the
+ASGI middleware (with a no-op downstream app), spread over many client keys.
+
+Usage:
+    cd backend && python benchmarks/bench_rate_limit.py
+"""
+import asyncio
+import os
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from middleware.rate_limit import RateLimit, RateLimiter, RateLimitMiddleware
+
+N = 200_000
+USERS = 10_000
+
+
+def bench_check():
+    limiter = RateLimiter()
+    limit = RateLimit(rate=1000.0, burst=1000)
+    keys = [(f"user:{i}", "POST /api/rewards/update") for i in range(USERS)]
+    start = time.perf_counter()
+    for i in range(N):
+        limiter.check(keys[i % USERS], limit)
+    return (time.perf_counter() - start) / N
+
+
+async def bench_middleware():
+    async def app(scope, receive, send):
+        pass
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    middleware = RateLimitMiddleware(
+        app, rules={"POST /api/rewards/update": RateLimit(rate=1000.0, burst=1000)}
+    )
+    scopes = [
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/api/rewards/update",
+            "headers": [(b"x-forwarded-for", f"10.0.{i // 256}.{i % 256}".encode())],
+            "client": ("127.0.0.1", 5000),
+        }
+        for i in range(USERS)
+    ]
+
+    async def passthrough():
+        for i in range(N):
+            await app(scopes[i % USERS], receive, send)
+
+    async def limited():
+        for i in range(N):
+            await middleware(scopes[i % USERS], receive, send)
+
+    start = time.perf_counter()
+    await passthrough()
+    baseline = time.perf_counter() - start
+    start = time.perf_counter()
+    await limited()
+    total = time.perf_counter() - start
+    return (total - baseline) / N
+
+
+if __name__ == "__main__":
+    check_us = bench_check() * 1e6
+    middleware_us = asyncio.run(bench_middleware()) * 1e6
+    print(f"limiter.check:        {check_us:.2f} us/request")
+    print(f"middleware overhead:  {middleware_us:.2f} us/request")
+    print("target:               < 10 us/request")
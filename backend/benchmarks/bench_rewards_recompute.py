@@ -0,0 +1,71 @@
+"""
+Benchmark for the offline rewards recompute job.
+
+Writes a synthetic rewards file (indent=2, like save_rewards_db) with
+``users`` users of ~``actions`` actions each and no badges, then
+recomputes it, so every user who qualifies for a badge changes.
+
+Usage:
+    cd backend && python benchmarks/bench_rewards_recompute.py [users] [actions] [workers]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from routers.rewards import ACTION_POINTS
+from services.rewards_recompute import RECOMPUTE_WORKERS, recompute_rewards_db
+
+BATCH = 10_000
+
+
+def write_db(path, users, actions):
+    rng = random.Random(7)
+    types = list(ACTION_POINTS)
+    with open(path, "w", encoding="utf-8") as f:
+        for start in range(0, users, BATCH):
+            batch = {}
+            for i in range(start, min(users, start + BATCH)):
+                history = []
+                for _ in range(rng.randint(0, actions * 2)):
+                    action_type = rng.choice(types)
+                    amount = float(rng.randint(1, 5))
+                    history.append({"type": action_type, "amount": amount,
+                                    "points_earned": int(ACTION_POINTS[action_type] * amount),
+                                    "timestamp": "2026-01-01T00:00:00", "metadata": {}})
+                points = sum(a["points_earned"] for a in history)
+                batch[f"user-{i}"] = {"ecoPoints": points, "badges": [], "rank": max(1, points // 100),
+                                      "actions": history, "created_at": "2026-01-01T00:00:00",
+                                      "updated_at": "2026-01-01T00:00:00"}
+            f.write(",\n" if start else "{\n")
+            f.write(json.dumps(batch, indent=2)[2:-2])
+        f.write("\n}")
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    actions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else RECOMPUTE_WORKERS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rewards_db.json")
+        start = time.perf_counter()
+        write_db(path, users, actions)
+        size = os.path.getsize(path) / 1e6
+        print(f"generated {users} users ({size:.0f} MB) in {time.perf_counter() - start:.1f}s")
+
+        totals = recompute_rewards_db(path, workers=workers)
+        rate = totals["users"] / totals["elapsed"]
+        print(f"recomputed {totals['users']} users with {workers} workers in {totals['elapsed']:.1f}s "
+              f"({rate:,.0f} users/s, {size / totals['elapsed']:.0f} MB/s), {totals['changed']} changed")
+        print(f"projected 1M users: {1_000_000 / rate:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
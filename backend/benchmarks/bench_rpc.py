@@ -0,0 +1,90 @@
+"""
+Benchmarks for the JSON-RPC client against an in-process node stand-in.
+
+Reads getProject, isProjectActive and uri for a set of tokens:
+
+- naive: one eth_call per HTTP request on a new connection (the old client)
+- pooled: one eth_call per request over keep-alive connections
+- batch: all eth_calls in JSON-RPC batch requests
+- multicall: Multicall3 aggregate3 calls, one batch request
+- cached: the same read repeated at the same block
+
+Usage:
+    cd backend && python benchmarks/bench_rpc.py [tokens] [latency_ms]
+"""
+import json
+import os
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for path in (ROOT, os.path.join(ROOT, "tests")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from services import rpc
+from services.carbon_token import GET_PROJECT, IS_PROJECT_ACTIVE, URI, fetch_projects
+from fake_node import TOKEN_ADDRESS, FakeNode
+
+VIEWS = (GET_PROJECT, IS_PROJECT_ACTIVE, URI)
+
+
+def naive_read(url, token_ids, block):
+    for i, token_id in enumerate(token_ids):
+        for spec in VIEWS:
+            payload = {"jsonrpc": "2.0", "id": i, "method": "eth_call", "params": [
+                {"to": TOKEN_ADDRESS, "data": "0x" + spec.encode_call(token_id).hex()}, hex(block)]}
+            request = urllib.request.Request(url, json.dumps(payload).encode(), {"Content-Type": "application/json"})
+            with urllib.request.urlopen(request) as response:
+                json.loads(response.read())
+
+
+def pooled_read(client, token_ids, block):
+    for token_id in token_ids:
+        for spec in VIEWS:
+            try:
+                client.view(TOKEN_ADDRESS, spec, token_id, block=block)
+            except rpc.RpcError:
+                pass
+
+
+def measure(node, label, fn):
+    node.reset_counters()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed * 1000:9.1f} ms  {node.http_requests:5} HTTP requests  "
+          f"{node.connections:5} connections")
+    return elapsed
+
+
+def main():
+    tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    token_ids = list(range(1, tokens + 1))
+
+    with FakeNode(projects=tokens, latency=latency_ms / 1000) as node:
+        print(f"{tokens} tokens x {len(VIEWS)} views, {latency_ms} ms simulated round trip")
+        block = node.head
+        uncached = dict(cache_size=0)
+        pooled = rpc.RpcClient(node.url, **uncached)
+        batched = rpc.RpcClient(node.url, multicall_address=None, **uncached)
+        multicall = rpc.RpcClient(node.url, **uncached)
+        multicall.resolve_multicall()  # one eth_getCode, outside the timings
+        cached = rpc.RpcClient(node.url)
+        fetch_projects(token_ids, cached, TOKEN_ADDRESS, block)
+
+        baseline = measure(node, "naive", lambda: naive_read(node.url, token_ids, block))
+        for label, fn in [
+            ("pooled", lambda: pooled_read(pooled, token_ids, block)),
+            ("batch", lambda: fetch_projects(token_ids, batched, TOKEN_ADDRESS, block)),
+            ("multicall", lambda: fetch_projects(token_ids, multicall, TOKEN_ADDRESS, block)),
+            ("cached", lambda: fetch_projects(token_ids, cached, TOKEN_ADDRESS, block)),
+        ]:
+            elapsed = measure(node, label, fn)
+            print(f"{'':<10} {baseline / elapsed:9.1f}x faster than naive")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Cold-start benchmark for the API process.
+
+Each measurement runs in a fresh interpreter:
+
+- import time of ``main`` and of each router module
+- rewards storage load for ``users`` synthetic users: plain ``json.load``
+  (the old path), JSON with the garbage collector paused, and the binary
+  snapshot
+
+Usage:
+    cd backend && python benchmarks/bench_startup.py [users] [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from bench_rewards_recompute import write_db
+
+MODULES = ["main", "routers.auth", "routers.calculator", "routers.credits", "routers.marketplace", "routers.rewards"]
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+LOAD_SNIPPETS = {
+    "json.load": (
+        "import json, time; t = time.perf_counter(); json.load(open({path!r}, encoding='utf-8')); "
+        "print(time.perf_counter() - t)"
+    ),
+    "json, gc paused": (
+        "import time; from services import snapshot; t = time.perf_counter(); "
+        "snapshot.load_json({path!r}); print(time.perf_counter() - t)"
+    ),
+    "snapshot": (
+        "import time; from services import snapshot; t = time.perf_counter(); "
+        "assert snapshot.read_snapshot({path!r}) is not None; print(time.perf_counter() - t)"
+    ),
+}
+
+
+def run(code: str, runs: int) -> float:
+    times = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(times)
+
+
+def main():
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    print("import times (median of fresh interpreters)")
+    for module in MODULES:
+        print(f"  {module:<22} {run(IMPORT_SNIPPET.format(module=module), runs) * 1000:8.0f} ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "rewards_db.json")
+        write_db(path, users, 5)
+        from services import snapshot
+        snapshot.write_snapshot(snapshot.load_json(path), path)
+        json_mb = os.path.getsize(path) / 1e6
+        snap_mb = os.path.getsize(snapshot.snapshot_path(path)) / 1e6
+        print(f"rewards load, {users} users (JSON {json_mb:.0f} MB, snapshot {snap_mb:.0f} MB)")
+        baseline = None
+        for label, code in LOAD_SNIPPETS.items():
+            elapsed = run(code.format(path=path), runs)
+            baseline = baseline or elapsed
+            print(f"  {label:<22} {elapsed * 1000:8.0f} ms  {baseline / elapsed:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,44 @@
 from fastapi import FastAPI, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from routers import auth, credits, rewards
+from routers import auth, calculator, credits, dashboard, marketplace, profiling, rewards
+from middleware.profiling import PROFILING_ENABLED, ProfilingMiddleware
+from middleware.rate_limit import RateLimit, RateLimitMiddleware
+from services import bulk, passwords, rewards_sync, rpc
+from services.log_pipeline import configure_logging
+from services.event_store import EventStore
+from services.indexer import MARKETPLACE_ADDRESS, start_background_indexer
+from services.marketplace_aggregates import marketplace_aggregates
+import gc
 import os
 import json
 from datetime import datetime
 import logging
+import threading
+
+# Application logs go through a queue to a background writer (JSON lines by default)
+configure_logging()
 
 # Basic logger
 logger = logging.getLogger("uvicorn.error")
 
 app = FastAPI(title="CarbonX Backend", version="0.1.0")
 
+# Sampling profiler for requests sent with X-Profile or picked by
+# PROFILE_SAMPLE_RATE. Innermost, so it measures the app and not the
+# other middleware. Not installed at all unless enabled.
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# Per-client limits for write-heavy routes. Registered before CORS so that
+# 429 responses still carry CORS headers.
+RATE_LIMITS = {
+    "POST /api/rewards/update": RateLimit(rate=1.0, burst=10),
+}
+
+if os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true":
+    app.add_middleware(RateLimitMiddleware, rules=RATE_LIMITS)
+
 origins = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",
@@ -29,6 +56,71 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
 app.include_router(credits.router, prefix="/api/credits", tags=["credits"])
 app.include_router(rewards.router, prefix="/api/rewards", tags=["rewards"])
+app.include_router(calculator.router, prefix="/api/calculator", tags=["calculator"])
+app.include_router(marketplace.router, prefix="/api/marketplace", tags=["marketplace"])
+app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+if PROFILING_ENABLED:
+    app.include_router(profiling.router, prefix="/api/admin/profiles", tags=["admin"])
+
+
+_indexer_stop = threading.Event()
+_state_warmed = threading.Event()
+_warm_error = None
+
+
+def _warm_state():
+    global _warm_error
+    try:
+        if rewards_sync.REWARDS_SYNC_SOCKET:
+            # Multi-worker mode: wait to become the owner or to receive the owner's state
+            rewards_sync.start(rewards_sync.REWARDS_SYNC_SOCKET).wait()
+        stats = rewards.warm_rewards_db()
+        logger.info(f"Rewards DB warmed: {stats['users']} users from {stats['source']} in {stats['seconds']:.3f}s")
+    except Exception as e:
+        _warm_error = f"{type(e).__name__}: {e}"[:200]
+        logger.exception("Failed to warm rewards DB")
+        return
+    # Long-lived startup objects go to the permanent generation so later
+    # collections skip them
+    gc.freeze()
+    _warm_error = None
+    _state_warmed.set()
+
+
+@app.on_event("startup")
+def warm_state():
+    # Load state off the event loop; /ready reports not_ready until it is in memory
+    threading.Thread(target=_warm_state, daemon=True, name="warm-state").start()
+
+
+@app.on_event("startup")
+def start_indexer():
+    # No-op unless MARKETPLACE_ADDRESS is set. Every worker serves marketplace
+    # aggregates from the shared index file; only the rewards owner (or the
+    # only process) runs the indexer that writes it.
+    if not MARKETPLACE_ADDRESS:
+        return
+    store = EventStore()
+    marketplace_aggregates.follow(store, _indexer_stop)
+
+    def start():
+        start_background_indexer(_indexer_stop, listeners=[marketplace_aggregates], store=store)
+
+    if rewards_sync.REWARDS_SYNC_SOCKET:
+        rewards_sync.when_owner(start)
+    else:
+        start()
+
+
+@app.on_event("shutdown")
+def shutdown_background_work():
+    _indexer_stop.set()
+    # Saves leave the snapshot stale; refresh it for the next cold start
+    rewards.write_rewards_snapshot()
+    passwords.shutdown_executor()
+    bulk.shutdown_executor()
+    rpc.close_client()
+    rewards_sync.stop()
 
 
 @app.get("/")
@@ -85,28 +177,22 @@ def health():
 @app.get("/ready", summary="Readiness probe")
 def ready():
     """
-    Readiness probe. Attempts quick checks of critical dependencies.
-    Current implementation checks the presence/readability of `rewards_db.json`.
+    Readiness probe. Reports ready once the rewards database file exists and
+    has been loaded into memory by the startup warm-up. A failed warm-up is
+    reported as ``warm_failed`` with its error.
     Replace or extend these checks as needed (DB, cache, external services).
     """
     checks = {"rewards_db": {"ok": False, "reason": None}}
 
-    # Check rewards_db.json
-    db_file = "rewards_db.json"
     try:
-        if not os.path.exists(db_file):
-            checks["rewards_db"]["ok"] = False
+        if _warm_error is not None:
+            checks["rewards_db"]["reason"] = f"warm_failed: {_warm_error}"
+        elif not _state_warmed.is_set():
+            checks["rewards_db"]["reason"] = "warming"
+        elif not os.path.exists(rewards.REWARDS_DB_FILE):
             checks["rewards_db"]["reason"] = "file_not_found"
         else:
-            # try reading and parsing
-            try:
-                with open(db_file, "r", encoding="utf-8") as f:
-                    _ = json.load(f)
-                checks["rewards_db"]["ok"] = True
-                checks["rewards_db"]["reason"] = None
-            except Exception as e:
-                checks["rewards_db"]["ok"] = False
-                checks["rewards_db"]["reason"] = f"read_error: {str(e)[:200]}"
+            checks["rewards_db"]["ok"] = True
     except Exception as e:
         # Any unexpected error
         logger.exception("Error while running readiness check")
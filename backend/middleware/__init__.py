@@ -0,0 +1 @@
+# This file makes the middleware directory a Python package
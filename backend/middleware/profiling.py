@@ -0,0 +1,205 @@
+"""
+Opt-in sampling profiler for requests.
+
+A request is profiled when it carries ``X-Profile: <PROFILING_TOKEN>`` or
+is picked by ``sample_rate``. While any profiled request is in flight, a
+background thread wakes every ``interval`` seconds, walks the stacks of
+all threads (``sys._current_frames``) and keeps those running the endpoint
+of a profiled route. Sync endpoints run in the threadpool and async ones on
+the event loop, so this covers both without hooking either. Samples are
+aggregated per route as collapsed stacks (``route;frame;frame count``),
+the input format of flamegraph.pl and speedscope.
+
+Concurrent unprofiled requests to a route that is being profiled are
+sampled too; samples are attributed to routes, not to single requests.
+
+The middleware is only installed when ``PROFILING_ENABLED=true``, so a
+disabled profiler costs nothing. When installed, unprofiled requests pay
+for one header scan and one random draw.
+"""
+import hmac
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+MAX_STACKS_PER_ROUTE = 5000
+MAX_DEPTH = 128
+
+PROFILE_HEADER = b"x-profile"
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def _frame_label(code) -> str:
+    path = code.co_filename
+    if path.startswith(ROOT):
+        path = os.path.relpath(path, ROOT)
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class RouteProfile:
+    __slots__ = ("requests", "seconds", "max_seconds", "samples", "stacks")
+
+    def __init__(self):
+        self.requests = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.samples = 0
+        self.stacks: Counter = Counter()
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._active: Dict[int, dict] = {}  # id(scope) -> scope of profiled requests in flight
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._labels: Dict[object, str] = {}
+        self.routes: Dict[str, RouteProfile] = {}
+
+    @staticmethod
+    def route_key(scope: dict) -> str:
+        # Unmatched paths share one key so that random URLs don't grow the table
+        path = getattr(scope.get("route"), "path", None) or "[unmatched]"
+        return f"{scope.get('method', '')} {path}"
+
+    def begin(self, scope: dict):
+        with self._lock:
+            self._active[id(scope)] = scope
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="request-profiler")
+                self._thread.start()
+        self._wake.set()
+
+    def end(self, scope: dict, seconds: float):
+        with self._lock:
+            self._active.pop(id(scope), None)
+            if not self._active:
+                self._wake.clear()
+            profile = self.routes.setdefault(self.route_key(scope), RouteProfile())
+            profile.requests += 1
+            profile.seconds += seconds
+            profile.max_seconds = max(profile.max_seconds, seconds)
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = _frame_label(code)
+        return label
+
+    def sample(self):
+        """Record one sample of every thread running a profiled endpoint"""
+        with self._lock:
+            endpoints = {}
+            for scope in self._active.values():
+                endpoint = scope.get("endpoint")
+                code = getattr(endpoint, "__code__", None)
+                if code is not None:
+                    endpoints[code] = self.route_key(scope)
+        if not endpoints:
+            return
+        own = threading.get_ident()
+        found = []
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own:
+                continue
+            codes = []
+            route = None
+            while frame is not None and len(codes) < MAX_DEPTH:
+                codes.append(frame.f_code)
+                route = endpoints.get(frame.f_code)
+                if route is not None:
+                    break
+                frame = frame.f_back
+            if route is not None:
+                found.append((route, codes))
+        with self._lock:
+            for route, codes in found:
+                stack = ";".join([route] + [self._label(code) for code in reversed(codes)])
+                profile = self.routes.setdefault(route, RouteProfile())
+                profile.samples += 1
+                if stack in profile.stacks or len(profile.stacks) < MAX_STACKS_PER_ROUTE:
+                    profile.stacks[stack] += 1
+                else:
+                    profile.stacks[f"{route};[other]"] += 1
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            started = time.perf_counter()
+            self.sample()
+            time.sleep(max(0.0, self.interval - (time.perf_counter() - started)))
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {
+                route: {
+                    "requests": p.requests,
+                    "samples": p.samples,
+                    "avg_ms": round(p.seconds / p.requests * 1000, 3) if p.requests else None,
+                    "max_ms": round(p.max_seconds * 1000, 3),
+                    "sampled_ms": round(p.samples * self.interval * 1000, 3),
+                }
+                for route, p in self.routes.items()
+            }
+
+    def collapsed(self, route: Optional[str] = None) -> str:
+        """Collapsed stacks, one ``frames count`` line each, for one route or all"""
+        with self._lock:
+            lines = []
+            for key, p in self.routes.items():
+                if route is None or key == route:
+                    lines.extend(f"{stack} {count}" for stack, count in p.stacks.most_common())
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def reset(self):
+        with self._lock:
+            self.routes.clear()
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles requests asking for it plus a random sample"""
+
+    def __init__(
+        self,
+        app,
+        profiler: Optional[SamplingProfiler] = None,
+        token: str = PROFILING_TOKEN,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+    ):
+        self.app = app
+        self.profiler = profiler or request_profiler
+        self.token = token.encode("latin-1")
+        self.sample_rate = sample_rate
+
+    def wants_profile(self, scope) -> bool:
+        if self.token:
+            for name, value in scope.get("headers") or ():
+                if name == PROFILE_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+        self.profiler.begin(scope)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiler.end(scope, time.perf_counter() - started)
+
+
+request_profiler = SamplingProfiler()
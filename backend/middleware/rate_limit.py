@@ -0,0 +1,213 @@
+"""
+In-process token-bucket rate limiting.
+
+Each (client, route) pair gets its own bucket that refills continuously at
+``rate`` tokens per second up to ``burst`` tokens. A check is a dict lookup
+plus a little arithmetic, so the cost per request is O(1) regardless of how
+many clients are being tracked. Buckets that have been idle long enough to
+refill completely carry no information and are reclaimed by a periodic sweep.
+"""
+import ipaddress
+import json
+import math
+import os
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, NamedTuple, Optional
+
+from services.tokens import TokenError, verify_token
+
+
+class RateLimit(NamedTuple):
+    rate: float  # tokens added per second
+    burst: int  # bucket capacity
+
+    @property
+    def idle_ttl(self) -> float:
+        """Seconds after which an untouched bucket is full again"""
+        return self.burst / self.rate
+
+
+class RateLimiter:
+    """Token buckets keyed by an arbitrary hashable key"""
+
+    def __init__(self, sweep_interval: float = 60.0, clock: Callable[[], float] = time.monotonic):
+        # key -> [tokens, last_update, idle_ttl]
+        self._buckets: Dict[Hashable, list] = {}
+        self._clock = clock
+        self._sweep_interval = sweep_interval
+        self._next_sweep = clock() + sweep_interval
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def check(self, key: Hashable, limit: RateLimit, now: Optional[float] = None) -> float:
+        """
+        Consume one token for ``key``.
+        Returns 0.0 when the request is allowed, otherwise the number of
+        seconds until a token becomes available.
+        """
+        if now is None:
+            now = self._clock()
+        if now >= self._next_sweep:
+            self.sweep(now)
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = [limit.burst - 1.0, now, limit.idle_ttl]
+            return 0.0
+
+        tokens = bucket[0] + (now - bucket[1]) * limit.rate
+        if tokens > limit.burst:
+            tokens = limit.burst
+        bucket[1] = now
+        if tokens >= 1.0:
+            bucket[0] = tokens - 1.0
+            return 0.0
+        bucket[0] = tokens
+        return (1.0 - tokens) / limit.rate
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop buckets that have refilled completely. Returns the number removed."""
+        if now is None:
+            now = self._clock()
+        expired = [key for key, (_, updated, ttl) in self._buckets.items() if now - updated >= ttl]
+        for key in expired:
+            del self._buckets[key]
+        self._next_sweep = now + self._sweep_interval
+        return len(expired)
+
+
+def _parse_networks(value: str):
+    networks = []
+    for part in value.split(","):
+        part = part.strip()
+        if part:
+            networks.append(ipaddress.ip_network(part, strict=False))
+    return tuple(networks)
+
+
+# Peers allowed to report the original client address in X-Forwarded-For,
+# e.g. the Next.js server proxying /api/rewards/update
+TRUSTED_PROXIES = _parse_networks(os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "127.0.0.1/32,::1/128"))
+
+
+@lru_cache(maxsize=65536)
+def _is_trusted(host: Optional[str], trusted) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except (TypeError, ValueError):
+        return False
+    return any(address in network for network in trusted)
+
+
+def client_key(scope, trusted_proxies=None) -> str:
+    """
+    Identify the caller by a verified identity only: the subject of a valid
+    bearer token, else the client address. ``X-Forwarded-For`` is honoured
+    only when the connection comes from a trusted proxy; the rightmost
+    address that is not itself a trusted proxy is used.
+    """
+    trusted = TRUSTED_PROXIES if trusted_proxies is None else trusted_proxies
+    forwarded = None
+    for name, value in scope.get("headers") or ():
+        if name == b"authorization" and value[:7].lower() == b"bearer ":
+            try:
+                subject = verify_token(value[7:].decode("latin-1").strip()).get("sub")
+            except TokenError:
+                subject = None
+            if subject:
+                return f"user:{subject}"
+        elif name == b"x-forwarded-for":
+            forwarded = value.decode("latin-1")
+
+    client = scope.get("client")
+    host = client[0] if client else None
+    if forwarded and _is_trusted(host, trusted):
+        for hop in reversed([part.strip() for part in forwarded.split(",")]):
+            if hop and not _is_trusted(hop, trusted):
+                return "ip:" + hop
+    return "ip:" + (host or "unknown")
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying per-route limits.
+
+    ``rules`` maps ``"METHOD /path"`` or ``"/path"`` to a RateLimit. A key
+    ending in ``*`` matches any path with that prefix. Requests matching no
+    rule fall back to ``default`` (unlimited when None).
+    """
+
+    def __init__(
+        self,
+        app,
+        rules: Optional[Dict[str, RateLimit]] = None,
+        default: Optional[RateLimit] = None,
+        key_func: Callable[[dict], Hashable] = client_key,
+        limiter: Optional[RateLimiter] = None,
+    ):
+        self.app = app
+        self.default = default
+        self.key_func = key_func
+        self.limiter = limiter or RateLimiter()
+        self._exact: Dict[str, RateLimit] = {}
+        self._prefixes = []
+        for pattern, limit in (rules or {}).items():
+            if pattern.endswith("*"):
+                self._prefixes.append((pattern[:-1], limit))
+            else:
+                self._exact[pattern] = limit
+        # Longest prefix wins
+        self._prefixes.sort(key=lambda item: len(item[0]), reverse=True)
+
+    def match(self, method: str, path: str):
+        """Return (rule_id, limit) for a request, or (None, None) if unlimited"""
+        rule_id = f"{method} {path}"
+        limit = self._exact.get(rule_id)
+        if limit is not None:
+            return rule_id, limit
+        limit = self._exact.get(path)
+        if limit is not None:
+            return path, limit
+        for prefix, limit in self._prefixes:
+            if rule_id.startswith(prefix) or path.startswith(prefix):
+                return prefix, limit
+        if self.default is not None:
+            return "*", self.default
+        return None, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        rule_id, limit = self.match(scope["method"], scope["path"])
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        retry_after = self.limiter.check((self.key_func(scope), rule_id), limit)
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        seconds = max(1, math.ceil(retry_after))
+        body = json.dumps({
+            "detail": {
+                "success": False,
+                "status": "rate_limited",
+                "message": f"Too many requests. Retry in {seconds} seconds.",
+                "code": "RATE_LIMITED",
+            }
+        }).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", str(seconds).encode("latin-1")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
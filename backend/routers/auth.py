@@ -1,8 +1,26 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException
 from pydantic import BaseModel
+from typing import Optional
+from datetime import datetime
+import asyncio
+import json
+import os
+import logging
+
+from services.passwords import hash_password_async, verify_password_async
+from services.tokens import TokenError, create_token, verify_token
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+USERS_DB_FILE = "users_db.json"
+
+# Parsed users file, revalidated against the file's mtime so that accounts
+# created by other worker processes become visible.
+_users_cache = {"mtime": None, "users": {}}
+_signup_lock = asyncio.Lock()
+
 class LoginRequest(BaseModel):
     email: str
     password: str
@@ -12,14 +30,134 @@ class SignupRequest(BaseModel):
     email: str
     password: str
 
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+def load_users_db() -> dict:
+    """Load the users database, reusing the parsed copy while the file is unchanged"""
+    try:
+        mtime = os.stat(USERS_DB_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return {}
+    if mtime != _users_cache["mtime"]:
+        try:
+            with open(USERS_DB_FILE, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Failed to load users DB: {e}")
+            return _users_cache["users"]
+        _users_cache["users"] = data if isinstance(data, dict) else {}
+        _users_cache["mtime"] = mtime
+    return _users_cache["users"]
+
+def save_users_db(users: dict):
+    """Atomically replace the users database"""
+    tmp_file = f"{USERS_DB_FILE}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(users, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, USERS_DB_FILE)
+    _users_cache["users"] = users
+    _users_cache["mtime"] = os.stat(USERS_DB_FILE).st_mtime_ns
+
+def invalid_credentials():
+    return HTTPException(
+        status_code=401,
+        detail={
+            "success": False,
+            "status": "authentication_error",
+            "message": "Invalid credentials",
+            "code": "INVALID_CREDENTIALS"
+        }
+    )
+
+def get_current_user(authorization: Optional[str] = Header(None)) -> dict:
+    """Dependency returning the claims of the request's bearer token"""
+    if not authorization or not authorization.startswith("Bearer "):
+        raise HTTPException(
+            status_code=401,
+            detail={
+                "success": False,
+                "status": "authentication_error",
+                "message": "Missing bearer token",
+                "code": "MISSING_TOKEN"
+            }
+        )
+    try:
+        return verify_token(authorization[len("Bearer "):])
+    except TokenError as e:
+        raise HTTPException(
+            status_code=401,
+            detail={
+                "success": False,
+                "status": "authentication_error",
+                "message": str(e),
+                "code": "INVALID_TOKEN"
+            }
+        )
+
 @router.post("/login")
-def login(req: LoginRequest):
-    # Dummy login for now
-    if req.email and req.password:
-        return {"token": "demo-jwt-token", "user": {"email": req.email}}
-    raise HTTPException(status_code=400, detail="Invalid credentials")
+async def login(req: LoginRequest):
+    email = normalize_email(req.email)
+    if not email or not req.password:
+        raise invalid_credentials()
+
+    user = load_users_db().get(email)
+    # Always pay for one hash so unknown emails are not distinguishable by timing
+    ok = await verify_password_async(req.password, user.get("password_hash") if user else None)
+    if not ok:
+        raise invalid_credentials()
+
+    token = create_token(email, name=user.get("name"))
+    return {"token": token, "user": {"name": user.get("name"), "email": email}}
 
 @router.post("/signup")
-def signup(req: SignupRequest):
-    # Dummy signup for now
-    return {"message": "User created", "user": {"name": req.name, "email": req.email}}
+async def signup(req: SignupRequest):
+    email = normalize_email(req.email)
+    if not email or not req.password:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "status": "validation_error",
+                "message": "email and password are required",
+                "code": "VALIDATION_ERROR"
+            }
+        )
+    if email in load_users_db():
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "success": False,
+                "status": "conflict",
+                "message": "An account with this email already exists",
+                "code": "EMAIL_TAKEN"
+            }
+        )
+
+    password_hash = await hash_password_async(req.password)
+
+    async with _signup_lock:
+        users = dict(load_users_db())
+        if email in users:
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "success": False,
+                    "status": "conflict",
+                    "message": "An account with this email already exists",
+                    "code": "EMAIL_TAKEN"
+                }
+            )
+        users[email] = {
+            "name": req.name,
+            "password_hash": password_hash,
+            "created_at": datetime.now().isoformat()
+        }
+        save_users_db(users)
+
+    token = create_token(email, name=req.name)
+    return {"message": "User created", "token": token, "user": {"name": req.name, "email": email}}
+
+@router.get("/me")
+def me(claims: dict = Depends(get_current_user)):
+    return {"user": {"name": claims.get("name"), "email": claims["sub"]}}
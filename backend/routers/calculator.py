@@ -0,0 +1,87 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional, Union
+import logging
+
+from services.calculator import (
+    CARBON_PRICES,
+    COMPLIANCE_LIMIT,
+    INDUSTRY_DATA,
+    CalculationError,
+)
+from services.calculation_cache import calculation_cache, compute_footprints_cached
+from services.bulk import compute_csv_stream, iter_file
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+MAX_BATCH_SIZE = 10_000
+
+class CalculatorRecord(BaseModel):
+    industry: str = Field(..., description="Industry key, e.g. 'steel'")
+    inputs: Dict[str, float] = Field(default_factory=dict, description="Monthly input values by parameter")
+    id: Optional[Union[str, int]] = Field(None, description="Caller reference echoed back in the result")
+
+class ComputeRequest(BaseModel):
+    records: List[CalculatorRecord] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+@router.get("/industries")
+def get_industries():
+    """Emission factor tables used by the calculator"""
+    return {
+        "success": True,
+        "industries": INDUSTRY_DATA,
+        "carbon_prices": CARBON_PRICES,
+        "compliance_limit": COMPLIANCE_LIMIT
+    }
+
+@router.post("/compute")
+def compute(req: ComputeRequest):
+    """Compute scope 1/2/3 footprints for a batch of facilities or scenarios"""
+    records = [{"industry": r.industry, "inputs": r.inputs} for r in req.records]
+    ids = [r.id for r in req.records]
+    try:
+        results = compute_footprints_cached(records, ids=ids if any(i is not None for i in ids) else None)
+    except CalculationError as ce:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "status": "validation_error",
+                "message": str(ce),
+                "code": "VALIDATION_ERROR"
+            }
+        )
+    return {"success": True, "count": len(results), "results": results}
+
+@router.get("/cache/stats")
+def get_cache_stats():
+    """Hit/miss statistics of the calculation result cache"""
+    return {"success": True, "cache": calculation_cache.stats()}
+
+@router.post("/bulk")
+async def bulk_compute(request: Request):
+    """
+    Evaluate a CSV emissions inventory of any size.
+    The upload is processed in parallel chunks while it streams in and the
+    results are returned as a CSV download in input order.
+    """
+    try:
+        results = await compute_csv_stream(request.stream())
+    except ValueError as ce:  # CalculationError, bad numbers or encoding
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "status": "validation_error",
+                "message": str(ce),
+                "code": "VALIDATION_ERROR"
+            }
+        )
+    return StreamingResponse(
+        iter_file(results),
+        media_type="text/csv",
+        headers={"Content-Disposition": 'attachment; filename="footprints.csv"'}
+    )
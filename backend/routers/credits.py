@@ -1,8 +1,16 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
+import logging
+
+from services import carbon_token
+from services.rpc import RpcError
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+MAX_PROJECT_IDS = 500
+
 class TradeRequest(BaseModel):
     amount: int
     action: str  # 'buy' or 'sell'
@@ -16,3 +24,46 @@ def get_price():
 def trade(req: TradeRequest):
     # Mock trade
     return {"status": "filled", "action": req.action, "amount": req.amount}
+
+@router.get("/projects")
+def get_projects(ids: str = Query(..., description="Comma-separated token ids")):
+    """On-chain project details for several tokens, read in one multicall"""
+    try:
+        token_ids = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        token_ids = []
+    if not token_ids or len(token_ids) > MAX_PROJECT_IDS or min(token_ids) < 0:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "status": "validation_error",
+                "message": f"ids must list 1 to {MAX_PROJECT_IDS} token ids",
+                "code": "VALIDATION_ERROR"
+            }
+        )
+    if not carbon_token.CARBON_TOKEN_ADDRESS:
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "status": "unavailable",
+                "message": "Carbon credit token address is not configured",
+                "code": "CHAIN_NOT_CONFIGURED"
+            }
+        )
+
+    try:
+        projects = carbon_token.fetch_projects(token_ids, address=carbon_token.CARBON_TOKEN_ADDRESS)
+    except RpcError as e:
+        logger.error(f"Failed to read projects {token_ids}: {e}")
+        raise HTTPException(
+            status_code=502,
+            detail={
+                "success": False,
+                "status": "error",
+                "message": "Blockchain node request failed",
+                "code": "RPC_ERROR"
+            }
+        )
+    return {"success": True, "projects": [projects[token_id] for token_id in dict.fromkeys(token_ids)]}
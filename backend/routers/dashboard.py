@@ -0,0 +1,114 @@
+from fastapi import APIRouter, HTTPException
+import copy
+import logging
+import os
+import threading
+import time
+
+from routers import credits, rewards
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Everything the dashboard page shows, in one request. Parts that are the
+# same for every user (ranking, top-N, price) are computed once and shared:
+# the ranking and top-N per rewards database version, the price for
+# PRICE_CACHE_SECONDS.
+
+DASHBOARD_TOP_N = 10
+MAX_TOP_N = 100
+PRICE_CACHE_SECONDS = float(os.getenv("PRICE_CACHE_SECONDS", "30"))
+SNAPSHOT_ATTEMPTS = 3
+
+_top_cache = {"key": None, "entries": []}
+_price_cache = {"expires": 0.0, "value": None}
+_cache_lock = threading.Lock()
+
+def current_price() -> dict:
+    now = time.monotonic()
+    with _cache_lock:
+        if _price_cache["value"] is not None and now < _price_cache["expires"]:
+            return _price_cache["value"]
+    value = credits.get_price()
+    with _cache_lock:
+        _price_cache.update(value=value, expires=now + PRICE_CACHE_SECONDS)
+    return value
+
+def _top_entries(db: dict, version: int, user_ids: list, top: int) -> list:
+    """Top-N leaderboard rows for one database version; call with the rewards lock held"""
+    with _cache_lock:
+        if _top_cache["key"] == (version, top):
+            return _top_cache["entries"]
+    entries = [{**rewards.leaderboard_entry(user_id, db.get(user_id)), "position": position}
+               for position, user_id in enumerate(user_ids[:top], 1)]
+    with _cache_lock:
+        _top_cache.update(key=(version, top), entries=entries)
+    return entries
+
+def _read(user_id: str, top: int, version: int, user_ids: list, positions: dict) -> dict:
+    db = rewards.load_rewards_db()
+    user = db.get(user_id)
+    return {
+        "version": version,
+        "user": copy.deepcopy(user) if isinstance(user, dict) else {},
+        "position": positions.get(user_id),
+        "leaderboard": _top_entries(db, version, user_ids, top),
+        "total_users": len(user_ids),
+    }
+
+def _snapshot(user_id: str, top: int) -> dict:
+    """
+    User entry, position and top-N, all from the same database version.
+    The ranking is sorted outside the rewards lock, so a write may land in
+    between; then try again, and finally sort under the lock.
+    """
+    for _ in range(SNAPSHOT_ATTEMPTS):
+        version, user_ids, positions = rewards.ranked_users()
+        with rewards._rewards_lock:
+            rewards.load_rewards_db()
+            if rewards._rewards_cache["version"] == version:
+                return _read(user_id, top, version, user_ids, positions)
+    with rewards._rewards_lock:
+        return _read(user_id, top, *rewards.ranked_users())
+
+@router.get("/{user_id}")
+def get_dashboard(user_id: str, top: int = DASHBOARD_TOP_N):
+    """Profile, position, badges, top-N leaderboard and price for one user"""
+    user_id = user_id.strip()
+    if not user_id:
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "status": "validation_error",
+                "message": "Invalid user_id provided",
+                "code": "INVALID_USER_ID"
+            }
+        )
+    top = min(max(top, 1), MAX_TOP_N)
+
+    try:
+        if user_id not in rewards.load_rewards_db():
+            rewards.get_user_rewards(user_id)  # creates the entry, as /api/rewards/user does
+        state = _snapshot(user_id, top)
+    except Exception as e:
+        logger.error(f"Failed to build dashboard for {user_id}: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "status": "database_error",
+                "message": "Failed to access user data. Please try again.",
+                "code": "DB_ACCESS_ERROR"
+            }
+        )
+
+    return {
+        "success": True,
+        "version": state["version"],
+        "profile": rewards.user_profile(user_id, state["user"], state["position"]),
+        "leaderboard": {"entries": state["leaderboard"], "total_users": state["total_users"]},
+        "badge_definitions": rewards.BADGE_DEFINITIONS,
+        "price": current_price(),
+    }
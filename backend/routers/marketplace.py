@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException
+from typing import Optional
+import logging
+
+from services.marketplace_aggregates import marketplace_aggregates
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# All reads below are served from aggregates maintained by the chain
+# indexer and never call the RPC node.
+
+def validate_address(address: str) -> str:
+    address = address.strip().lower()
+    if len(address) != 42 or not address.startswith("0x"):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "success": False,
+                "status": "validation_error",
+                "message": "Invalid address",
+                "code": "INVALID_ADDRESS"
+            }
+        )
+    return address
+
+@router.get("/summary")
+def get_summary():
+    return {"success": True, **marketplace_aggregates.summary()}
+
+@router.get("/users/{address}/retired")
+def get_total_retired_by_user(address: str):
+    """Equivalent of getTotalRetiredByUser / getUserRetiredCredits"""
+    return {"success": True, **marketplace_aggregates.user_totals(validate_address(address))}
+
+@router.get("/users/{address}/retirements")
+def get_user_retirements(address: str, limit: Optional[int] = None):
+    """Retirement timeline of one address, oldest first"""
+    address = validate_address(address)
+    return {"success": True, "address": address, "retirements": marketplace_aggregates.user_timeline(address, limit)}
+
+@router.get("/tokens/{token_id}/retirements")
+def get_retirement_history(token_id: int, limit: Optional[int] = None):
+    """Equivalent of getRetirementHistory"""
+    return {
+        "success": True,
+        "tokenId": token_id,
+        "total_retired": marketplace_aggregates.token_total(token_id),
+        "retirements": marketplace_aggregates.retirement_history(token_id, limit)
+    }
+
+@router.get("/listings")
+def get_active_listings(token_id: Optional[int] = None):
+    return {"success": True, "listings": marketplace_aggregates.listings(token_id)}
+
+@router.get("/listings/{listing_id}")
+def get_active_listing(listing_id: int):
+    """Equivalent of getActiveListing"""
+    listing = marketplace_aggregates.active_listing(listing_id)
+    if listing is None:
+        raise HTTPException(
+            status_code=404,
+            detail={
+                "success": False,
+                "status": "not_found",
+                "message": "Listing not active",
+                "code": "LISTING_NOT_ACTIVE"
+            }
+        )
+    return {"success": True, "listing": listing}
@@ -0,0 +1,44 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+import hmac
+import logging
+
+from middleware import profiling
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Only mounted when PROFILING_ENABLED=true; see middleware/profiling.py
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Dependency accepting requests that carry the profiling token"""
+    token = profiling.PROFILING_TOKEN
+    if not token or not x_admin_token or not hmac.compare_digest(x_admin_token, token):
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "success": False,
+                "status": "authorization_error",
+                "message": "A valid X-Admin-Token header is required",
+                "code": "ADMIN_TOKEN_REQUIRED"
+            }
+        )
+
+@router.get("", dependencies=[Depends(require_admin_token)])
+def get_profiles():
+    """Per-route request counts, latency and sample counts"""
+    profiler = profiling.request_profiler
+    return {"success": True, "interval_ms": profiler.interval * 1000, "routes": profiler.summary()}
+
+@router.get("/collapsed", response_class=PlainTextResponse, dependencies=[Depends(require_admin_token)])
+def get_collapsed_stacks(route: Optional[str] = None):
+    """Collapsed stacks for flamegraph.pl or speedscope, e.g. ``route=POST /api/rewards/update``"""
+    return profiling.request_profiler.collapsed(route)
+
+@router.delete("", dependencies=[Depends(require_admin_token)])
+def reset_profiles():
+    profiling.request_profiler.reset()
+    logger.info("Request profiles reset")
+    return {"success": True}
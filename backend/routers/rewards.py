@@ -1,17 +1,18 @@
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+import copy
 import json
 import os
 import logging
-import traceback
+import shutil
+import threading
+import time
+
+from services import rewards_sync, snapshot
+from services.leaderboard_windows import WINDOW_DAYS, windowed_leaderboard
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -27,6 +28,24 @@ class ErrorResponse(BaseModel):
 # In-memory storage (in production, use a database)
 REWARDS_DB_FILE = "rewards_db.json"
 
+# Only the most recent actions are kept per user
+ACTION_HISTORY_LIMIT = 100
+
+# Write a binary snapshot next to the JSON file for fast cold starts
+REWARDS_SNAPSHOT = os.getenv("REWARDS_SNAPSHOT", "true").lower() != "false"
+
+# Parsed rewards file, revalidated against the file's mtime so that writes
+# from other processes become visible. Callers share this dict.
+# ``version`` increases with every change. In a replica (see
+# services/rewards_sync.py) the data is kept current by the owner process.
+_rewards_cache = {"path": None, "mtime": None, "data": {}, "source": None, "version": 0, "replica": False}
+_rewards_lock = threading.RLock()
+
+# All-time ranking for one database ``version``, shared by the leaderboard,
+# user position and dashboard endpoints
+_ranking_cache = {"version": None, "user_ids": [], "positions": {}}
+_ranking_lock = threading.Lock()
+
 # Badge definitions
 BADGE_DEFINITIONS = {
     "carbon_saver": {
@@ -90,55 +109,112 @@ ACTION_POINTS = {
     "energy_savings": 25,  # Per MWh saved
 }
 
+def wallet_user_id(address: str) -> str:
+    """Rewards user id of a wallet, as the frontend builds it (src/lib/rewards.ts)"""
+    return f"wallet_{address.lower()}"
+
+def _load_rewards_file() -> Tuple[dict, str]:
+    """Parse the rewards file, preferring an up-to-date binary snapshot. Returns ``(data, source)``."""
+    data = snapshot.read_snapshot(REWARDS_DB_FILE)
+    if isinstance(data, dict):
+        return data, "snapshot"
+    try:
+        data = snapshot.load_json(REWARDS_DB_FILE)
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        logger.error(f"Failed to parse rewards DB JSON: {e}")
+        # Backup corrupted file
+        backup_file = f"{REWARDS_DB_FILE}.backup.{datetime.now().timestamp()}"
+        try:
+            os.rename(REWARDS_DB_FILE, backup_file)
+            logger.info(f"Backed up corrupted DB to {backup_file}")
+        except:
+            pass
+        return {}, "reset"
+    if not isinstance(data, dict):
+        logger.warning("Rewards DB file contains invalid data structure, resetting")
+        return {}, "reset"
+    return data, "json"
+
 def load_rewards_db():
-    """Load rewards database from file or return empty dict"""
+    """Load rewards database, reusing the in-memory copy while the file is unchanged"""
     try:
-        if os.path.exists(REWARDS_DB_FILE):
+        with _rewards_lock:
+            if _rewards_cache["replica"]:
+                return _rewards_cache["data"]
             try:
-                with open(REWARDS_DB_FILE, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Validate data structure
-                    if not isinstance(data, dict):
-                        logger.warning("Rewards DB file contains invalid data structure, resetting")
-                        return {}
-                    return data
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse rewards DB JSON: {e}")
-                # Backup corrupted file
-                backup_file = f"{REWARDS_DB_FILE}.backup.{datetime.now().timestamp()}"
-                try:
-                    os.rename(REWARDS_DB_FILE, backup_file)
-                    logger.info(f"Backed up corrupted DB to {backup_file}")
-                except:
-                    pass
-                return {}
-            except Exception as e:
-                logger.error(f"Unexpected error loading rewards DB: {e}")
-                return {}
-        return {}
+                mtime = os.stat(REWARDS_DB_FILE).st_mtime_ns
+            except FileNotFoundError:
+                _rewards_cache.update(path=REWARDS_DB_FILE, mtime=None, data={})
+                return _rewards_cache["data"]
+            if _rewards_cache["path"] != REWARDS_DB_FILE or _rewards_cache["mtime"] != mtime:
+                started = time.perf_counter()
+                data, source = _load_rewards_file()
+                _rewards_cache.update(path=REWARDS_DB_FILE, mtime=mtime, data=data, source=source,
+                                      version=_rewards_cache["version"] + 1)
+                logger.info(f"Loaded {len(data)} rewards entries from {source} in {time.perf_counter() - started:.3f}s")
+            return _rewards_cache["data"]
     except Exception as e:
-        logger.error(f"Critical error in load_rewards_db: {e}")
+        logger.error(f"Unexpected error loading rewards DB: {e}")
         return {}
 
+def warm_rewards_db() -> dict:
+    """Load the rewards database into memory ahead of the first request"""
+    started = time.perf_counter()
+    with _rewards_lock:
+        data = load_rewards_db()
+        windowed_leaderboard.ensure(data)
+        write_rewards_snapshot()
+    return {"users": len(data), "source": _rewards_cache.get("source"), "seconds": time.perf_counter() - started}
+
+def write_rewards_snapshot() -> bool:
+    """
+    Write a binary snapshot of the in-memory database if the one on disk is
+    stale. Runs at warm-up and shutdown only; saves leave the snapshot stale
+    and the next cold start falls back to the JSON file. Returns True if written.
+    """
+    if not REWARDS_SNAPSHOT:
+        return False
+    with _rewards_lock:
+        if _rewards_cache["replica"] or _rewards_cache["path"] != REWARDS_DB_FILE:
+            return False
+        try:
+            if os.stat(REWARDS_DB_FILE).st_mtime_ns != _rewards_cache["mtime"] or snapshot.is_current(REWARDS_DB_FILE):
+                return False
+            snapshot.write_snapshot(_rewards_cache["data"], REWARDS_DB_FILE)
+        except OSError as e:
+            logger.warning(f"Failed to write rewards snapshot: {e}")
+            return False
+    return True
+
 def save_rewards_db(data):
     """Save rewards database to file"""
     try:
         if not isinstance(data, dict):
             raise ValueError("Data must be a dictionary")
         
-        # Create backup before saving
-        if os.path.exists(REWARDS_DB_FILE):
+        with _rewards_lock:
+            if _rewards_cache["replica"]:
+                raise RuntimeError("Rewards DB is owned by another process")
+            
+            # Create backup before saving
+            if os.path.exists(REWARDS_DB_FILE):
+                try:
+                    shutil.copyfile(REWARDS_DB_FILE, f"{REWARDS_DB_FILE}.backup")
+                except Exception as backup_error:
+                    logger.warning(f"Failed to create backup: {backup_error}")
+            
+            # Write new data
             try:
-                backup_file = f"{REWARDS_DB_FILE}.backup"
-                with open(REWARDS_DB_FILE, 'r', encoding='utf-8') as src:
-                    with open(backup_file, 'w', encoding='utf-8') as dst:
-                        dst.write(src.read())
-            except Exception as backup_error:
-                logger.warning(f"Failed to create backup: {backup_error}")
-        
-        # Write new data
-        with open(REWARDS_DB_FILE, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+                tmp_file = f"{REWARDS_DB_FILE}.tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, indent=2, ensure_ascii=False)
+                os.replace(tmp_file, REWARDS_DB_FILE)
+            except BaseException:
+                # Drop the in-memory copy so the next load re-reads the file
+                _rewards_cache.update(mtime=None)
+                raise
+            _rewards_cache.update(path=REWARDS_DB_FILE, mtime=os.stat(REWARDS_DB_FILE).st_mtime_ns, data=data,
+                                  version=_rewards_cache["version"] + 1)
         
         logger.debug("Successfully saved rewards DB")
         return True
@@ -146,8 +222,7 @@ def save_rewards_db(data):
         logger.error(f"Permission denied saving rewards DB: {e}")
         raise
     except Exception as e:
-        logger.error(f"Error saving rewards DB: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"Error saving rewards DB: {e}", exc_info=True)
         raise
 
 def get_user_rewards(user_id: str):
@@ -157,26 +232,31 @@ def get_user_rewards(user_id: str):
             raise ValueError("Invalid user_id provided")
         
         db = load_rewards_db()
+        remote = rewards_sync.remote()
+        if remote is not None and user_id not in db:
+            # New users are created by the owner process
+            return remote.call("get_user_rewards", user_id)
         
-        # Validate existing user data structure
-        if user_id in db:
-            user_data = db[user_id]
-            # Ensure required fields exist with defaults
-            if not isinstance(user_data, dict):
-                logger.warning(f"Invalid user data structure for {user_id}, resetting")
-                user_data = {}
-            
-            # Normalize user data
-            normalized = {
-                "ecoPoints": int(user_data.get("ecoPoints", 0)) if isinstance(user_data.get("ecoPoints"), (int, float)) else 0,
-                "badges": list(user_data.get("badges", [])) if isinstance(user_data.get("badges"), list) else [],
-                "rank": int(user_data.get("rank", 0)) if isinstance(user_data.get("rank"), (int, float)) else 0,
-                "actions": list(user_data.get("actions", [])) if isinstance(user_data.get("actions"), list) else [],
-                "created_at": user_data.get("created_at", datetime.now().isoformat()),
-                "updated_at": user_data.get("updated_at", datetime.now().isoformat())
-            }
-            db[user_id] = normalized
-        else:
+        # The database dict is shared with writers holding the lock
+        with _rewards_lock:
+            db = load_rewards_db()
+            if user_id in db:
+                user_data = db[user_id]
+                # Ensure required fields exist with defaults
+                if not isinstance(user_data, dict):
+                    logger.warning(f"Invalid user data structure for {user_id}, resetting")
+                    user_data = {}
+
+                # Return a normalized copy; the stored entry is left to writers
+                return {
+                    "ecoPoints": int(user_data.get("ecoPoints", 0)) if isinstance(user_data.get("ecoPoints"), (int, float)) else 0,
+                    "badges": list(user_data.get("badges", [])) if isinstance(user_data.get("badges"), list) else [],
+                    "rank": int(user_data.get("rank", 0)) if isinstance(user_data.get("rank"), (int, float)) else 0,
+                    "actions": list(user_data.get("actions", [])) if isinstance(user_data.get("actions"), list) else [],
+                    "created_at": user_data.get("created_at", datetime.now().isoformat()),
+                    "updated_at": user_data.get("updated_at", datetime.now().isoformat())
+                }
+
             # Create new user entry
             db[user_id] = {
                 "ecoPoints": 0,
@@ -187,11 +267,10 @@ def get_user_rewards(user_id: str):
                 "updated_at": datetime.now().isoformat()
             }
             save_rewards_db(db)
-        
-        return db[user_id]
+            rewards_sync.notify_changed(user_id)
+            return copy.deepcopy(db[user_id])
     except Exception as e:
-        logger.error(f"Error in get_user_rewards for {user_id}: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"Error in get_user_rewards for {user_id}: {e}", exc_info=True)
         # Return default structure on error
         return {
             "ecoPoints": 0,
@@ -242,59 +321,97 @@ def update_user_rewards(user_id: str, updates: dict):
         save_rewards_db(db)
         return db[user_id]
     except Exception as e:
-        logger.error(f"Error in update_user_rewards for {user_id}: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"Error in update_user_rewards for {user_id}: {e}", exc_info=True)
         raise
 
-def check_badge_eligibility(user_id: str, eco_points: int, action_type: str):
-    """Check if user is eligible for new badges"""
-    user = get_user_rewards(user_id)
-    earned_badges = set(user.get("badges", []))
-    new_badges = []
-    
-    # Check each badge definition
+def eligible_badges(eco_points: int, actions: List[dict]) -> List[str]:
+    """Badges whose criteria are met by a points total and action history, in definition order"""
+    types = [a.get("type", "") for a in actions if isinstance(a, dict)]
+    counts = {
+        "eco_investor": sum(1 for t in types if t == "investment"),
+        "calculator_master": sum(1 for t in types if "calculator" in t),
+        "ai_explorer": sum(1 for t in types if "ai" in t.lower()),
+    }
+    eligible = []
     for badge_id, badge_def in BADGE_DEFINITIONS.items():
-        if badge_id in earned_badges:
-            continue  # Already earned
-        
-        # Check if user meets criteria
-        eligible = False
-        
-        if badge_id == "carbon_saver" and eco_points >= badge_def["points_required"]:
-            eligible = True
-        elif badge_id == "green_champion" and eco_points >= badge_def["points_required"]:
-            eligible = True
+        if badge_id in ("carbon_saver", "green_champion", "sustainability_hero"):
+            met = eco_points >= badge_def["points_required"]
         elif badge_id == "eco_investor":
-            # Count investments from actions
-            investments = sum(1 for a in user.get("actions", []) if a.get("type") == "investment")
-            if investments >= 5:
-                eligible = True
+            met = counts[badge_id] >= 5
         elif badge_id == "calculator_master":
-            calc_uses = sum(1 for a in user.get("actions", []) if "calculator" in a.get("type", ""))
-            if calc_uses >= 10:
-                eligible = True
-        elif badge_id == "water_warrior" and action_type == "water_calculation":
-            eligible = True
-        elif badge_id == "plastic_fighter" and action_type == "plastic_calculation":
-            eligible = True
+            met = counts[badge_id] >= 10
+        elif badge_id == "water_warrior":
+            met = "water_calculation" in types
+        elif badge_id == "plastic_fighter":
+            met = "plastic_calculation" in types
         elif badge_id == "ai_explorer":
-            ai_uses = sum(1 for a in user.get("actions", []) if "ai" in a.get("type", "").lower())
-            if ai_uses >= 20:
-                eligible = True
-        elif badge_id == "sustainability_hero" and eco_points >= badge_def["points_required"]:
-            eligible = True
-        
-        if eligible:
-            new_badges.append(badge_id)
-            earned_badges.add(badge_id)
-    
-    return new_badges
+            met = counts[badge_id] >= 20
+        else:
+            met = False
+        if met:
+            eligible.append(badge_id)
+    return eligible
+
+def check_badge_eligibility(user_id: str, eco_points: int, action_type: str):
+    """Check if user is eligible for new badges"""
+    user = get_user_rewards(user_id)
+    earned_badges = set(user.get("badges", []))
+    actions = user.get("actions", [])
+    if not isinstance(actions, list):
+        actions = []
+    return [badge_id for badge_id in eligible_badges(eco_points, actions) if badge_id not in earned_badges]
 
 def calculate_rank(eco_points: int) -> int:
     """Calculate user rank based on points"""
     # Simple ranking: every 100 points = 1 rank level
     return max(1, eco_points // 100)
 
+def leaderboard_entry(user_id: str, user_data) -> dict:
+    """Public leaderboard fields of one user entry"""
+    if not isinstance(user_data, dict):
+        user_data = {}
+    eco_points = int(user_data.get("ecoPoints", 0)) if isinstance(user_data.get("ecoPoints"), (int, float)) else 0
+    rank = int(user_data.get("rank", 0)) if isinstance(user_data.get("rank"), (int, float)) else 0
+    badges = list(user_data.get("badges", [])) if isinstance(user_data.get("badges"), list) else []
+    return {
+        "user_id": str(user_id),
+        "ecoPoints": eco_points,
+        "rank": rank,
+        "badges": badges,
+        "badge_count": len(badges)
+    }
+
+def ranked_users() -> Tuple[int, List[str], Dict[str, int]]:
+    """
+    ``(version, user_ids, positions)`` for the current database: user ids by
+    ecoPoints then badge count, descending, and each user's 1-based position.
+    Sorted once per database version; the returned lists are shared.
+    """
+    with _rewards_lock:
+        db = load_rewards_db()
+        version = _rewards_cache["version"]
+        if _ranking_cache["version"] == version:
+            return version, _ranking_cache["user_ids"], _ranking_cache["positions"]
+        rows = []
+        for user_id, user_data in db.items():
+            if not isinstance(user_data, dict):
+                continue
+            eco_points = user_data.get("ecoPoints", 0)
+            badges = user_data.get("badges")
+            rows.append((
+                int(eco_points) if isinstance(eco_points, (int, float)) else 0,
+                len(badges) if isinstance(badges, list) else 0,
+                str(user_id),
+            ))
+    # Sort outside the lock; ties keep database order as before
+    rows.sort(key=lambda row: (row[0], row[1]), reverse=True)
+    user_ids = [row[2] for row in rows]
+    positions = {user_id: i for i, user_id in enumerate(user_ids, 1)}
+    with _ranking_lock:
+        if _ranking_cache["version"] is None or version > _ranking_cache["version"]:
+            _ranking_cache.update(version=version, user_ids=user_ids, positions=positions)
+    return version, user_ids, positions
+
 class UpdateRewardsRequest(BaseModel):
     user_id: str = Field(..., min_length=1, description="User identifier")
     action_type: str = Field(..., description="Type of eco-action performed")
@@ -324,6 +441,140 @@ class LeaderboardQuery(BaseModel):
     limit: Optional[int] = 100
     region: Optional[str] = None  # For future regional leaderboards
 
+def apply_reward_action(user_id: str, action_type: str, amount: Optional[float] = 1.0, metadata: Optional[dict] = None):
+    """
+    Record an eco-action for a user: award points, update rank and badges.
+    Shared by the HTTP endpoint and server-side sources such as the chain indexer.
+    """
+    remote = rewards_sync.remote()
+    if remote is not None:
+        return remote.call("apply_reward_action", user_id, action_type, amount, metadata)
+    # The in-memory database is shared by all request threads
+    with _rewards_lock:
+        result = _apply_reward_action(user_id, action_type, amount, metadata)
+        windowed_leaderboard.sync_user(load_rewards_db(), user_id)
+        rewards_sync.notify_changed(user_id)
+        return result
+
+def _apply_reward_action(user_id: str, action_type: str, amount: Optional[float], metadata: Optional[dict]):
+    if action_type not in ACTION_POINTS:
+        raise ValueError(f"Invalid action_type. Must be one of: {', '.join(ACTION_POINTS)}")
+    
+    # Get user data with error handling
+    try:
+        user = get_user_rewards(user_id)
+    except Exception as db_error:
+        logger.error(f"Database error getting user rewards: {db_error}")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "status": "database_error",
+                "message": "Failed to access user data. Please try again.",
+                "code": "DB_ACCESS_ERROR"
+            }
+        )
+
+    # Validate user data structure
+    if not isinstance(user, dict):
+        logger.error(f"Invalid user data structure for {user_id}")
+        user = get_user_rewards(user_id)  # Retry
+
+    # Calculate points for this action
+    base_points = ACTION_POINTS.get(action_type, 10)
+    if not isinstance(base_points, (int, float)):
+        base_points = 10
+
+    try:
+        amount = float(amount) if amount is not None else 1.0
+        if amount < 0:
+            amount = 0
+        points_earned = int(base_points * amount)
+    except (ValueError, TypeError) as calc_error:
+        logger.warning(f"Invalid amount calculation: {calc_error}, using default")
+        amount = 1.0
+        points_earned = int(base_points * amount)
+
+    # Safely get current points
+    try:
+        current_points = int(user.get("ecoPoints", 0)) if isinstance(user.get("ecoPoints"), (int, float)) else 0
+    except (ValueError, TypeError):
+        current_points = 0
+
+    new_eco_points = current_points + points_earned
+    new_rank = calculate_rank(new_eco_points)
+
+    # Record action
+    action = {
+        "type": action_type,
+        "amount": amount,
+        "points_earned": points_earned,
+        "timestamp": datetime.now().isoformat(),
+        "metadata": metadata if isinstance(metadata, dict) else {}
+    }
+
+    # Safely handle actions list
+    actions = user.get("actions", [])
+    if not isinstance(actions, list):
+        actions = []
+    actions.append(action)
+
+    # Update user with error handling
+    try:
+        update_user_rewards(user_id, {
+            "ecoPoints": new_eco_points,
+            "rank": new_rank,
+            "actions": actions[-ACTION_HISTORY_LIMIT:]
+        })
+    except Exception as update_error:
+        logger.error(f"Failed to update user rewards: {update_error}")
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "success": False,
+                "status": "database_error",
+                "message": "Failed to save rewards. Points may not have been updated.",
+                "code": "DB_UPDATE_ERROR"
+            }
+        )
+
+    # Check for new badges with error handling
+    new_badges = []
+    try:
+        user = get_user_rewards(user_id)  # Reload
+        new_badges = check_badge_eligibility(user_id, new_eco_points, action_type)
+
+        if new_badges:
+            current_badges = user.get("badges", [])
+            if not isinstance(current_badges, list):
+                current_badges = []
+            current_badges.extend(new_badges)
+            try:
+                update_user_rewards(user_id, {"badges": current_badges})
+            except Exception as badge_error:
+                logger.error(f"Failed to save new badges: {badge_error}")
+                # Don't fail the whole request if badge save fails
+    except Exception as badge_check_error:
+        logger.error(f"Error checking badge eligibility: {badge_check_error}")
+        # Continue without badges if check fails
+
+    # Format badge details safely
+    badge_details = []
+    for bid in new_badges:
+        if bid in BADGE_DEFINITIONS:
+            badge_details.append(BADGE_DEFINITIONS[bid])
+
+    logger.info(f"Successfully updated rewards for {user_id}: +{points_earned} points", extra={"sample": "rewards.update"})
+
+    return {
+        "success": True,
+        "points_earned": points_earned,
+        "total_points": new_eco_points,
+        "rank": new_rank,
+        "new_badges": badge_details,
+        "action": action
+    }
+
 @router.post("/update", response_model_exclude_none=True)
 def update_rewards(req: UpdateRewardsRequest):
     """Update user rewards when they perform an eco-action"""
@@ -341,120 +592,7 @@ def update_rewards(req: UpdateRewardsRequest):
                 }
             )
         
-        # Get user data with error handling
-        try:
-            user = get_user_rewards(req.user_id)
-        except Exception as db_error:
-            logger.error(f"Database error getting user rewards: {db_error}")
-            raise HTTPException(
-                status_code=503,
-                detail={
-                    "success": False,
-                    "status": "database_error",
-                    "message": "Failed to access user data. Please try again.",
-                    "code": "DB_ACCESS_ERROR"
-                }
-            )
-        
-        # Validate user data structure
-        if not isinstance(user, dict):
-            logger.error(f"Invalid user data structure for {req.user_id}")
-            user = get_user_rewards(req.user_id)  # Retry
-        
-        # Calculate points for this action
-        base_points = ACTION_POINTS.get(req.action_type, 10)
-        if not isinstance(base_points, (int, float)):
-            base_points = 10
-        
-        try:
-            amount = float(req.amount) if req.amount is not None else 1.0
-            if amount < 0:
-                amount = 0
-            points_earned = int(base_points * amount)
-        except (ValueError, TypeError) as calc_error:
-            logger.warning(f"Invalid amount calculation: {calc_error}, using default")
-            amount = 1.0
-            points_earned = int(base_points * amount)
-        
-        # Safely get current points
-        try:
-            current_points = int(user.get("ecoPoints", 0)) if isinstance(user.get("ecoPoints"), (int, float)) else 0
-        except (ValueError, TypeError):
-            current_points = 0
-        
-        new_eco_points = current_points + points_earned
-        new_rank = calculate_rank(new_eco_points)
-        
-        # Record action
-        action = {
-            "type": req.action_type,
-            "amount": amount,
-            "points_earned": points_earned,
-            "timestamp": datetime.now().isoformat(),
-            "metadata": req.metadata if isinstance(req.metadata, dict) else {}
-        }
-        
-        # Safely handle actions list
-        actions = user.get("actions", [])
-        if not isinstance(actions, list):
-            actions = []
-        actions.append(action)
-        
-        # Update user with error handling
-        try:
-            update_user_rewards(req.user_id, {
-                "ecoPoints": new_eco_points,
-                "rank": new_rank,
-                "actions": actions[-100:]  # Keep last 100 actions
-            })
-        except Exception as update_error:
-            logger.error(f"Failed to update user rewards: {update_error}")
-            raise HTTPException(
-                status_code=503,
-                detail={
-                    "success": False,
-                    "status": "database_error",
-                    "message": "Failed to save rewards. Points may not have been updated.",
-                    "code": "DB_UPDATE_ERROR"
-                }
-            )
-        
-        # Check for new badges with error handling
-        new_badges = []
-        try:
-            user = get_user_rewards(req.user_id)  # Reload
-            new_badges = check_badge_eligibility(req.user_id, new_eco_points, req.action_type)
-            
-            if new_badges:
-                current_badges = user.get("badges", [])
-                if not isinstance(current_badges, list):
-                    current_badges = []
-                current_badges.extend(new_badges)
-                try:
-                    update_user_rewards(req.user_id, {"badges": current_badges})
-                except Exception as badge_error:
-                    logger.error(f"Failed to save new badges: {badge_error}")
-                    # Don't fail the whole request if badge save fails
-        except Exception as badge_check_error:
-            logger.error(f"Error checking badge eligibility: {badge_check_error}")
-            # Continue without badges if check fails
-        
-        # Format badge details safely
-        badge_details = []
-        for bid in new_badges:
-            if bid in BADGE_DEFINITIONS:
-                badge_details.append(BADGE_DEFINITIONS[bid])
-        
-        logger.info(f"Successfully updated rewards for {req.user_id}: +{points_earned} points")
-        
-        return {
-            "success": True,
-            "points_earned": points_earned,
-            "total_points": new_eco_points,
-            "rank": new_rank,
-            "new_badges": badge_details,
-            "action": action
-        }
+        return apply_reward_action(req.user_id, req.action_type, req.amount, req.metadata)
     except HTTPException:
         raise
     except ValueError as ve:
@@ -469,8 +607,7 @@ def update_rewards(req: UpdateRewardsRequest):
             }
         )
     except Exception as e:
-        logger.error(f"Unexpected error in update_rewards: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"Unexpected error in update_rewards: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail={
@@ -482,9 +619,33 @@ def update_rewards(req: UpdateRewardsRequest):
             }
         )
 
+def _windowed_leaderboard(db: dict, window: str, limit: int, region: Optional[str]):
+    """Top users by points earned within ``window``, served from the day buckets"""
+    if not windowed_leaderboard.is_current(db):
+        with _rewards_lock:
+            db = load_rewards_db()
+            windowed_leaderboard.ensure(db)
+    top, total = windowed_leaderboard.top(window, limit)
+
+    leaderboard = []
+    for position, (user_id, points) in enumerate(top, 1):
+        entry = leaderboard_entry(user_id, db.get(user_id))
+        leaderboard.append({**entry, "points": points, "position": position})
+
+    logger.info(f"Successfully loaded {window} leaderboard: {total} users, limit={limit}", extra={"sample": "rewards.leaderboard"})
+
+    return {
+        "success": True,
+        "leaderboard": leaderboard,
+        "region": region or "global",
+        "window": window,
+        "since": windowed_leaderboard.since(window),
+        "total_users": total
+    }
+
 @router.get("/leaderboard")
-def get_leaderboard(limit: int = 100, region: Optional[str] = None):
-    """Get global or regional leaderboard"""
+def get_leaderboard(limit: int = 100, region: Optional[str] = None, window: Optional[str] = None):
+    """Get global or regional leaderboard, all-time or for the last day, week or month"""
     try:
         # Validate limit
         if limit < 1:
@@ -492,6 +653,17 @@ def get_leaderboard(limit: int = 100, region: Optional[str] = None):
         if limit > 1000:
             limit = 1000  # Cap at 1000 for performance
         
+        if window is not None and window not in WINDOW_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "success": False,
+                    "status": "validation_error",
+                    "message": f"Invalid window. Must be one of: {', '.join(WINDOW_DAYS)}",
+                    "code": "INVALID_WINDOW"
+                }
+            )
+        
         # Load database with error handling
         try:
             db = load_rewards_db()
@@ -516,54 +688,27 @@ def get_leaderboard(limit: int = 100, region: Optional[str] = None):
                 "total_users": 0
             }
         
-        # Convert to list and sort by points with error handling
-        users = []
-        for user_id, user_data in db.items():
-            try:
-                if not isinstance(user_data, dict):
-                    continue
-                
-                # Safely extract data with defaults
-                eco_points = int(user_data.get("ecoPoints", 0)) if isinstance(user_data.get("ecoPoints"), (int, float)) else 0
-                rank = int(user_data.get("rank", 0)) if isinstance(user_data.get("rank"), (int, float)) else 0
-                badges = list(user_data.get("badges", [])) if isinstance(user_data.get("badges"), list) else []
-                
-                users.append({
-                    "user_id": str(user_id),
-                    "ecoPoints": eco_points,
-                    "rank": rank,
-                    "badges": badges,
-                    "badge_count": len(badges)
-                })
-            except Exception as user_error:
-                logger.warning(f"Error processing user {user_id} for leaderboard: {user_error}")
-                continue
-        
-        # Sort by points (descending) with error handling
-        try:
-            users.sort(key=lambda x: (x.get("ecoPoints", 0), x.get("badge_count", 0)), reverse=True)
-        except Exception as sort_error:
-            logger.error(f"Error sorting leaderboard: {sort_error}")
-            # Return unsorted if sort fails
-            pass
+        if window is not None:
+            return _windowed_leaderboard(db, window, limit, region)
         
-        # Add position
-        for i, user in enumerate(users[:limit]):
-            user["position"] = i + 1
+        # Sorted once per database version and shared with other endpoints
+        _, user_ids, _ = ranked_users()
+        users = []
+        for position, user_id in enumerate(user_ids[:limit], 1):
+            users.append({**leaderboard_entry(user_id, db.get(user_id)), "position": position})
         
-        logger.info(f"Successfully loaded leaderboard: {len(users)} users, limit={limit}")
+        logger.info(f"Successfully loaded leaderboard: {len(user_ids)} users, limit={limit}", extra={"sample": "rewards.leaderboard"})
         
         return {
             "success": True,
-            "leaderboard": users[:limit],
+            "leaderboard": users,
             "region": region or "global",
-            "total_users": len(users)
+            "total_users": len(user_ids)
         }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_leaderboard: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"Unexpected error in get_leaderboard: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail={
@@ -574,6 +719,69 @@ def get_leaderboard(limit: int = 100, region: Optional[str] = None):
             }
         )
 
+def user_profile(user_id: str, user: dict, position: Optional[int]) -> dict:
+    """Profile fields returned for one user: points, rank, badge details, stats and recent actions"""
+    # Get badge details with error handling
+    badge_details = []
+    try:
+        badges = user.get("badges", [])
+        if not isinstance(badges, list):
+            badges = []
+
+        for badge_id in badges:
+            if isinstance(badge_id, str) and badge_id in BADGE_DEFINITIONS:
+                badge_details.append({
+                    "id": badge_id,
+                    **BADGE_DEFINITIONS[badge_id]
+                })
+    except Exception as badge_error:
+        logger.warning(f"Error processing badges for {user_id}: {badge_error}")
+
+    # Calculate stats with error handling
+    try:
+        actions = user.get("actions", [])
+        if not isinstance(actions, list):
+            actions = []
+
+        total_actions = len(actions)
+        carbon_offset = 0.0
+
+        for action in actions:
+            if isinstance(action, dict):
+                if action.get("type") == "carbon_offset":
+                    try:
+                        amount = float(action.get("amount", 0))
+                        if amount > 0:
+                            carbon_offset += amount
+                    except (ValueError, TypeError):
+                        pass
+    except Exception as stats_error:
+        logger.warning(f"Error calculating stats for {user_id}: {stats_error}")
+        total_actions = 0
+        carbon_offset = 0.0
+        actions = []
+
+    # Safely get user values
+    eco_points = int(user.get("ecoPoints", 0)) if isinstance(user.get("ecoPoints"), (int, float)) else 0
+    rank = int(user.get("rank", 0)) if isinstance(user.get("rank"), (int, float)) else 0
+
+    # Get recent actions safely
+    recent_actions = actions[-10:] if isinstance(actions, list) else []
+
+    return {
+        "user_id": user_id,
+        "ecoPoints": eco_points,
+        "rank": rank,
+        "position": position,
+        "badges": badge_details,
+        "stats": {
+            "total_actions": total_actions,
+            "carbon_offset_tons": round(carbon_offset, 2),
+            "badge_count": len(badge_details)
+        },
+        "recent_actions": recent_actions
+    }
+
 @router.get("/user/{user_id}")
 def get_user_rewards_data(user_id: str):
     """Get user's rewards data"""
@@ -611,91 +819,19 @@ def get_user_rewards_data(user_id: str):
             logger.warning(f"Invalid user data structure for {user_id}")
             user = {}
         
-        # Get badge details with error handling
-        badge_details = []
-        try:
-            badges = user.get("badges", [])
-            if not isinstance(badges, list):
-                badges = []
-            
-            for badge_id in badges:
-                if isinstance(badge_id, str) and badge_id in BADGE_DEFINITIONS:
-                    badge_details.append({
-                        "id": badge_id,
-                        **BADGE_DEFINITIONS[badge_id]
-                    })
-        except Exception as badge_error:
-            logger.warning(f"Error processing badges for {user_id}: {badge_error}")
-        
-        # Calculate stats with error handling
-        try:
-            actions = user.get("actions", [])
-            if not isinstance(actions, list):
-                actions = []
-            
-            total_actions = len(actions)
-            carbon_offset = 0.0
-            
-            for action in actions:
-                if isinstance(action, dict):
-                    if action.get("type") == "carbon_offset":
-                        try:
-                            amount = float(action.get("amount", 0))
-                            if amount > 0:
-                                carbon_offset += amount
-                        except (ValueError, TypeError):
-                            pass
-        except Exception as stats_error:
-            logger.warning(f"Error calculating stats for {user_id}: {stats_error}")
-            total_actions = 0
-            carbon_offset = 0.0
-            actions = []
-        
         # Get leaderboard position with error handling
         position = None
         try:
-            db = load_rewards_db()
-            if isinstance(db, dict):
-                all_users = []
-                for uid, data in db.items():
-                    if isinstance(data, dict):
-                        try:
-                            points = int(data.get("ecoPoints", 0)) if isinstance(data.get("ecoPoints"), (int, float)) else 0
-                            all_users.append((str(uid), points))
-                        except (ValueError, TypeError):
-                            continue
-                
-                all_users.sort(key=lambda x: x[1], reverse=True)
-                position = next((i + 1 for i, (uid, _) in enumerate(all_users) if uid == user_id), None)
+            _, _, positions = ranked_users()
+            position = positions.get(user_id)
         except Exception as pos_error:
             logger.warning(f"Error calculating position for {user_id}: {pos_error}")
         
-        # Safely get user values
-        eco_points = int(user.get("ecoPoints", 0)) if isinstance(user.get("ecoPoints"), (int, float)) else 0
-        rank = int(user.get("rank", 0)) if isinstance(user.get("rank"), (int, float)) else 0
-        
-        # Get recent actions safely
-        recent_actions = actions[-10:] if isinstance(actions, list) else []
-        
-        return {
-            "success": True,
-            "user_id": user_id,
-            "ecoPoints": eco_points,
-            "rank": rank,
-            "position": position,
-            "badges": badge_details,
-            "stats": {
-                "total_actions": total_actions,
-                "carbon_offset_tons": round(carbon_offset, 2),
-                "badge_count": len(badge_details)
-            },
-            "recent_actions": recent_actions
-        }
+        return {"success": True, **user_profile(user_id, user, position)}
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Unexpected error in get_user_rewards_data: {e}")
-        logger.error(traceback.format_exc())
+        logger.error(f"Unexpected error in get_user_rewards_data: {e}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail={
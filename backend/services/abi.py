@@ -0,0 +1,228 @@
+"""
+Minimal Solidity ABI codec.
+
+Supports the types used by the marketplace contracts: uintN/intN, address,
+bool, bytesN, bytes, string, tuples ``(t1,t2,...)`` and dynamic arrays
+``T[]``. Addresses are returned as lowercase 0x-prefixed strings and
+bytes values as bytes.
+"""
+from functools import lru_cache
+from typing import List, NamedTuple, Sequence, Tuple
+
+from services.keccak import keccak256
+
+
+class AbiError(ValueError):
+    """Raised for malformed ABI data or unsupported types"""
+
+
+def parse_type(t: str):
+    """Parse a type string into ``str`` (base type), ``("tuple", [...])`` or ``("array", inner)``"""
+    t = t.strip()
+    if t.endswith("[]"):
+        return ("array", parse_type(t[:-2]))
+    if t.startswith("("):
+        if not t.endswith(")"):
+            raise AbiError(f"Unsupported type '{t}'")
+        parts, depth, start = [], 0, 1
+        for i, ch in enumerate(t[1:-1], start=1):
+            if ch == "(":
+                depth += 1
+            elif ch == ")":
+                depth -= 1
+            elif ch == "," and depth == 0:
+                parts.append(t[start:i])
+                start = i + 1
+        if t[start:-1]:
+            parts.append(t[start:-1])
+        return ("tuple", [parse_type(p) for p in parts])
+    return t
+
+
+def _is_dynamic(t) -> bool:
+    if isinstance(t, str):
+        return t in ("string", "bytes")
+    if t[0] == "array":
+        return True
+    return any(_is_dynamic(inner) for inner in t[1])
+
+
+def _head_size(t) -> int:
+    if isinstance(t, tuple) and t[0] == "tuple" and not _is_dynamic(t):
+        return sum(_head_size(inner) for inner in t[1])
+    return 32
+
+
+# -------------------------
+# Decoding
+# -------------------------
+def _word(data: bytes, offset: int) -> bytes:
+    if offset + 32 > len(data):
+        raise AbiError("ABI data too short")
+    return data[offset:offset + 32]
+
+
+def _decode_static(t: str, word: bytes):
+    if t.startswith("uint"):
+        return int.from_bytes(word, "big")
+    if t.startswith("int"):
+        return int.from_bytes(word, "big", signed=True)
+    if t == "address":
+        return "0x" + word[12:].hex()
+    if t == "bool":
+        return word[-1] == 1
+    if t.startswith("bytes"):
+        return word[:int(t[5:])]
+    raise AbiError(f"Unsupported type '{t}'")
+
+
+def _decode(t, data: bytes, offset: int):
+    """Decode the value of type ``t`` whose encoding starts at ``offset``"""
+    if isinstance(t, str):
+        if t in ("string", "bytes"):
+            length = int.from_bytes(_word(data, offset), "big")
+            raw = data[offset + 32:offset + 32 + length]
+            if len(raw) != length:
+                raise AbiError("ABI data too short")
+            return raw.decode("utf-8", errors="replace") if t == "string" else raw
+        return _decode_static(t, _word(data, offset))
+    if t[0] == "array":
+        length = int.from_bytes(_word(data, offset), "big")
+        return _decode_sequence([t[1]] * length, data, offset + 32)
+    return tuple(_decode_sequence(t[1], data, offset))
+
+
+def _decode_sequence(types: Sequence, data: bytes, base: int) -> list:
+    values, head = [], base
+    for t in types:
+        if _is_dynamic(t):
+            values.append(_decode(t, data, base + int.from_bytes(_word(data, head), "big")))
+        else:
+            values.append(_decode(t, data, head))
+        head += _head_size(t)
+    return values
+
+
+def decode(types: Sequence[str], data: bytes) -> list:
+    """Decode ABI-encoded ``data`` as a sequence of values of ``types``"""
+    return _decode_sequence([parse_type(t) for t in types], data, 0)
+
+
+def decode_topic(t: str, topic: str):
+    """Decode an indexed event parameter (static types only)"""
+    return _decode_static(t, bytes.fromhex(topic[2:]))
+
+
+# -------------------------
+# Encoding
+# -------------------------
+def _encode_static(t: str, value) -> bytes:
+    if t.startswith("uint"):
+        return int(value).to_bytes(32, "big")
+    if t.startswith("int"):
+        return int(value).to_bytes(32, "big", signed=True)
+    if t == "address":
+        return bytes.fromhex(value[2:] if value.startswith("0x") else value).rjust(32, b"\x00")
+    if t == "bool":
+        return (1 if value else 0).to_bytes(32, "big")
+    if t.startswith("bytes"):
+        return bytes(value).ljust(32, b"\x00")
+    raise AbiError(f"Unsupported type '{t}'")
+
+
+def _encode(t, value) -> bytes:
+    if isinstance(t, str):
+        if t in ("string", "bytes"):
+            raw = value.encode("utf-8") if isinstance(value, str) else bytes(value)
+            return len(raw).to_bytes(32, "big") + raw.ljust((len(raw) + 31) // 32 * 32, b"\x00")
+        return _encode_static(t, value)
+    if t[0] == "array":
+        return len(value).to_bytes(32, "big") + _encode_sequence([t[1]] * len(value), value)
+    return _encode_sequence(t[1], value)
+
+
+def _encode_sequence(types: Sequence, values: Sequence) -> bytes:
+    if len(types) != len(values):
+        raise AbiError(f"Expected {len(types)} values, got {len(values)}")
+    heads, tails = [], []
+    head_size = sum(_head_size(t) for t in types)
+    for t, value in zip(types, values):
+        if _is_dynamic(t):
+            heads.append((head_size + sum(len(x) for x in tails)).to_bytes(32, "big"))
+            tails.append(_encode(t, value))
+        else:
+            heads.append(_encode(t, value))
+    return b"".join(heads) + b"".join(tails)
+
+
+def encode(types: Sequence[str], values: Sequence) -> bytes:
+    """ABI-encode ``values`` as a sequence of ``types``"""
+    return _encode_sequence([parse_type(t) for t in types], values)
+
+
+# -------------------------
+# Events and functions
+# -------------------------
+def signature_hash(signature: str) -> bytes:
+    return keccak256(signature.encode("ascii"))
+
+
+@lru_cache(maxsize=None)
+def function_selector(signature: str) -> bytes:
+    return signature_hash(signature)[:4]
+
+
+class FunctionSpec(NamedTuple):
+    name: str
+    inputs: List[str]
+    outputs: List[str]
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name}({','.join(self.inputs)})"
+
+    @property
+    def selector(self) -> bytes:
+        return function_selector(self.signature)
+
+    def encode_call(self, *args) -> bytes:
+        return self.selector + encode(self.inputs, args)
+
+    def decode_result(self, data: bytes):
+        """Decode return data; a single output is returned unwrapped"""
+        values = decode(self.outputs, data)
+        return values[0] if len(values) == 1 else values
+
+
+class EventSpec(NamedTuple):
+    name: str
+    inputs: List[Tuple[str, str, bool]]  # (name, type, indexed)
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name}({','.join(t for _, t, _ in self.inputs)})"
+
+    @property
+    def topic(self) -> str:
+        return "0x" + signature_hash(self.signature).hex()
+
+    def decode_log(self, log: dict) -> dict:
+        """Decode a JSON-RPC log object into an ``{arg: value}`` dict"""
+        topics = log["topics"][1:]
+        indexed = [(n, t) for n, t, is_indexed in self.inputs if is_indexed]
+        if len(topics) != len(indexed):
+            raise AbiError(f"{self.name}: expected {len(indexed)} indexed topics, got {len(topics)}")
+        args = {n: decode_topic(t, topic) for (n, t), topic in zip(indexed, topics)}
+        plain = [(n, t) for n, t, is_indexed in self.inputs if not is_indexed]
+        data = bytes.fromhex(log.get("data", "0x")[2:])
+        args.update(zip([n for n, _ in plain], decode([t for _, t in plain], data)))
+        return args
+
+    def encode_log(self, args: dict) -> Tuple[List[str], str]:
+        """Build ``(topics, data)`` for ``args``; used for fixtures and tests"""
+        topics = [self.topic] + [
+            "0x" + _encode_static(t, args[n]).hex() for n, t, is_indexed in self.inputs if is_indexed
+        ]
+        plain = [(n, t) for n, t, is_indexed in self.inputs if not is_indexed]
+        data = encode([t for _, t in plain], [args[n] for n, _ in plain])
+        return topics, "0x" + data.hex()
@@ -0,0 +1,135 @@
+"""
+Memoized footprint results for repeated calculator inputs.
+
+Most traffic is a handful of industry presets with default inputs, so
+results are cached under a canonical key: the industry, the inputs rounded
+to ``INPUT_DECIMALS`` in the industry's parameter order, and the factor
+table version. Records are evaluated on their rounded inputs, so a cached
+result is exactly what a fresh computation would return. When the factor
+tables change the version changes and the cache empties itself.
+"""
+import os
+import threading
+from collections import OrderedDict
+from typing import Hashable, Iterable, List, Optional
+
+from services import calculator
+from services.calculator import CalculationError, compute_footprints
+
+INPUT_DECIMALS = 2
+CACHE_SIZE = int(os.getenv("CALCULATOR_CACHE_SIZE", 10_000))
+
+
+def canonical_record(record: dict):
+    """
+    Return ``(key, normalized_record)`` for a calculator record.
+    Raises CalculationError for unknown industries or parameters.
+    """
+    industry = record.get("industry")
+    i = calculator.INDUSTRY_INDEX.get(industry)
+    if i is None:
+        raise CalculationError(f"Unknown industry '{industry}'")
+    params = calculator.PARAMETER_INDEX[i]
+    slots = [None] * calculator.PARAMETER_COUNT
+    for param, value in (record.get("inputs") or {}).items():
+        j = params.get(param)
+        if j is None:
+            raise CalculationError(f"Unknown parameter '{param}' for industry '{industry}'")
+        slots[j] = round(float(value), INPUT_DECIMALS) + 0.0  # + 0.0 folds -0.0 into 0.0
+    inputs = {param: slots[j] for param, j in params.items() if slots[j] is not None}
+    return (industry, tuple(slots), calculator.FACTOR_TABLE_VERSION), {"industry": industry, "inputs": inputs}
+
+
+class CalculationCache:
+    """Thread-safe LRU of canonical key -> result with hit/miss counters"""
+
+    def __init__(self, maxsize: int = CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = calculator.FACTOR_TABLE_VERSION
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_version(self):
+        if self._version != calculator.FACTOR_TABLE_VERSION:
+            self._entries.clear()
+            self._version = calculator.FACTOR_TABLE_VERSION
+            self.invalidations += 1
+
+    def get(self, key: Hashable) -> Optional[dict]:
+        with self._lock:
+            self._check_version()
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key: Hashable, result: dict):
+        with self._lock:
+            self._check_version()
+            if key[-1] != self._version:
+                return  # computed against tables that have since changed
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "factor_table_version": self._version,
+            }
+
+
+calculation_cache = CalculationCache()
+
+
+def compute_footprints_cached(records: Iterable[dict], ids: Optional[List] = None,
+                              cache: CalculationCache = calculation_cache) -> List[dict]:
+    """
+    Like compute_footprints, but serves repeated inputs from the cache.
+    All misses in a batch are evaluated together in one vectorized pass.
+    """
+    results: List[Optional[dict]] = []
+    missing = {}  # key -> (normalized record, [positions])
+    for n, record in enumerate(records):
+        try:
+            key, normalized = canonical_record(record)
+        except CalculationError as e:
+            raise CalculationError(f"Record {n}: {e}") from None
+        result = cache.get(key)
+        if result is None:
+            missing.setdefault(key, (normalized, []))[1].append(n)
+        results.append(result)
+
+    if missing:
+        keys = list(missing)
+        computed = compute_footprints([missing[key][0] for key in keys])
+        for key, result in zip(keys, computed):
+            cache.put(key, result)
+            for n in missing[key][1]:
+                results[n] = result
+
+    if ids is None:
+        return [dict(result) for result in results]
+    return [{**result, "id": ids[n]} for n, result in enumerate(results)]
@@ -0,0 +1,218 @@
+"""
+Server-side carbon footprint calculation.
+
+Port of the browser calculator in ``public/calculator-assets/app.js``
+(``industryData``, ``calculateScaleFactor``, ``calculateEmissionResults``).
+Records are packed into NumPy arrays and evaluated in a single vectorized
+pass, so a batch of thousands of facilities costs about as much as a few
+array operations rather than a Python loop per record.
+"""
+import copy
+import hashlib
+import json
+import math
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+INDUSTRY_DATA = {
+    "manufacturing": {
+        "name": "Manufacturing",
+        "emission_factor": 0.52,
+        "parameters": ["production_volume", "energy_consumption", "fuel_usage", "transportation"],
+        "typical_emissions": {"scope1": 2500, "scope2": 1800, "scope3": 4200},
+    },
+    "automotive": {
+        "name": "Automotive",
+        "emission_factor": 8.5,
+        "parameters": ["vehicle_production", "assembly_energy", "paint_shop", "testing"],
+        "typical_emissions": {"scope1": 3200, "scope2": 2400, "scope3": 5800},
+    },
+    "steel": {
+        "name": "Steel Production",
+        "emission_factor": 2.3,
+        "parameters": ["raw_materials", "furnace_operations", "electricity", "transportation"],
+        "typical_emissions": {"scope1": 4500, "scope2": 1200, "scope3": 2800},
+    },
+    "cement": {
+        "name": "Cement",
+        "emission_factor": 0.7,
+        "parameters": ["limestone", "kiln_fuel", "grinding_energy", "transportation"],
+        "typical_emissions": {"scope1": 5200, "scope2": 800, "scope3": 1500},
+    },
+    "chemical": {
+        "name": "Chemical Industry",
+        "emission_factor": 1.5,
+        "parameters": ["process_heat", "reactions", "steam_generation", "cooling"],
+        "typical_emissions": {"scope1": 3800, "scope2": 1600, "scope3": 3200},
+    },
+    "power": {
+        "name": "Power Generation",
+        "emission_factor": 820,
+        "parameters": ["fuel_type", "capacity", "efficiency", "transmission"],
+        "typical_emissions": {"scope1": 8500, "scope2": 200, "scope3": 1200},
+    },
+}
+
+CARBON_PRICES = {
+    "voluntary": 15.50,
+    "compliance": 85.20,
+    "future_predicted": 120.00,
+}
+
+COMPLIANCE_LIMIT = 7500  # tCO2e above which credits must be bought
+BASELINE_INPUT = 1000.0  # average input that maps to the typical emissions
+MIN_SCALE = 0.1
+MAX_SCALE = 5.0
+
+INDUSTRIES: List[str] = []
+INDUSTRY_INDEX: Dict[str, int] = {}
+PARAMETER_COUNT = 4
+PARAMETER_INDEX: List[Dict[str, int]] = []
+ALL_PARAMETERS: Set[str] = set()  # parameters of any industry
+# (industries, 3) matrix of scope 1/2/3 typical emissions
+TYPICAL_EMISSIONS = np.empty((0, 3))
+# Fingerprint of the tables above; changes whenever they are updated
+FACTOR_TABLE_VERSION = ""
+
+
+def _rebuild_lookups():
+    """Refresh derived lookup tables in place so importers keep valid references"""
+    global TYPICAL_EMISSIONS, FACTOR_TABLE_VERSION
+    INDUSTRIES[:] = list(INDUSTRY_DATA)
+    INDUSTRY_INDEX.clear()
+    INDUSTRY_INDEX.update({industry: i for i, industry in enumerate(INDUSTRIES)})
+    PARAMETER_INDEX[:] = [
+        {param: j for j, param in enumerate(INDUSTRY_DATA[industry]["parameters"])} for industry in INDUSTRIES
+    ]
+    ALL_PARAMETERS.clear()
+    ALL_PARAMETERS.update(param for data in INDUSTRY_DATA.values() for param in data["parameters"])
+    TYPICAL_EMISSIONS = np.array(
+        [[INDUSTRY_DATA[i]["typical_emissions"][s] for s in ("scope1", "scope2", "scope3")] for i in INDUSTRIES],
+        dtype=np.float64,
+    )
+    tables = json.dumps([INDUSTRY_DATA, CARBON_PRICES, COMPLIANCE_LIMIT, BASELINE_INPUT], sort_keys=True)
+    FACTOR_TABLE_VERSION = hashlib.sha256(tables.encode("utf-8")).hexdigest()[:12]
+
+
+def update_factor_tables(industry_data: Optional[dict] = None, carbon_prices: Optional[dict] = None) -> str:
+    """
+    Replace the emission factor and/or price tables at runtime.
+    Returns the new FACTOR_TABLE_VERSION. Bulk worker processes start with
+    the module defaults; they receive the current tables with each chunk
+    (see ``factor_tables`` and ``use_factor_tables``).
+    """
+    for industry, data in (industry_data or {}).items():
+        if len(data["parameters"]) != PARAMETER_COUNT:
+            raise ValueError(f"Industry '{industry}' must define exactly {PARAMETER_COUNT} parameters")
+    if industry_data is not None:
+        INDUSTRY_DATA.clear()
+        INDUSTRY_DATA.update(industry_data)
+    if carbon_prices is not None:
+        CARBON_PRICES.clear()
+        CARBON_PRICES.update(carbon_prices)
+    _rebuild_lookups()
+    return FACTOR_TABLE_VERSION
+
+
+def factor_tables() -> tuple:
+    """``(version, industry_data, carbon_prices)`` to hand to another process"""
+    return FACTOR_TABLE_VERSION, copy.deepcopy(INDUSTRY_DATA), dict(CARBON_PRICES)
+
+
+def use_factor_tables(tables: tuple):
+    """Switch to tables from ``factor_tables()`` unless they are already in use"""
+    version, industry_data, carbon_prices = tables
+    if version != FACTOR_TABLE_VERSION:
+        update_factor_tables(industry_data, carbon_prices)
+
+
+_rebuild_lookups()
+
+
+class CalculationError(ValueError):
+    """Raised for records that cannot be evaluated"""
+
+
+def pack_records(records: Iterable[dict]):
+    """
+    Convert ``{"industry": str, "inputs": {param: value}}`` records into an
+    industry index vector and an (n, 4) input matrix with NaN for missing
+    parameters. Infinite or NaN input values are rejected.
+    """
+    records = list(records)
+    industry_idx = np.empty(len(records), dtype=np.intp)
+    values = np.full((len(records), PARAMETER_COUNT), np.nan)
+    for row, record in enumerate(records):
+        industry = record.get("industry")
+        i = INDUSTRY_INDEX.get(industry)
+        if i is None:
+            raise CalculationError(f"Record {row}: unknown industry '{industry}'")
+        industry_idx[row] = i
+        params = PARAMETER_INDEX[i]
+        for param, value in (record.get("inputs") or {}).items():
+            j = params.get(param)
+            if j is None:
+                raise CalculationError(f"Record {row}: unknown parameter '{param}' for industry '{industry}'")
+            if not math.isfinite(value):
+                raise CalculationError(f"Record {row}: '{param}' must be a finite number")
+            values[row, j] = value
+    return industry_idx, values
+
+
+def scale_factors(values: np.ndarray) -> np.ndarray:
+    """
+    Vectorized ``calculateScaleFactor``: mean of the provided inputs relative
+    to the baseline, clamped to [0.1, 5]. Rows without inputs use the
+    industry's typical emissions (scale 1).
+    """
+    provided = ~np.isnan(values)
+    counts = provided.sum(axis=1)
+    sums = np.where(provided, values, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scale = np.clip(sums / counts / BASELINE_INPUT, MIN_SCALE, MAX_SCALE)
+    scale[counts == 0] = 1.0
+    return scale
+
+
+def _js_round(x: np.ndarray) -> np.ndarray:
+    # Math.round rounds halves up, np.round rounds halves to even
+    return np.floor(x + 0.5)
+
+
+def compute_batch(industry_idx: np.ndarray, values: np.ndarray) -> Dict[str, np.ndarray]:
+    """Evaluate a packed batch; every returned array has one entry per record"""
+    scale = scale_factors(values)
+    scopes = _js_round(TYPICAL_EMISSIONS[industry_idx] * scale[:, None])
+    total = scopes.sum(axis=1)
+    excess = np.maximum(0.0, total - COMPLIANCE_LIMIT)
+    return {
+        "scope1": scopes[:, 0],
+        "scope2": scopes[:, 1],
+        "scope3": scopes[:, 2],
+        "totalEmissions": total,
+        "excessEmissions": excess,
+        "creditCost": _js_round(excess * CARBON_PRICES["compliance"]),
+        "scaleFactor": scale,
+    }
+
+
+INTEGER_FIELDS = ("scope1", "scope2", "scope3", "totalEmissions", "excessEmissions", "creditCost")
+
+
+def compute_footprints(records: Iterable[dict], ids: Optional[List] = None) -> List[dict]:
+    """Evaluate records and return one result dict per record"""
+    industry_idx, values = pack_records(records)
+    columns = compute_batch(industry_idx, values)
+    rows = [columns[field].astype(np.int64).tolist() for field in INTEGER_FIELDS]
+    scale = columns["scaleFactor"].tolist()
+    results = []
+    for n, i in enumerate(industry_idx.tolist()):
+        result = {"industry": INDUSTRIES[i]}
+        for field, column in zip(INTEGER_FIELDS, rows):
+            result[field] = column[n]
+        result["scaleFactor"] = scale[n]
+        if ids is not None:
+            result["id"] = ids[n]
+        results.append(result)
+    return results
@@ -0,0 +1,54 @@
+"""
+Read-only access to CarbonCreditToken project data over JSON-RPC.
+"""
+import os
+from typing import Dict, Iterable, Optional
+
+from services.abi import FunctionSpec
+from services.rpc import RpcClient, get_client
+
+CARBON_TOKEN_ADDRESS = os.getenv("CARBON_TOKEN_ADDRESS", "")
+
+PROJECT_FIELDS = (
+    "name", "methodology", "co2Tonnes", "pricePerTonne", "expiryDate",
+    "location", "projectType", "issuer", "isActive", "metadataURI",
+)
+GET_PROJECT = FunctionSpec(
+    "getProject", ["uint256"],
+    ["(string,string,uint256,uint256,uint256,string,string,address,bool,string)"],
+)
+IS_PROJECT_ACTIVE = FunctionSpec("isProjectActive", ["uint256"], ["bool"])
+URI = FunctionSpec("uri", ["uint256"], ["string"])
+
+
+def fetch_projects(
+    token_ids: Iterable[int],
+    client: Optional[RpcClient] = None,
+    address: str = CARBON_TOKEN_ADDRESS,
+    block: Optional[int] = None,
+) -> Dict[int, Optional[dict]]:
+    """
+    Project details, current active state and metadata URI for each token id,
+    read at one block through a single multicall. Unknown ids map to None.
+    """
+    client = client or get_client()
+    token_ids = list(dict.fromkeys(token_ids))
+    calls = []
+    for token_id in token_ids:
+        calls += [
+            (address, GET_PROJECT, (token_id,)),
+            (address, IS_PROJECT_ACTIVE, (token_id,)),
+            (address, URI, (token_id,)),
+        ]
+    results = client.multicall(calls, block)
+
+    projects = {}
+    for i, token_id in enumerate(token_ids):
+        project, active, uri = results[3 * i:3 * i + 3]
+        if project is None:
+            projects[token_id] = None
+            continue
+        details = dict(zip(PROJECT_FIELDS, project))
+        details["pricePerTonne"] = str(details["pricePerTonne"])  # wei; exceeds JS number precision
+        projects[token_id] = {"tokenId": token_id, **details, "activeNow": bool(active), "uri": uri}
+    return projects
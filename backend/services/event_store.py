@@ -0,0 +1,155 @@
+"""
+Local SQLite storage for indexed contract events.
+
+Events and the indexing checkpoint are written in one transaction, so a
+crash never leaves events without the checkpoint that covers them (or the
+reverse). Rollbacks delete everything above a block and move the
+checkpoint back, for reorg recovery, and are counted so that other
+processes reading the same file can tell their copy is out of date.
+"""
+import json
+import os
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Tuple
+
+INDEX_DB_FILE = os.getenv("INDEX_DB_FILE", "chain_index.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    block_timestamp INTEGER,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    address TEXT NOT NULL,
+    event TEXT NOT NULL,
+    args TEXT NOT NULL,
+    UNIQUE (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_block ON events (block_number);
+CREATE INDEX IF NOT EXISTS events_event ON events (event);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    block_number INTEGER NOT NULL,
+    block_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS rewarded_events (
+    event_key TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS rollbacks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    block_number INTEGER NOT NULL
+);
+"""
+
+COLUMNS = ("id", "block_number", "block_hash", "block_timestamp", "tx_hash", "log_index", "address", "event", "args")
+
+
+def _row_to_event(row) -> dict:
+    event = dict(zip(COLUMNS, row))
+    event["args"] = json.loads(event["args"])
+    return event
+
+
+class EventStore:
+    def __init__(self, path: str = INDEX_DB_FILE):
+        self.path = path
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def checkpoint(self) -> Optional[Tuple[int, Optional[str]]]:
+        """Return ``(block_number, block_hash)`` of the last fully indexed block"""
+        with self._lock:
+            row = self._conn.execute("SELECT block_number, block_hash FROM checkpoint WHERE id = 1").fetchone()
+        return tuple(row) if row else None
+
+    def commit_batch(self, events: Iterable[dict], block_number: int, block_hash: Optional[str]) -> List[dict]:
+        """
+        Insert decoded events and advance the checkpoint atomically.
+        Returns the events that were new (already stored ones are skipped).
+        """
+        inserted = []
+        with self._lock, self._conn:
+            for event in events:
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO events "
+                    "(block_number, block_hash, block_timestamp, tx_hash, log_index, address, event, args) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        event["block_number"], event["block_hash"], event.get("block_timestamp"),
+                        event["tx_hash"], event["log_index"], event["address"], event["event"],
+                        json.dumps(event["args"]),
+                    ),
+                )
+                if cursor.rowcount:
+                    inserted.append({**event, "id": cursor.lastrowid})
+            self._set_checkpoint(block_number, block_hash)
+        return inserted
+
+    def _set_checkpoint(self, block_number: int, block_hash: Optional[str]):
+        self._conn.execute(
+            "INSERT INTO checkpoint (id, block_number, block_hash) VALUES (1, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET block_number = excluded.block_number, block_hash = excluded.block_hash",
+            (block_number, block_hash),
+        )
+
+    def set_checkpoint(self, block_number: int, block_hash: Optional[str]):
+        with self._lock, self._conn:
+            self._set_checkpoint(block_number, block_hash)
+
+    def rollback_to(self, block_number: int, block_hash: Optional[str] = None) -> List[dict]:
+        """Delete events above ``block_number`` and return them, newest first"""
+        with self._lock, self._conn:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM events WHERE block_number > ? "
+                "ORDER BY block_number DESC, log_index DESC",
+                (block_number,),
+            ).fetchall()
+            self._conn.execute("DELETE FROM events WHERE block_number > ?", (block_number,))
+            self._conn.execute("INSERT INTO rollbacks (block_number) VALUES (?)", (block_number,))
+            self._set_checkpoint(block_number, block_hash)
+        return [_row_to_event(row) for row in rows]
+
+    def rollback_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM rollbacks").fetchone()[0]
+
+    def events(self, event: Optional[str] = None, after_id: int = 0) -> List[dict]:
+        """Stored events in chain order, optionally filtered by name"""
+        query = f"SELECT {', '.join(COLUMNS)} FROM events WHERE id > ?"
+        params = [after_id]
+        if event:
+            query += " AND event = ?"
+            params.append(event)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY block_number, log_index", params).fetchall()
+        return [_row_to_event(row) for row in rows]
+
+    def unrewarded_events(self, event: str) -> List[dict]:
+        """Stored events of one name, in chain order, with no row in ``rewarded_events``"""
+        columns = ", ".join(f"e.{column}" for column in COLUMNS)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns} FROM events e "
+                "LEFT JOIN rewarded_events r ON r.event_key = e.tx_hash || ':' || e.log_index "
+                "WHERE e.event = ? AND r.event_key IS NULL ORDER BY e.block_number, e.log_index",
+                (event,),
+            ).fetchall()
+        return [_row_to_event(row) for row in rows]
+
+    def mark_rewarded(self, event_key: str) -> bool:
+        """Record that an event has been fed to rewards; False if it already was"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute("INSERT OR IGNORE INTO rewarded_events (event_key) VALUES (?)", (event_key,))
+        return bool(cursor.rowcount)
+
+    def unmark_rewarded(self, event_key: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM rewarded_events WHERE event_key = ?", (event_key,))
@@ -0,0 +1,336 @@
+"""
+Checkpointed indexer for EnhancedCarbonMarketplace events.
+
+Pulls ``CreditsListed``, ``CreditsPurchased``, ``CreditsRetired`` and
+``ListingCancelled`` logs over JSON-RPC and stores them decoded in the local
+EventStore.
+
+- Only blocks ``confirmations`` deep are indexed, and block ranges adapt:
+  they shrink when the node rejects a query for its range or result size,
+  or returns too many logs, and grow back while queries stay small. Other
+  RPC errors fail the sync without touching the range.
+- Before each sync the checkpoint block's hash is compared with the chain;
+  on a mismatch the index rolls back ``reorg_depth`` blocks and re-indexes.
+- Listeners receive newly stored events and rolled-back events. Retirements
+  feed the rewards pipeline as ``carbon_offset`` actions, at most once each;
+  stored retirements without a reward are retried on every sync.
+
+Run standalone with ``python -m services.indexer`` from the backend folder.
+The standalone indexer does not award rewards; the API's indexer does that
+for retirements it finds unrewarded in the same store.
+"""
+import argparse
+import logging
+import os
+import threading
+from typing import Iterable, List, Optional
+
+from services.abi import AbiError, EventSpec
+from services.event_store import EventStore
+from services.rpc import RpcClient, RpcError, get_client
+
+logger = logging.getLogger(__name__)
+
+MARKETPLACE_ADDRESS = os.getenv("MARKETPLACE_ADDRESS", "")
+START_BLOCK = int(os.getenv("INDEXER_START_BLOCK", 0))
+CONFIRMATIONS = int(os.getenv("INDEXER_CONFIRMATIONS", 5))
+REORG_DEPTH = int(os.getenv("INDEXER_REORG_DEPTH", 64))
+POLL_INTERVAL = float(os.getenv("INDEXER_POLL_INTERVAL", 10))
+
+MIN_BATCH_BLOCKS = 1
+INITIAL_BATCH_BLOCKS = 2_000
+MAX_BATCH_BLOCKS = 50_000
+TARGET_LOGS_PER_BATCH = 2_000
+# Accepted queries after which a lowered range ceiling is doubled again
+CEILING_RECOVERY_BATCHES = 32
+
+# Error text nodes use for a block range or result set that is too large,
+# e.g. "query returned more than 10000 results" or "block range too large"
+RANGE_ERROR_HINTS = ("range", "more than", "too many", "too large", "response size", "size exceeded")
+RATE_LIMIT_HINTS = ("rate limit", "rate-limit", "too many requests", "request count", "requests per")
+
+MARKETPLACE_EVENTS = [
+    EventSpec("CreditsListed", [
+        ("listingId", "uint256", True),
+        ("tokenId", "uint256", True),
+        ("seller", "address", True),
+        ("amount", "uint256", False),
+        ("pricePerToken", "uint256", False),
+    ]),
+    EventSpec("CreditsPurchased", [
+        ("listingId", "uint256", True),
+        ("tokenId", "uint256", True),
+        ("buyer", "address", True),
+        ("amount", "uint256", False),
+        ("totalPrice", "uint256", False),
+    ]),
+    EventSpec("CreditsRetired", [
+        ("tokenId", "uint256", True),
+        ("retiredBy", "address", True),
+        ("amount", "uint256", False),
+        ("reason", "string", False),
+        ("isPermanent", "bool", False),
+    ]),
+    EventSpec("ListingCancelled", [
+        ("listingId", "uint256", True),
+    ]),
+]
+EVENTS_BY_TOPIC = {spec.topic: spec for spec in MARKETPLACE_EVENTS}
+
+
+def event_key(event: dict) -> str:
+    return f"{event['tx_hash']}:{event['log_index']}"
+
+
+def is_range_error(error: RpcError) -> bool:
+    """True if ``eth_getLogs`` was rejected because the query was too large"""
+    message = str(error).lower()
+    if error.code == 429 or any(hint in message for hint in RATE_LIMIT_HINTS):
+        return False
+    return any(hint in message for hint in RANGE_ERROR_HINTS)
+
+
+def decode_logs(logs: Iterable[dict]) -> List[dict]:
+    """Decode raw logs of known events; unknown or malformed logs are skipped"""
+    events = []
+    for log in logs:
+        if log.get("removed"):
+            continue
+        spec = EVENTS_BY_TOPIC.get((log.get("topics") or [None])[0])
+        if spec is None:
+            continue
+        try:
+            args = spec.decode_log(log)
+        except (AbiError, ValueError) as e:
+            logger.warning(f"Skipping malformed {spec.name} log {log.get('transactionHash')}: {e}")
+            continue
+        events.append({
+            "block_number": int(log["blockNumber"], 16),
+            "block_hash": log["blockHash"],
+            "tx_hash": log["transactionHash"],
+            "log_index": int(log["logIndex"], 16),
+            "address": log["address"].lower(),
+            "event": spec.name,
+            "args": args,
+        })
+    events.sort(key=lambda e: (e["block_number"], e["log_index"]))
+    return events
+
+
+class RetirementRewards:
+    """
+    Listener awarding ``carbon_offset`` points for on-chain retirements.
+    Which retirements still need a reward is read from the store, so one
+    that failed to apply is tried again at the next batch or sync.
+    """
+
+    def __init__(self, store: EventStore):
+        self.store = store
+
+    def on_events(self, events: List[dict]):
+        if any(event["event"] == "CreditsRetired" for event in events):
+            self.award_pending()
+
+    def on_synced(self):
+        self.award_pending()
+
+    def award_pending(self) -> int:
+        """Award every stored retirement that has not been rewarded. Returns the number awarded."""
+        from routers.rewards import apply_reward_action, wallet_user_id
+
+        awarded = 0
+        for event in self.store.unrewarded_events("CreditsRetired"):
+            key = event_key(event)
+            if not self.store.mark_rewarded(key):
+                continue
+            args = event["args"]
+            user_id = wallet_user_id(args["retiredBy"])
+            try:
+                apply_reward_action(user_id, "carbon_offset", float(args["amount"]), {
+                    "source": "chain",
+                    "tx_hash": event["tx_hash"],
+                    "token_id": args["tokenId"],
+                    "reason": args["reason"],
+                })
+            except Exception as e:
+                # Leave it unmarked so the next sync retries it
+                self.store.unmark_rewarded(key)
+                logger.error(f"Failed to award retirement {key} to {user_id}: {e}")
+                continue
+            awarded += 1
+        return awarded
+
+    def on_rollback(self, events: List[dict]):
+        for event in events:
+            if event["event"] == "CreditsRetired":
+                # Rewards are not clawed back; the event is rewarded at most once
+                # even if it is re-included after the reorg.
+                logger.warning(f"Rewarded retirement {event_key(event)} was rolled back by a reorg")
+
+
+class MarketplaceIndexer:
+    def __init__(
+        self,
+        rpc: RpcClient,
+        store: EventStore,
+        address: str = MARKETPLACE_ADDRESS,
+        start_block: int = START_BLOCK,
+        confirmations: int = CONFIRMATIONS,
+        reorg_depth: int = REORG_DEPTH,
+        listeners: Iterable = (),
+    ):
+        if not address:
+            raise ValueError("Marketplace contract address is required")
+        self.rpc = rpc
+        self.store = store
+        self.address = address.lower()
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.reorg_depth = reorg_depth
+        self.listeners = list(listeners)
+        self.batch_blocks = INITIAL_BATCH_BLOCKS
+        # Largest range not yet rejected by the node; growth stops below it
+        self.batch_ceiling = MAX_BATCH_BLOCKS
+        self._accepted = 0  # queries accepted since the last range rejection
+        self._topics = [[spec.topic for spec in MARKETPLACE_EVENTS]]
+
+    def _block_hash(self, number: int) -> Optional[str]:
+        block = self.rpc.get_block(number)
+        return block["hash"] if block else None
+
+    def _load_blocks(self, numbers: List[int]) -> dict:
+        """Fetch several blocks in one batch request; returns ``{number: block}``"""
+        return {number: block for number, block in zip(numbers, self.rpc.get_blocks(numbers)) if block}
+
+    def check_reorg(self) -> bool:
+        """Roll back if the checkpoint block is no longer canonical. Returns True on rollback."""
+        checkpoint = self.store.checkpoint()
+        if checkpoint is None or checkpoint[1] is None:
+            return False
+        number, expected = checkpoint
+        if self._block_hash(number) == expected:
+            return False
+
+        target = max(self.start_block - 1, number - self.reorg_depth)
+        logger.warning(f"Reorg detected at block {number}; rolling back to {target}")
+        removed = self.store.rollback_to(target, self._block_hash(target) if target >= 0 else None)
+        if hasattr(self.rpc, "invalidate_from"):
+            self.rpc.invalidate_from(target + 1)
+        for listener in self.listeners:
+            listener.on_rollback(removed)
+        return True
+
+    def _fetch_logs(self, from_block: int, to_block: int):
+        """
+        Fetch logs for a range, shrinking it while the node rejects the query
+        as too large. Returns ``(logs, to_block)`` with the range actually
+        covered.
+        """
+        while True:
+            try:
+                logs = self.rpc.get_logs(self.address, from_block, to_block, self._topics)
+            except RpcError as e:
+                if to_block == from_block or not is_range_error(e):
+                    raise
+                self._accepted = 0
+                self.batch_ceiling = to_block - from_block
+                self.batch_blocks = max(MIN_BATCH_BLOCKS, (to_block - from_block + 1) // 2)
+                to_block = from_block + self.batch_blocks - 1
+                logger.info(f"eth_getLogs rejected ({e}); retrying with {self.batch_blocks} blocks")
+                continue
+            self._accepted += 1
+            if self._accepted >= CEILING_RECOVERY_BATCHES and self.batch_ceiling < MAX_BATCH_BLOCKS:
+                # The limit may have been a dense stretch of logs; probe larger ranges again
+                self.batch_ceiling = min(MAX_BATCH_BLOCKS, self.batch_ceiling * 2)
+                self._accepted = 0
+            return logs, to_block
+
+    def _adapt(self, blocks: int, log_count: int):
+        if log_count > TARGET_LOGS_PER_BATCH:
+            self.batch_blocks = max(MIN_BATCH_BLOCKS, blocks // 2)
+        elif log_count < TARGET_LOGS_PER_BATCH // 4:
+            self.batch_blocks = min(self.batch_ceiling, blocks * 2)
+
+    def sync(self) -> int:
+        """Index all confirmed blocks past the checkpoint. Returns the number of new events."""
+        self.check_reorg()
+        safe_head = self.rpc.block_number() - self.confirmations
+        checkpoint = self.store.checkpoint()
+        next_block = checkpoint[0] + 1 if checkpoint else self.start_block
+        indexed = 0
+
+        while next_block <= safe_head:
+            to_block = min(safe_head, next_block + self.batch_blocks - 1)
+            logs, to_block = self._fetch_logs(next_block, to_block)
+            events = decode_logs(logs)
+            blocks = self._load_blocks(sorted({event["block_number"] for event in events} | {to_block}))
+            for event in events:
+                block = blocks.get(event["block_number"])
+                event["block_timestamp"] = int(block["timestamp"], 16) if block else None
+
+            checkpoint_block = blocks.get(to_block)
+            inserted = self.store.commit_batch(events, to_block, checkpoint_block["hash"] if checkpoint_block else None)
+            for listener in self.listeners:
+                listener.on_events(inserted)
+
+            indexed += len(inserted)
+            self._adapt(to_block - next_block + 1, len(logs))
+            next_block = to_block + 1
+
+        for listener in self.listeners:
+            if hasattr(listener, "on_synced"):
+                listener.on_synced()
+        if indexed:
+            logger.info(f"Indexed {indexed} marketplace events up to block {safe_head}")
+        return indexed
+
+    def run_forever(self, stop: threading.Event, poll_interval: float = POLL_INTERVAL):
+        while not stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error(f"Indexer sync failed: {e}")
+            stop.wait(poll_interval)
+
+
+def start_background_indexer(
+    stop: threading.Event, listeners: Iterable = (), store: Optional[EventStore] = None
+) -> Optional[MarketplaceIndexer]:
+    """
+    Run the indexer in a daemon thread when MARKETPLACE_ADDRESS is configured.
+    Start it in one process only; others read the index through ``store``.
+    """
+    if not MARKETPLACE_ADDRESS:
+        return None
+    store = store or EventStore()
+    for listener in listeners:
+        # Listeners that keep derived state load what is already indexed
+        if hasattr(listener, "attach"):
+            listener.attach(store)
+    indexer = MarketplaceIndexer(get_client(), store, listeners=[RetirementRewards(store), *listeners])
+    threading.Thread(target=indexer.run_forever, args=(stop,), daemon=True, name="marketplace-indexer").start()
+    logger.info(f"Indexing marketplace {MARKETPLACE_ADDRESS} from block {START_BLOCK}")
+    return indexer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index EnhancedCarbonMarketplace events")
+    parser.add_argument("--rpc-url", default=os.getenv("RPC_URL", "http://127.0.0.1:8545"))
+    parser.add_argument("--address", default=MARKETPLACE_ADDRESS)
+    parser.add_argument("--db", default=None, help="SQLite index file")
+    parser.add_argument("--once", action="store_true", help="Sync once and exit")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = EventStore(args.db) if args.db else EventStore()
+    # Index only: rewards are written by the API's rewards owner, which awards
+    # every retirement still pending in the store at its next sync
+    indexer = MarketplaceIndexer(RpcClient(args.rpc_url), store, args.address)
+    if args.once:
+        indexer.sync()
+    else:
+        indexer.run_forever(threading.Event())
+
+
+if __name__ == "__main__":
+    main()
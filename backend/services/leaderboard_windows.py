@@ -0,0 +1,204 @@
+"""
+Daily, weekly and monthly leaderboards kept up to date on write.
+
+Points are kept per user in one bucket per calendar day, for the last
+``HORIZON_DAYS`` days. A window covers the last N day buckets including
+today, so "week" is a rolling 7 days and "month" a rolling 30 days.
+
+- Each window keeps every user's total and a list of ``(-points, user_id)``
+  sorted with ``bisect``. A write moves one user within that list, and a
+  top-N query slices it.
+- When the date changes, the buckets that slid out of a window are
+  subtracted from it, and buckets older than the horizon are dropped. The
+  cost is proportional to the users active on those days, not to all users.
+- The buckets are derived from each user's stored actions
+  (``timestamp``, ``points_earned``). ``sync_user`` recomputes one user's
+  buckets and applies the difference, so calling it again is harmless.
+  ``rebuild`` derives all of them after the rewards database is (re)loaded.
+
+Only the most recent actions are stored per user. Buckets on or before the
+day of a user's oldest stored action may be incomplete, so ``sync_user``
+never lowers them.
+"""
+import threading
+from bisect import bisect_left, insort
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+WINDOW_DAYS = {"day": 1, "week": 7, "month": 30}
+HORIZON_DAYS = max(WINDOW_DAYS.values())
+
+
+class WindowedLeaderboard:
+    def __init__(self, windows: Dict[str, int] = WINDOW_DAYS, today: Callable[[], date] = date.today):
+        self.windows = dict(windows)
+        self.horizon = max(self.windows.values())
+        self.today = today
+        self._lock = threading.Lock()
+        self._source = None
+        self._today = None
+        self._user_days: Dict[str, Dict[str, int]] = {}  # user_id -> {day: points}
+        self._days: Dict[str, Dict[str, int]] = {}  # day -> {user_id: points}
+        self._totals: Dict[str, Dict[str, int]] = {window: {} for window in self.windows}
+        self._ranked: Dict[str, List[Tuple[int, str]]] = {window: [] for window in self.windows}
+
+    # -------------------------
+    # Days
+    # -------------------------
+    def _start(self, days: int, today: str) -> str:
+        return (date.fromisoformat(today) - timedelta(days=days - 1)).isoformat()
+
+    def since(self, window: str) -> str:
+        """First day included in ``window``"""
+        return self._start(self.windows[window], self.today().isoformat())
+
+    def _day_points(self, entry: dict, start: str, today: str) -> Tuple[Dict[str, int], Optional[str]]:
+        """Points per day since ``start`` from a user entry, and the day of its oldest stored action"""
+        actions = entry.get("actions") if isinstance(entry, dict) else None
+        if not isinstance(actions, list):
+            return {}, None
+        points = {}
+        oldest = None
+        for action in actions:
+            if isinstance(action, dict) and isinstance(action.get("timestamp"), str):
+                oldest = action["timestamp"][:10]
+                break
+        # Actions are appended in time order; stop at the first one before the horizon
+        for action in reversed(actions):
+            if not isinstance(action, dict) or not isinstance(action.get("timestamp"), str):
+                continue
+            day = action["timestamp"][:10]
+            if day < start:
+                break
+            earned = action.get("points_earned")
+            if day <= today and isinstance(earned, (int, float)) and earned:
+                points[day] = points.get(day, 0) + int(earned)
+        return points, oldest
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def _adjust(self, window: str, user_id: str, delta: int):
+        totals, ranked = self._totals[window], self._ranked[window]
+        old = totals.get(user_id, 0)
+        if old > 0:
+            del ranked[bisect_left(ranked, (-old, user_id))]
+        new = old + delta
+        if new > 0:
+            totals[user_id] = new
+            insort(ranked, (-new, user_id))
+        else:
+            totals.pop(user_id, None)
+
+    def _add(self, user_id: str, day: str, delta: int):
+        bucket = self._days.setdefault(day, {})
+        user_days = self._user_days.setdefault(user_id, {})
+        value = bucket.get(user_id, 0) + delta
+        if value:
+            bucket[user_id] = value
+            user_days[day] = value
+        else:
+            bucket.pop(user_id, None)
+            user_days.pop(day, None)
+            if not bucket:
+                del self._days[day]
+            if not user_days:
+                del self._user_days[user_id]
+        for window, days in self.windows.items():
+            if day >= self._start(days, self._today):
+                self._adjust(window, user_id, delta)
+
+    def _rotate(self, today: str):
+        """Slide every window to end at ``today``"""
+        if self._today is None or today <= self._today:
+            self._today = self._today or today
+            return
+        for window, days in self.windows.items():
+            old_start, new_start = self._start(days, self._today), self._start(days, today)
+            for day in [d for d in self._days if old_start <= d < new_start]:
+                for user_id, points in self._days[day].items():
+                    self._adjust(window, user_id, -points)
+        horizon_start = self._start(self.horizon, today)
+        for day in [d for d in self._days if d < horizon_start]:
+            for user_id in self._days.pop(day):
+                user_days = self._user_days[user_id]
+                user_days.pop(day, None)
+                if not user_days:
+                    del self._user_days[user_id]
+        self._today = today
+
+    def is_current(self, data: dict) -> bool:
+        return data is self._source
+
+    def rebuild(self, data: dict):
+        """Derive all buckets from a freshly loaded rewards database"""
+        today = self.today().isoformat()
+        start = self._start(self.horizon, today)
+        user_days, days = {}, {}
+        for user_id, entry in list(data.items()):
+            # Users not updated within the horizon have no recent actions
+            if not isinstance(entry, dict) or str(entry.get("updated_at", "")) < start:
+                continue
+            points, _ = self._day_points(entry, start, today)
+            if points:
+                user_days[user_id] = points
+                for day, value in points.items():
+                    days.setdefault(day, {})[user_id] = value
+
+        totals = {window: {} for window in self.windows}
+        for window, window_days in self.windows.items():
+            window_start = self._start(window_days, today)
+            window_totals = totals[window]
+            for day, bucket in days.items():
+                if day >= window_start:
+                    for user_id, value in bucket.items():
+                        window_totals[user_id] = window_totals.get(user_id, 0) + value
+        with self._lock:
+            self._source = data
+            self._today = today
+            self._user_days, self._days = user_days, days
+            self._totals = {window: {u: p for u, p in t.items() if p > 0} for window, t in totals.items()}
+            self._ranked = {window: sorted((-p, u) for u, p in t.items()) for window, t in self._totals.items()}
+
+    def ensure(self, data: dict):
+        if not self.is_current(data):
+            self.rebuild(data)
+
+    def sync_user(self, data: dict, user_id: str):
+        """Bring one user's buckets in line with their entry in ``data``"""
+        with self._lock:
+            if data is not self._source:
+                return  # rebuilt from ``data`` on the next query
+            today = self.today().isoformat()
+            self._rotate(today)
+            new, oldest = self._day_points(data.get(user_id), self._start(self.horizon, today), today)
+            old = self._user_days.get(user_id, {})
+            for day, value in old.items():
+                if oldest is not None and day <= oldest:
+                    new[day] = max(new.get(day, 0), value)
+            for day in set(old) | set(new):
+                delta = new.get(day, 0) - old.get(day, 0)
+                if delta:
+                    self._add(user_id, day, delta)
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def top(self, window: str, limit: int) -> Tuple[List[Tuple[str, int]], int]:
+        """``(user_id, points)`` for the top ``limit`` users of ``window``, and the number of ranked users"""
+        with self._lock:
+            self._rotate(self.today().isoformat())
+            ranked = self._ranked[window]
+            return [(user_id, -negative) for negative, user_id in ranked[:limit]], len(ranked)
+
+    def standing(self, window: str, user_id: str) -> Tuple[int, Optional[int]]:
+        """A user's points in ``window`` and 1-based position, or None when unranked"""
+        with self._lock:
+            self._rotate(self.today().isoformat())
+            points = self._totals[window].get(user_id, 0)
+            if not points:
+                return 0, None
+            return points, bisect_left(self._ranked[window], (-points, user_id)) + 1
+
+
+windowed_leaderboard = WindowedLeaderboard()
@@ -0,0 +1,135 @@
+"""
+Non-blocking logging for the API process.
+
+``configure_logging`` installs a single ``QueueHandler`` on the root
+logger. A log call on a request thread only filters the record and puts it
+on an in-memory queue. Formatting, including traceback text, and the
+write to stderr happen on a ``QueueListener`` thread.
+
+- Records are written as one JSON object per line (``LOG_FORMAT=json``,
+  the default) or as plain text (``LOG_FORMAT=text``).
+- Success logs on hot routes pass ``extra={"sample": "<key>"}``. Only
+  ``LOG_SAMPLE_RATE`` of those records at INFO or below are kept, and kept
+  records carry ``sample_rate`` so counts can be scaled back up. Warnings
+  and errors are never sampled.
+- Pass ``exc_info=True`` instead of formatting ``traceback.format_exc()``
+  on the request thread.
+
+Loggers configured by uvicorn (``uvicorn.*``) keep their own handlers.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with ``extra`` fields included"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SampleFilter(logging.Filter):
+    """Keep ``rate`` of the low-severity records tagged with ``sample``"""
+
+    def __init__(self, rate: float = LOG_SAMPLE_RATE):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sample", None) is None or record.levelno > logging.INFO:
+            return True
+        if random.random() >= self.rate:
+            return False
+        record.sample_rate = self.rate
+        return True
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Enqueue records without formatting them. The listener runs in this
+    process, so records keep their ``exc_info`` and are formatted there.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            # Merge now: mutable arguments may change before the listener runs
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def make_formatter(fmt: str = LOG_FORMAT) -> logging.Formatter:
+    return JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+
+
+def configure_logging(
+    level: str = LOG_LEVEL,
+    fmt: str = LOG_FORMAT,
+    sample_rate: float = LOG_SAMPLE_RATE,
+    stream=None,
+) -> QueueListener:
+    """Route root logging through a queue to a background writer; safe to call again"""
+    global _listener
+    shutdown_logging()
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(make_formatter(fmt))
+    log_queue = queue.SimpleQueue()
+    handler = DeferredQueueHandler(log_queue)
+    handler.addFilter(SampleFilter(sample_rate))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
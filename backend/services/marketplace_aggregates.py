@@ -0,0 +1,178 @@
+"""
+In-memory marketplace aggregates maintained from indexed events.
+
+Mirrors the contract's view functions (``getTotalRetiredByUser``,
+``getUserRetiredCredits``, ``getRetirementHistory``, ``getActiveListing``,
+``getTotalCreditsRetired``) so the API can answer them with dict lookups
+instead of RPC calls. The aggregates are read from the event store: new
+rows are applied by id, and everything is rebuilt after a reorg rollback.
+Only one process runs the indexer; the others ``follow`` the same store
+file, so every worker serves the same totals.
+"""
+import logging
+import threading
+from collections import defaultdict
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+FOLLOW_INTERVAL = 2.0
+
+
+class MarketplaceAggregates:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._store = None
+        self._last_id = 0  # highest event id applied
+        self._rollbacks = 0  # store rollbacks seen at the last rebuild
+        self._reset()
+
+    def _reset(self):
+        self.total_retired = 0
+        self.retired_by_user = defaultdict(int)  # address -> amount
+        self.retired_by_user_token = defaultdict(lambda: defaultdict(int))  # address -> token -> amount
+        self.retired_by_token = defaultdict(int)  # token -> amount
+        self.retirements_by_token = defaultdict(list)  # token -> [record]
+        self.retirements_by_user = defaultdict(list)  # address -> [record]
+        self.active_listings = {}  # listing id -> listing
+        self.last_event_block = None
+
+    # -------------------------
+    # Maintenance
+    # -------------------------
+    def attach(self, store):
+        """Load everything already indexed in ``store`` and rebuild from it on rollbacks"""
+        self._store = store
+        self.rebuild()
+
+    def rebuild(self):
+        rollbacks = self._store.rollback_count() if self._store is not None else 0
+        events = self._store.events() if self._store is not None else []
+        with self._lock:
+            self._reset()
+            for event in events:
+                self._apply(event)
+            self._last_id = max((event["id"] for event in events), default=0)
+            self._rollbacks = rollbacks
+
+    def refresh(self):
+        """Apply events stored since the last refresh, by this or another process"""
+        if self._store is None:
+            return
+        rollbacks = self._store.rollback_count()
+        if rollbacks != self._rollbacks:
+            self.rebuild()
+            return
+        events = self._store.events(after_id=self._last_id)
+        with self._lock:
+            if rollbacks != self._rollbacks:
+                return  # rebuilt by another thread meanwhile; these may be rolled back
+            for event in events:
+                if event["id"] > self._last_id:
+                    self._apply(event)
+            self._last_id = max([self._last_id, *(event["id"] for event in events)])
+
+    def follow(self, store, stop: threading.Event, interval: float = FOLLOW_INTERVAL):
+        """Attach to ``store`` and refresh from it in a daemon thread until ``stop`` is set"""
+        self.attach(store)
+
+        def run():
+            while not stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.error(f"Failed to refresh marketplace aggregates: {e}")
+
+        threading.Thread(target=run, daemon=True, name="marketplace-aggregates").start()
+
+    def on_events(self, events: Iterable[dict]):
+        self.refresh()
+
+    def on_rollback(self, events: List[dict]):
+        if events:
+            self.rebuild()
+
+    def _apply(self, event: dict):
+        args = event["args"]
+        name = event["event"]
+        if name == "CreditsRetired":
+            user, token, amount = args["retiredBy"], args["tokenId"], args["amount"]
+            record = {
+                "tokenId": token,
+                "amount": amount,
+                "retiredBy": user,
+                "retiredAt": event.get("block_timestamp"),
+                "reason": args["reason"],
+                "isPermanent": args["isPermanent"],
+                "txHash": event["tx_hash"],
+                "blockNumber": event["block_number"],
+            }
+            self.total_retired += amount
+            self.retired_by_user[user] += amount
+            self.retired_by_user_token[user][token] += amount
+            self.retired_by_token[token] += amount
+            self.retirements_by_token[token].append(record)
+            self.retirements_by_user[user].append(record)
+        elif name == "CreditsListed":
+            self.active_listings[args["listingId"]] = {
+                "listingId": args["listingId"],
+                "tokenId": args["tokenId"],
+                "amount": args["amount"],
+                "pricePerToken": str(args["pricePerToken"]),  # wei; exceeds JS number precision
+                "seller": args["seller"],
+                "listedAt": event.get("block_timestamp"),
+                "blockNumber": event["block_number"],
+            }
+        elif name in ("CreditsPurchased", "ListingCancelled"):
+            self.active_listings.pop(args["listingId"], None)
+        self.last_event_block = event["block_number"]
+
+    # -------------------------
+    # Queries
+    # -------------------------
+    def user_totals(self, user: str) -> dict:
+        user = user.lower()
+        with self._lock:
+            by_token = self.retired_by_user_token.get(user, {})
+            return {
+                "address": user,
+                "total_retired": self.retired_by_user.get(user, 0),
+                "by_token": {str(token): amount for token, amount in by_token.items()},
+            }
+
+    def token_total(self, token_id: int) -> int:
+        with self._lock:
+            return self.retired_by_token.get(token_id, 0)
+
+    def retirement_history(self, token_id: int, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            records = self.retirements_by_token.get(token_id, [])
+            return list(records[-limit:] if limit else records)
+
+    def user_timeline(self, user: str, limit: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            records = self.retirements_by_user.get(user.lower(), [])
+            return list(records[-limit:] if limit else records)
+
+    def active_listing(self, listing_id: int) -> Optional[dict]:
+        with self._lock:
+            return self.active_listings.get(listing_id)
+
+    def listings(self, token_id: Optional[int] = None) -> List[dict]:
+        with self._lock:
+            listings = self.active_listings.values()
+            if token_id is not None:
+                return [listing for listing in listings if listing["tokenId"] == token_id]
+            return list(listings)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                "total_retired": self.total_retired,
+                "retiring_users": len(self.retired_by_user),
+                "active_listings": len(self.active_listings),
+                "last_event_block": self.last_event_block,
+            }
+
+
+marketplace_aggregates = MarketplaceAggregates()
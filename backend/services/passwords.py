@@ -0,0 +1,105 @@
+"""
+Salted scrypt password hashing.
+
+scrypt is memory-hard (~16 MB per hash with the defaults below) and takes
+tens of milliseconds of CPU, so the async helpers run it in a process pool
+instead of on request workers.
+"""
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import os
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+SCRYPT_N = int(os.getenv("PASSWORD_SCRYPT_N", 2 ** 14))
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.b64encode(raw).decode("ascii")
+
+
+def _derive(password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(
+        password.encode("utf-8"),
+        salt=salt,
+        n=n,
+        r=r,
+        p=p,
+        maxmem=n * r * 256,
+        dklen=KEY_BYTES,
+    )
+
+
+def hash_password(password: str) -> str:
+    """Return an encoded hash of the form ``scrypt$n$r$p$salt$key``"""
+    salt = secrets.token_bytes(SALT_BYTES)
+    key = _derive(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64encode(salt)}${_b64encode(key)}"
+
+
+def verify_password(password: str, encoded: Optional[str]) -> bool:
+    """
+    Check a password against an encoded hash in constant time.
+    A missing hash still costs one derivation and always fails.
+    """
+    if encoded is None:
+        verify_password(password, _dummy_hash())
+        return False
+    try:
+        scheme, n, r, p, salt, key = encoded.split("$")
+        if scheme != "scrypt":
+            return False
+        expected = base64.b64decode(key)
+        actual = _derive(password, base64.b64decode(salt), int(n), int(r), int(p))
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(actual, expected)
+
+
+@functools.lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    # Verified against when the account does not exist, so that unknown
+    # emails take as long to reject as wrong passwords.
+    return hash_password(secrets.token_hex(8))
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Lazily start the shared hashing pool"""
+    global _executor
+    if _executor is None:
+        workers = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+        # spawn avoids forking a process that already runs an event loop and threads
+        _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        logger.info(f"Started password hashing pool with {workers} workers")
+    return _executor
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), hash_password, password)
+
+
+async def verify_password_async(password: str, encoded: Optional[str]) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), verify_password, password, encoded)
@@ -0,0 +1,273 @@
+"""
+Offline recompute of every user's ecoPoints, rank and badges.
+
+Points, ranks and badges are normally only updated incrementally when an
+action is recorded, so retuning ``ACTION_POINTS``, ``BADGE_DEFINITIONS`` or
+``calculate_rank`` leaves existing users stale. This job re-prices each
+user's action history with the current rules:
+
+- Each stored action's ``points_earned`` is recomputed from its type and
+  amount. Actions of types no longer in ``ACTION_POINTS`` keep their points.
+- Only the last ``ACTION_HISTORY_LIMIT`` actions are stored. For users at
+  that limit, points not explained by the stored actions (earned by
+  dropped actions) are carried over unchanged.
+- Badges whose criteria are now met are added. Badges no longer met are
+  kept unless ``revoke_badges`` is set.
+
+The rewards file is split into chunks of whole users without parsing it in
+the parent. Chunks are recomputed in a process pool, at most
+``workers + 1`` at a time, and written back in order to a temporary file.
+That file replaces the database only if the database was not modified
+while the job ran.
+
+Run with ``python -m services.rewards_recompute`` from the backend folder.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CHUNK_BYTES = int(os.getenv("RECOMPUTE_CHUNK_BYTES", 4 * 1024 * 1024))
+RECOMPUTE_WORKERS = int(os.getenv("RECOMPUTE_WORKERS", os.cpu_count() or 1))
+
+STAT_FIELDS = ("users", "changed", "points_delta", "badges_added", "badges_revoked")
+
+
+class RecomputeError(Exception):
+    """The rewards database cannot be recomputed or was modified during the run"""
+
+
+def _int(value) -> int:
+    return int(value) if isinstance(value, (int, float)) else 0
+
+
+def recompute_user(user: dict, revoke_badges: bool = False) -> Tuple[dict, dict]:
+    """Recompute one user entry in place; returns ``(user, stats)``"""
+    from routers.rewards import ACTION_HISTORY_LIMIT, ACTION_POINTS, calculate_rank, eligible_badges
+
+    stats = dict.fromkeys(STAT_FIELDS, 0)
+    stats["users"] = 1
+    actions = user.get("actions") if isinstance(user.get("actions"), list) else []
+    badges = user.get("badges") if isinstance(user.get("badges"), list) else []
+    old_points = _int(user.get("ecoPoints"))
+
+    recorded = 0
+    repriced = 0
+    for action in actions:
+        if not isinstance(action, dict):
+            continue
+        points = _int(action.get("points_earned"))
+        recorded += points
+        base = ACTION_POINTS.get(action.get("type"))
+        if base is not None:
+            try:
+                points = int(base * float(action.get("amount", 1.0)))
+            except (TypeError, ValueError):
+                pass
+            action["points_earned"] = points
+        repriced += points
+
+    carried = max(0, old_points - recorded) if len(actions) >= ACTION_HISTORY_LIMIT else 0
+    if not actions and not carried:
+        # Nothing to recompute from; leave untouched users as they are
+        return user, stats
+
+    points = carried + repriced
+    rank = calculate_rank(points)
+    eligible = eligible_badges(points, actions)
+    if revoke_badges:
+        new_badges = eligible
+    else:
+        new_badges = badges + [badge_id for badge_id in eligible if badge_id not in badges]
+
+    stats["points_delta"] = points - old_points
+    stats["badges_added"] = len(set(new_badges) - set(badges))
+    stats["badges_revoked"] = len(set(badges) - set(new_badges))
+    if points != old_points or rank != _int(user.get("rank")) or new_badges != badges or repriced != recorded:
+        stats["changed"] = 1
+        user.update({"ecoPoints": points, "rank": rank, "badges": new_badges, "actions": actions,
+                     "updated_at": datetime.now().isoformat()})
+    return user, stats
+
+
+def recompute_chunk(data: bytes, revoke_badges: bool = False) -> Tuple[str, dict]:
+    """
+    Recompute a chunk of top-level ``"user_id": {...}`` entries and return
+    them re-serialized in the same indented layout, with summed stats.
+    Runs in a worker process.
+    """
+    text = data.decode("utf-8").strip().rstrip(",")
+    users = json.loads("{" + text + "}")
+    totals = dict.fromkeys(STAT_FIELDS, 0)
+    for user_id, user in users.items():
+        if not isinstance(user, dict):
+            totals["users"] += 1
+            continue
+        _, stats = recompute_user(user, revoke_badges)
+        for field in STAT_FIELDS:
+            totals[field] += stats[field]
+    if not users:
+        return "", totals
+    # Strip the outer braces: entries keep the indent=2 layout of save_rewards_db
+    return json.dumps(users, indent=2, ensure_ascii=False)[2:-2], totals
+
+
+def split_entries(path: str, chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """
+    Yield chunks of whole top-level entries from a rewards file written with
+    ``indent=2``. Top-level keys are the only lines starting with exactly two
+    spaces and a quote, so chunks are cut before such a line without parsing.
+    """
+    with open(path, "rb") as f:
+        head = f.read(2)
+        if head != b"{\n":
+            raise RecomputeError(f"{path} is not an indented rewards file")
+        buffer = b""
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            buffer += block
+            cut = buffer.rfind(b'\n  "')
+            if cut > 0:
+                yield buffer[:cut + 1]
+                buffer = buffer[cut + 1:]
+        buffer = buffer.rstrip()
+        if not buffer.endswith(b"}"):
+            raise RecomputeError(f"{path} is truncated")
+        if buffer[:-1].strip():
+            yield buffer[:-1]
+
+
+def iter_chunks(path: str, chunk_bytes: int = CHUNK_BYTES) -> Iterator[bytes]:
+    """Chunks of whole entries; files not written with indent=2 are loaded and re-chunked"""
+    with open(path, "rb") as f:
+        indented = f.read(2) == b"{\n"
+    if indented:
+        yield from split_entries(path, chunk_bytes)
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise RecomputeError(f"{path} does not contain a JSON object")
+    items = list(data.items())
+    del data
+    step = max(1, chunk_bytes // 1024)
+    for start in range(0, len(items), step):
+        yield json.dumps(dict(items[start:start + step]), ensure_ascii=False)[1:-1].encode("utf-8")
+
+
+def recompute_rewards_db(
+    path: Optional[str] = None,
+    workers: int = RECOMPUTE_WORKERS,
+    revoke_badges: bool = False,
+    dry_run: bool = False,
+    force: bool = False,
+    progress: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    Recompute every user in the rewards file. With ``workers=0`` chunks are
+    processed inline. Returns totals plus elapsed seconds.
+    """
+    from routers import rewards
+
+    path = path or rewards.REWARDS_DB_FILE
+    if not os.path.exists(path):
+        raise RecomputeError(f"{path} does not exist")
+    before = os.stat(path)
+    started = time.perf_counter()
+    totals = dict.fromkeys(STAT_FIELDS, 0)
+    tmp_path = f"{path}.recompute.tmp"
+
+    executor = None
+    if workers > 0:
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    pending = deque()
+    out = None if dry_run else open(tmp_path, "w", encoding="utf-8")
+    written = 0
+
+    def collect(result):
+        nonlocal written
+        text, stats = result
+        for field in STAT_FIELDS:
+            totals[field] += stats[field]
+        if out is not None and text:
+            out.write(",\n" if written else "{\n")
+            out.write(text)
+            written += 1
+        if progress:
+            progress({**totals, "elapsed": time.perf_counter() - started})
+
+    try:
+        for chunk in iter_chunks(path):
+            if executor is None:
+                collect(recompute_chunk(chunk, revoke_badges))
+                continue
+            pending.append(executor.submit(recompute_chunk, chunk, revoke_badges))
+            while len(pending) > workers:
+                collect(pending.popleft().result())
+        while pending:
+            collect(pending.popleft().result())
+
+        if out is not None:
+            out.write("\n}" if written else "{\n}")
+            out.close()
+            out = None
+            after = os.stat(path)
+            if not force and (after.st_mtime_ns, after.st_size) != (before.st_mtime_ns, before.st_size):
+                raise RecomputeError(f"{path} was modified during the recompute; rerun it or use --force")
+            shutil.copyfile(path, f"{path}.backup")
+            os.replace(tmp_path, path)
+    finally:
+        if out is not None:
+            out.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+    totals["elapsed"] = time.perf_counter() - started
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute ecoPoints, ranks and badges for every user")
+    parser.add_argument("--db", default=None, help="Rewards JSON file (default: REWARDS_DB_FILE)")
+    parser.add_argument("--workers", type=int, default=RECOMPUTE_WORKERS, help="Worker processes; 0 runs inline")
+    parser.add_argument("--revoke-badges", action="store_true", help="Remove badges whose criteria are no longer met")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing")
+    parser.add_argument("--force", action="store_true", help="Replace the file even if it changed during the run")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    last_report = [0.0]
+
+    def report(stats):
+        if stats["elapsed"] - last_report[0] >= 2:
+            last_report[0] = stats["elapsed"]
+            logger.info(f"{stats['users']} users recomputed, {stats['changed']} changed "
+                        f"({stats['users'] / stats['elapsed']:.0f} users/s)")
+
+    try:
+        totals = recompute_rewards_db(args.db, args.workers, args.revoke_badges, args.dry_run, args.force, report)
+    except RecomputeError as e:
+        logger.error(str(e))
+        raise SystemExit(1)
+    logger.info(
+        f"{'Dry run: ' if args.dry_run else ''}{totals['users']} users in {totals['elapsed']:.1f}s, "
+        f"{totals['changed']} changed, points {totals['points_delta']:+d}, "
+        f"badges +{totals['badges_added']}/-{totals['badges_revoked']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
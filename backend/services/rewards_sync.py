@@ -0,0 +1,406 @@
+"""
+Single-writer rewards state shared by several uvicorn worker processes.
+
+Set ``REWARDS_SYNC_SOCKET`` (a Unix socket path) when running
+``uvicorn --workers N``. The workers then elect one owner through an
+exclusive ``flock`` on ``<socket>.lock``:
+
+- The owner keeps the authoritative in-memory database, is the only
+  process writing ``rewards_db.json``, and serves the other workers over a
+  ``multiprocessing.connection`` socket.
+- Every other worker keeps a read-only replica. Reads are served locally,
+  so read throughput scales with workers. Mutations (recording an action,
+  creating a user) are sent to the owner as high-level operations and
+  applied there one at a time, so no update is lost.
+- After each mutation the owner pushes the changed user entry and the new
+  database version to all replicas. Replicas receive the full state when
+  they subscribe, and again whenever the owner reloads the file (e.g.
+  after the offline recompute job).
+- A call returns once the caller's replica has caught up with the owner's
+  reply, so a worker reads its own writes.
+
+If the owner process dies its lock is released, a replica takes over and
+the others reconnect. Work that must run in one process only, such as the
+chain indexer, is started through ``when_owner``. Without
+``REWARDS_SYNC_SOCKET`` each process works on its own copy as before.
+
+Connections are authenticated with ``REWARDS_SYNC_AUTHKEY``, or, when it is
+unset, with a random key each owner writes to ``<socket>.key`` (mode 0600).
+"""
+import logging
+import marshal
+import os
+import queue
+import secrets
+import threading
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Optional
+
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+
+REWARDS_SYNC_SOCKET = os.getenv("REWARDS_SYNC_SOCKET", "")
+# Without REWARDS_SYNC_AUTHKEY each owner generates a key and writes it to
+# ``<socket>.key`` (mode 0600), where the other workers read it
+AUTHKEY = os.getenv("REWARDS_SYNC_AUTHKEY", "").encode()
+RECONNECT_DELAY = 0.5
+RELOAD_CHECK_INTERVAL = 1.0
+CATCH_UP_TIMEOUT = 2.0
+CLIENT_POOL_SIZE = 8
+
+
+class OwnerUnavailable(Exception):
+    """The owner process cannot be reached"""
+
+
+def _unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail={
+            "success": False,
+            "status": "database_error",
+            "message": "Rewards storage is temporarily unavailable. Please try again.",
+            "code": "DB_ACCESS_ERROR"
+        }
+    )
+
+
+def key_path(address: str) -> str:
+    return f"{address}.key"
+
+
+def _write_key(address: str) -> bytes:
+    """Generate a key for this owner and publish it to workers of the same user"""
+    key = secrets.token_bytes(32)
+    tmp_path = f"{key_path(address)}.{os.getpid()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(tmp_path, key_path(address))
+    return key
+
+
+def _read_key(address: str) -> bytes:
+    try:
+        with open(key_path(address), "rb") as f:
+            return f.read()
+    except OSError as e:
+        raise OwnerUnavailable(f"No rewards sync key: {e}") from e
+
+
+# -------------------------
+# Owner
+# -------------------------
+class RewardsOwner:
+    def __init__(self, address: str, authkey: bytes = AUTHKEY):
+        self.address = address
+        self.authkey = authkey or _write_key(address)
+        self._subscribers = []
+        self._listener = None
+        self._stop = threading.Event()
+        self._published_data = None
+
+    def start(self):
+        from routers import rewards
+
+        self._published_data = rewards.load_rewards_db()
+        if os.path.exists(self.address):
+            os.unlink(self.address)  # left over from a dead owner
+        self._listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        os.chmod(self.address, 0o600)
+        threading.Thread(target=self._accept_loop, daemon=True, name="rewards-owner").start()
+        threading.Thread(target=self._watch_reloads, daemon=True, name="rewards-owner-reload").start()
+        logger.info(f"Rewards owner listening on {self.address} (pid {os.getpid()})")
+
+    def close(self):
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.close()
+        for conn in list(self._subscribers):
+            conn.close()
+
+    def _accept_loop(self):
+        while not self._stop.is_set():
+            try:
+                conn = self._listener.accept()
+            except OSError:
+                if self._stop.is_set():
+                    return
+                continue
+            except Exception as e:
+                # Failed handshake (wrong authkey); keep serving
+                logger.warning(f"Rejected rewards sync connection: {e}")
+                continue
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        from routers import rewards
+
+        try:
+            role = conn.recv()
+            if role == "subscribe":
+                with rewards._rewards_lock:
+                    self._send_state(conn)
+                    self._subscribers.append(conn)
+                return
+            while True:
+                op, args = conn.recv()
+                conn.send(self._execute(op, args))
+        except (EOFError, OSError):
+            conn.close()
+
+    def _execute(self, op: str, args: tuple) -> tuple:
+        from routers import rewards
+
+        try:
+            if op == "apply_reward_action":
+                result = rewards.apply_reward_action(*args)
+            elif op == "get_user_rewards":
+                result = rewards.get_user_rewards(*args)
+            else:
+                return ("error", f"unknown operation {op}")
+            return ("ok", result, rewards._rewards_cache["version"])
+        except HTTPException as e:
+            return ("http_error", e.status_code, e.detail)
+        except ValueError as e:
+            return ("value_error", str(e))
+        except Exception as e:
+            logger.error(f"Rewards owner failed to run {op}: {e}")
+            return ("error", str(e))
+
+    def _send_state(self, conn):
+        from routers import rewards
+
+        conn.send(("state", rewards._rewards_cache["version"], marshal.dumps(rewards._rewards_cache["data"])))
+
+    def publish_user(self, user_id: str):
+        """Push one user's entry to all replicas; call with the rewards lock held"""
+        from routers import rewards
+
+        data = rewards._rewards_cache["data"]
+        if user_id not in data:
+            return
+        self._broadcast(("user", rewards._rewards_cache["version"], user_id, data[user_id]))
+
+    def _broadcast(self, message):
+        for conn in list(self._subscribers):
+            try:
+                conn.send(message)
+            except (OSError, ValueError):
+                self._subscribers.remove(conn)
+                conn.close()
+
+    def _watch_reloads(self):
+        """Resend the full state when the database file was replaced from outside"""
+        from routers import rewards
+
+        while not self._stop.wait(RELOAD_CHECK_INTERVAL):
+            with rewards._rewards_lock:
+                data = rewards.load_rewards_db()
+                if data is self._published_data:
+                    continue
+                self._published_data = data
+                logger.info("Rewards DB reloaded from disk; sending full state to replicas")
+                for conn in list(self._subscribers):
+                    try:
+                        self._send_state(conn)
+                    except (OSError, ValueError):
+                        self._subscribers.remove(conn)
+                        conn.close()
+
+
+# -------------------------
+# Replica
+# -------------------------
+class RewardsReplica:
+    def __init__(self, address: str, authkey: bytes = AUTHKEY):
+        self.address = address
+        self.authkey = authkey
+        self.ready = threading.Event()
+        self._version_changed = threading.Condition()
+        self._connections = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(CLIENT_POOL_SIZE)
+        self._subscription = None
+
+    def _connect(self, role: str):
+        try:
+            # A new owner publishes a new key, so read it on every connect
+            conn = Client(self.address, family="AF_UNIX", authkey=self.authkey or _read_key(self.address))
+        except (OSError, EOFError, AuthenticationError) as e:
+            raise OwnerUnavailable(str(e)) from e
+        conn.send(role)
+        return conn
+
+    def call(self, op: str, *args):
+        """Run an operation on the owner; raises like the local function would"""
+        with self._slots:
+            try:
+                conn = self._connections.get_nowait()
+            except queue.Empty:
+                conn = None
+            try:
+                conn = conn or self._connect("rpc")
+                conn.send((op, args))
+                reply = conn.recv()
+            except (OwnerUnavailable, OSError, EOFError) as e:
+                if conn is not None:
+                    conn.close()
+                logger.error(f"Rewards owner unavailable for {op}: {e}")
+                raise _unavailable()
+            self._connections.put(conn)
+
+        status = reply[0]
+        if status == "ok":
+            self._wait_for_version(reply[2])
+            return reply[1]
+        if status == "http_error":
+            raise HTTPException(status_code=reply[1], detail=reply[2])
+        if status == "value_error":
+            raise ValueError(reply[1])
+        raise RuntimeError(reply[1])
+
+    def _wait_for_version(self, version: int):
+        from routers import rewards
+
+        with self._version_changed:
+            caught_up = self._version_changed.wait_for(
+                lambda: rewards._rewards_cache["version"] >= version, CATCH_UP_TIMEOUT
+            )
+        if not caught_up:
+            logger.warning(f"Replica did not reach rewards version {version} within {CATCH_UP_TIMEOUT}s; "
+                           "reads from this worker may not show the write yet")
+        return caught_up
+
+    def run(self, stop: threading.Event, ready: Optional[threading.Event] = None):
+        """Follow the owner's updates until the connection drops or ``stop`` is set"""
+        from routers import rewards
+        from services.leaderboard_windows import windowed_leaderboard
+
+        try:
+            self._subscription = self._connect("subscribe")
+        except OwnerUnavailable:
+            return
+        try:
+            while not stop.is_set():
+                message = self._subscription.recv()
+                with rewards._rewards_lock, self._version_changed:
+                    if message[0] == "state":
+                        _, version, payload = message
+                        rewards._rewards_cache.update(
+                            path=rewards.REWARDS_DB_FILE, mtime=None, data=marshal.loads(payload),
+                            version=version, replica=True, source="owner",
+                        )
+                        self.ready.set()
+                        if ready is not None:
+                            ready.set()
+                    elif message[0] == "user":
+                        _, version, user_id, entry = message
+                        rewards._rewards_cache["data"][user_id] = entry
+                        rewards._rewards_cache["version"] = version
+                        windowed_leaderboard.sync_user(rewards._rewards_cache["data"], user_id)
+                    self._version_changed.notify_all()
+        except (EOFError, OSError):
+            if not stop.is_set():
+                logger.warning("Lost connection to rewards owner")
+        finally:
+            self.close()
+
+    def close(self):
+        if self._subscription is not None:
+            self._subscription.close()
+        while True:
+            try:
+                self._connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+# -------------------------
+# Process role
+# -------------------------
+_owner: Optional[RewardsOwner] = None
+_replica: Optional[RewardsReplica] = None
+_stop = threading.Event()
+_role_lock = threading.Lock()
+_owner_callbacks = []
+
+
+def remote() -> Optional[RewardsReplica]:
+    """The replica client when another process owns the rewards state, else None"""
+    return _replica
+
+
+def notify_changed(user_id: str):
+    """Publish a locally applied change when this process is the owner"""
+    if _owner is not None:
+        _owner.publish_user(user_id)
+
+
+def when_owner(callback):
+    """Call ``callback`` once this process is (or later becomes) the owner"""
+    with _role_lock:
+        if _owner is None:
+            _owner_callbacks.append(callback)
+            return
+    callback()
+
+
+def _became_owner(owner: RewardsOwner):
+    global _owner
+    with _role_lock:
+        _owner = owner
+        callbacks = list(_owner_callbacks)
+        _owner_callbacks.clear()
+    for callback in callbacks:
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"Owner start-up callback failed: {e}", exc_info=True)
+
+
+def _run(address: str, ready: threading.Event):
+    global _owner, _replica
+    import fcntl
+    from routers import rewards
+
+    lock_file = open(f"{address}.lock", "a+")
+    while not _stop.is_set():
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            _replica = RewardsReplica(address)
+            _replica.run(_stop, ready)
+            _stop.wait(RECONNECT_DELAY)
+            continue
+
+        # This process owns the state now; serve it from the file again
+        _replica = None
+        with rewards._rewards_lock:
+            rewards._rewards_cache.update(replica=False, mtime=None)
+        owner = RewardsOwner(address)
+        owner.start()
+        _became_owner(owner)
+        ready.set()
+        _stop.wait()
+        owner.close()
+        _owner = None
+        lock_file.close()
+        return
+
+
+def start(address: str = REWARDS_SYNC_SOCKET) -> threading.Event:
+    """Join the worker group on ``address``; the returned event is set once state is available"""
+    ready = threading.Event()
+    _stop.clear()
+    threading.Thread(target=_run, args=(address, ready), daemon=True, name="rewards-sync").start()
+    return ready
+
+
+def stop():
+    global _replica
+    _stop.set()
+    if _replica is not None:
+        _replica.close()
+        _replica = None
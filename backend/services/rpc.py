@@ -0,0 +1,379 @@
+"""
+Ethereum JSON-RPC client.
+
+One client is shared per process (``get_client()``):
+
+- HTTP connections are kept alive and pooled, so calls skip the TCP/TLS
+  handshake and can run from several threads at once.
+- ``batch()`` sends many calls in one JSON-RPC batch request.
+- ``multicall()`` folds contract view calls into Multicall3 ``aggregate3``
+  calls and falls back to a batch of ``eth_call`` when no Multicall3
+  contract is configured.
+- View results are cached by ``(contract, calldata, block)``. Calls without
+  an explicit block are pinned to the current head, so a new block makes
+  fresh reads and older entries age out of the LRU. Entries above a reorged
+  block are dropped by ``invalidate_from``.
+"""
+import http.client
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Any, Hashable, List, Optional, Sequence, Tuple
+
+from services.abi import AbiError, FunctionSpec
+
+logger = logging.getLogger(__name__)
+
+RPC_URL = os.getenv("RPC_URL", "http://127.0.0.1:8545")
+RPC_TIMEOUT = float(os.getenv("RPC_TIMEOUT", 30))
+RPC_POOL_SIZE = int(os.getenv("RPC_POOL_SIZE", 8))
+RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", 100))
+RPC_CACHE_SIZE = int(os.getenv("RPC_CACHE_SIZE", 10_000))
+# How long the head block number is reused when pinning "latest" reads
+RPC_HEAD_TTL = float(os.getenv("RPC_HEAD_TTL", 1.0))
+
+# Multicall3 is deployed at this address on most EVM chains, but not on a
+# fresh local node. The client checks for code there once and otherwise
+# sends plain batched eth_calls; an empty MULTICALL_ADDRESS skips the check.
+MULTICALL_ADDRESS = os.getenv("MULTICALL_ADDRESS", "0xcA11bde05977b3631167028862bE2a173976CA11")
+MULTICALL_CHUNK = int(os.getenv("MULTICALL_CHUNK", 300))
+AGGREGATE3 = FunctionSpec("aggregate3", ["(address,bool,bytes)[]"], ["(bool,bytes)[]"])
+
+_MISS = object()
+
+
+class RpcError(Exception):
+    """JSON-RPC error response or transport failure"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class ConnectionPool:
+    """Keep-alive HTTP connections to one endpoint, shared across threads"""
+
+    def __init__(self, url: str, size: int = RPC_POOL_SIZE, timeout: float = RPC_TIMEOUT):
+        parts = urllib.parse.urlsplit(url)
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        self.connections_opened += 1
+        return self._connection_class(self.host, self.port, timeout=self.timeout)
+
+    def _roundtrip(self, conn: http.client.HTTPConnection, body: bytes) -> Tuple[int, bytes, bool]:
+        conn.request("POST", self.path, body, {"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, response.read(), response.will_close
+
+    def post(self, body: bytes) -> bytes:
+        with self._slots:
+            try:
+                conn, reused = self._idle.get_nowait(), True
+            except queue.Empty:
+                conn, reused = self._connect(), False
+            try:
+                status, data, will_close = self._roundtrip(conn, body)
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                if not reused:
+                    raise
+                # The node may have dropped an idle keep-alive connection; retry once on a fresh one
+                conn = self._connect()
+                try:
+                    status, data, will_close = self._roundtrip(conn, body)
+                except BaseException:
+                    conn.close()
+                    raise
+            if will_close:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        if status != 200:
+            raise RpcError(f"HTTP {status}: {data[:200]!r}", status)
+        return data
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class CallCache:
+    """Thread-safe LRU of ``eth_call`` results keyed by ``(contract, calldata, block)``"""
+
+    def __init__(self, max_size: int = RPC_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable):
+        with self._lock:
+            value = self._entries.get(key, _MISS)
+            if value is _MISS:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_from(self, block: int) -> int:
+        """Drop entries read at ``block`` or later; returns how many were dropped"""
+        with self._lock:
+            stale = [key for key in self._entries if key[2] >= block]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RpcClient:
+    def __init__(
+        self,
+        url: str = RPC_URL,
+        timeout: float = RPC_TIMEOUT,
+        pool_size: int = RPC_POOL_SIZE,
+        batch_size: int = RPC_BATCH_SIZE,
+        cache_size: int = RPC_CACHE_SIZE,
+        multicall_address: Optional[str] = MULTICALL_ADDRESS,
+    ):
+        self.url = url
+        self.pool = ConnectionPool(url, pool_size, timeout)
+        self.cache = CallCache(cache_size)
+        self.batch_size = batch_size
+        self.multicall_address = multicall_address or None
+        self._multicall_checked = self.multicall_address is None
+        self._ids = itertools.count(1)
+        self._head = None
+        self._head_checked = 0.0
+        self._head_lock = threading.Lock()
+
+    def close(self):
+        self.pool.close()
+
+    def _post(self, payload, label: str):
+        try:
+            raw = self.pool.post(json.dumps(payload).encode("utf-8"))
+        except (http.client.HTTPException, OSError) as e:
+            raise RpcError(f"{label} failed: {e}") from e
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise RpcError(f"{label} failed: invalid JSON response") from e
+
+    @staticmethod
+    def _result(body: dict, method: str):
+        if "error" in body:
+            error = body["error"] or {}
+            raise RpcError(error.get("message", f"{method}: unknown error"), error.get("code"))
+        return body.get("result")
+
+    def call(self, method: str, *params) -> Any:
+        payload = {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": list(params)}
+        return self._result(self._post(payload, method), method)
+
+    def batch(self, calls: Sequence[Tuple[str, Sequence]], raise_errors: bool = True) -> List[Any]:
+        """
+        Send ``(method, params)`` calls as JSON-RPC batches of up to ``batch_size``.
+        Results keep the order of ``calls``. With ``raise_errors=False`` a failed
+        call yields its RpcError instead of raising.
+        """
+        results = []
+        for start in range(0, len(calls), self.batch_size):
+            chunk = calls[start:start + self.batch_size]
+            payload = [
+                {"jsonrpc": "2.0", "id": i, "method": method, "params": list(params)}
+                for i, (method, params) in enumerate(chunk)
+            ]
+            body = self._post(payload, f"batch of {len(chunk)}")
+            if isinstance(body, dict):
+                # The whole batch was rejected
+                self._result(body, "batch")
+                raise RpcError("batch: unexpected response")
+            by_id = {item.get("id"): item for item in body}
+            for i, (method, _) in enumerate(chunk):
+                item = by_id.get(i)
+                try:
+                    if item is None:
+                        raise RpcError(f"{method}: missing from batch response")
+                    results.append(self._result(item, method))
+                except RpcError as e:
+                    if raise_errors:
+                        raise
+                    results.append(e)
+        return results
+
+    # -------------------------
+    # Chain state
+    # -------------------------
+    def block_number(self) -> int:
+        return int(self.call("eth_blockNumber"), 16)
+
+    def head(self, max_age: float = RPC_HEAD_TTL) -> int:
+        """Latest block number, refreshed at most every ``max_age`` seconds"""
+        with self._head_lock:
+            now = time.monotonic()
+            if self._head is None or now - self._head_checked >= max_age:
+                head = self.block_number()
+                if self._head is not None and head < self._head:
+                    # The node went back (reorg or failover): cached reads above it are stale
+                    self.invalidate_from(head + 1)
+                self._head, self._head_checked = head, now
+            return self._head
+
+    def invalidate_from(self, block: int):
+        dropped = self.cache.invalidate_from(block)
+        if dropped:
+            logger.info(f"Dropped {dropped} cached calls from block {block}")
+
+    def get_block(self, number: int) -> Optional[dict]:
+        return self.call("eth_getBlockByNumber", hex(number), False)
+
+    def get_blocks(self, numbers: Sequence[int]) -> List[Optional[dict]]:
+        return self.batch([("eth_getBlockByNumber", (hex(number), False)) for number in numbers])
+
+    def get_logs(self, address, from_block: int, to_block: int, topics=None) -> list:
+        query = {"address": address, "fromBlock": hex(from_block), "toBlock": hex(to_block)}
+        if topics:
+            query["topics"] = topics
+        return self.call("eth_getLogs", query)
+
+    # -------------------------
+    # Contract views
+    # -------------------------
+    def eth_call(self, to: str, data: bytes, block: Optional[int] = None) -> bytes:
+        """Raw ``eth_call`` at ``block`` (default: current head), cached per block"""
+        block = self.head() if block is None else block
+        key = (to.lower(), data, block)
+        cached = self.cache.get(key)
+        if cached is not _MISS and cached is not None:
+            return cached
+        result = self.call("eth_call", {"to": to, "data": "0x" + data.hex()}, hex(block))
+        value = bytes.fromhex(result[2:])
+        self.cache.put(key, value)
+        return value
+
+    def view(self, to: str, spec: FunctionSpec, *args, block: Optional[int] = None):
+        return spec.decode_result(self.eth_call(to, spec.encode_call(*args), block))
+
+    def multicall(self, calls: Sequence[Tuple[str, FunctionSpec, Sequence]], block: Optional[int] = None) -> list:
+        """
+        Run ``(contract, spec, args)`` view calls at one block and return decoded
+        results in order. A call that reverts or cannot be decoded yields None.
+        Cached results are reused; the rest go out as Multicall3 ``aggregate3``
+        calls of up to ``MULTICALL_CHUNK``, all in one batch request.
+        """
+        block = self.head() if block is None else block
+        results = [None] * len(calls)
+        pending = []  # (index, cache key)
+        for i, (to, spec, args) in enumerate(calls):
+            key = (to.lower(), spec.encode_call(*args), block)
+            data = self.cache.get(key)
+            if data is _MISS:
+                pending.append((i, key))
+            else:
+                results[i] = self._decode(spec, data)
+
+        if pending:
+            fetched = self._fetch_views([key for _, key in pending], block)
+            for (i, key), data in zip(pending, fetched):
+                self.cache.put(key, data)
+                results[i] = self._decode(calls[i][1], data)
+        return results
+
+    @staticmethod
+    def _decode(spec: FunctionSpec, data: Optional[bytes]):
+        if data is None:
+            return None
+        try:
+            return spec.decode_result(data)
+        except AbiError:
+            return None
+
+    def resolve_multicall(self) -> Optional[str]:
+        """The Multicall3 address if a contract is deployed there, checked once; else None"""
+        if not self._multicall_checked:
+            code = self.call("eth_getCode", self.multicall_address, "latest")
+            if not code or not code[2:].strip("0"):
+                logger.warning(f"No Multicall3 contract at {self.multicall_address}; using batched eth_call")
+                self.multicall_address = None
+            self._multicall_checked = True
+        return self.multicall_address
+
+    def _fetch_views(self, keys: List[tuple], block: int) -> List[Optional[bytes]]:
+        """Return data for each ``(to, calldata, block)`` key, None for reverted calls"""
+        if self.resolve_multicall() is None:
+            responses = self.batch(
+                [("eth_call", ({"to": to, "data": "0x" + data.hex()}, hex(block))) for to, data, _ in keys],
+                raise_errors=False,
+            )
+            return [None if isinstance(r, RpcError) else bytes.fromhex(r[2:]) for r in responses]
+
+        chunks = [keys[i:i + MULTICALL_CHUNK] for i in range(0, len(keys), MULTICALL_CHUNK)]
+        requests = []
+        for chunk in chunks:
+            data = AGGREGATE3.encode_call([(to, True, calldata) for to, calldata, _ in chunk])
+            requests.append(("eth_call", ({"to": self.multicall_address, "data": "0x" + data.hex()}, hex(block))))
+        results = []
+        for chunk, response in zip(chunks, self.batch(requests)):
+            try:
+                outcomes = AGGREGATE3.decode_result(bytes.fromhex(response[2:]))
+            except ValueError as e:  # AbiError included
+                raise RpcError(f"aggregate3 returned undecodable data: {e}") from e
+            if len(outcomes) != len(chunk):
+                raise RpcError(f"aggregate3 returned {len(outcomes)} results for {len(chunk)} calls")
+            results.extend(data if success else None for success, data in outcomes)
+        return results
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> RpcClient:
+    """Process-wide client sharing one connection pool and call cache"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RpcClient()
+        return _client
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
@@ -0,0 +1,98 @@
+"""
+Binary snapshots of JSON data files for fast cold starts.
+
+A snapshot sits next to its JSON file (``rewards_db.json.snap``) and holds
+the same data serialized with ``marshal``. Loading it is several times
+faster than parsing the pretty-printed JSON. The JSON file stays the source
+of truth: a snapshot is only used when its header matches the JSON file's
+current size and mtime and the running interpreter's marshal format.
+Otherwise callers fall back to the JSON file. Snapshots are written at
+warm-up and shutdown, not on every save.
+
+Loads run with the cyclic garbage collector paused, since building
+millions of containers otherwise triggers repeated full collections.
+The API process moves what it loaded to the permanent generation
+(``gc.freeze``) once, after the startup warm-up.
+"""
+import gc
+import json
+import logging
+import marshal
+import os
+import struct
+import sys
+from contextlib import contextmanager
+from typing import Any, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"CXSNAP1\n"
+# source mtime_ns, source size, marshal version, python major, python minor
+HEADER = struct.Struct("<qqHBB")
+
+
+def snapshot_path(json_path: str) -> str:
+    return f"{json_path}.snap"
+
+
+def _header_for(json_path: str) -> bytes:
+    stat = os.stat(json_path)
+    return MAGIC + HEADER.pack(stat.st_mtime_ns, stat.st_size, marshal.version, *sys.version_info[:2])
+
+
+@contextmanager
+def gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def is_current(json_path: str) -> bool:
+    """True if the snapshot of ``json_path`` matches the JSON file as it is now"""
+    try:
+        expected = _header_for(json_path)
+        with open(snapshot_path(json_path), "rb") as f:
+            return f.read(len(expected)) == expected
+    except OSError:
+        return False
+
+
+def write_snapshot(data: Any, json_path: str):
+    """Write a snapshot of ``data`` matching the current state of ``json_path``"""
+    path = snapshot_path(json_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_header_for(json_path))
+        f.write(marshal.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(json_path: str) -> Optional[Any]:
+    """Data from the snapshot of ``json_path``, or None if missing or stale"""
+    path = snapshot_path(json_path)
+    try:
+        expected = _header_for(json_path)
+        with open(path, "rb") as f:
+            if f.read(len(expected)) != expected:
+                return None
+            payload = f.read()
+    except OSError:
+        return None
+    try:
+        with gc_paused():
+            return marshal.loads(payload)
+    except (EOFError, ValueError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+
+def load_json(json_path: str) -> Any:
+    """Parse a JSON file with the garbage collector paused"""
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    with gc_paused():
+        return json.loads(raw)
@@ -0,0 +1,136 @@
+"""
+Stateless HMAC-signed access tokens.
+
+Tokens use the JWT compact format with HS256 signatures, so they can be
+verified without any lookup. Verified tokens are kept in a small LRU cache
+so repeat requests carrying the same token skip the HMAC and JSON work.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+TOKEN_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_TTL_SECONDS", 24 * 3600))
+VERIFY_CACHE_SIZE = int(os.getenv("AUTH_VERIFY_CACHE_SIZE", 4096))
+
+_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=")
+
+
+class TokenError(Exception):
+    """Raised when a token is malformed, tampered with or expired"""
+
+
+def _multi_worker() -> bool:
+    # REWARDS_SYNC_SOCKET is set for uvicorn --workers N; uvicorn also reads WEB_CONCURRENCY
+    return bool(os.getenv("REWARDS_SYNC_SOCKET")) or int(os.getenv("WEB_CONCURRENCY") or 1) > 1
+
+
+def _load_secret() -> bytes:
+    secret = os.getenv("AUTH_SECRET_KEY")
+    if secret:
+        return secret.encode("utf-8")
+    if _multi_worker():
+        # Each worker would sign with its own random key and reject the others' tokens
+        raise RuntimeError("AUTH_SECRET_KEY must be set when running several worker processes")
+    logger.warning("AUTH_SECRET_KEY is not set; using a random key, tokens will not survive restarts")
+    return secrets.token_bytes(32)
+
+
+_SECRET = _load_secret()
+
+
+def _b64encode(raw: bytes) -> bytes:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=")
+
+
+def _b64decode(segment: bytes) -> bytes:
+    return base64.urlsafe_b64decode(segment + b"=" * (-len(segment) % 4))
+
+
+def _sign(signing_input: bytes) -> bytes:
+    return hmac.new(_SECRET, signing_input, hashlib.sha256).digest()
+
+
+def create_token(subject: str, ttl: int = TOKEN_TTL_SECONDS, **claims) -> str:
+    """Issue a signed token for ``subject`` valid for ``ttl`` seconds"""
+    now = int(time.time())
+    payload = {"sub": subject, "iat": now, "exp": now + ttl, **claims}
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+    signing_input = _HEADER + b"." + body
+    return (signing_input + b"." + _b64encode(_sign(signing_input))).decode("ascii")
+
+
+def decode_token(token: str) -> dict:
+    """Verify signature and expiry without consulting the cache"""
+    try:
+        raw = token.encode("ascii")
+        signing_input, _, signature = raw.rpartition(b".")
+        header, _, body = signing_input.partition(b".")
+        if header != _HEADER or not body:
+            raise TokenError("Malformed token")
+        if not hmac.compare_digest(_b64decode(signature), _sign(signing_input)):
+            raise TokenError("Invalid signature")
+        claims = json.loads(_b64decode(body))
+    except (ValueError, UnicodeError) as e:
+        raise TokenError("Malformed token") from e
+    if not isinstance(claims, dict) or claims.get("exp", 0) <= time.time():
+        raise TokenError("Token expired")
+    return claims
+
+
+class VerifiedTokenCache:
+    """Thread-safe LRU of token -> claims for tokens that passed verification"""
+
+    def __init__(self, maxsize: int = VERIFY_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            claims = self._entries.get(token)
+            if claims is None:
+                self.misses += 1
+                return None
+            if claims["exp"] <= time.time():
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return claims
+
+    def put(self, token: str, claims: dict):
+        with self._lock:
+            self._entries[token] = claims
+            self._entries.move_to_end(token)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+verified_tokens = VerifiedTokenCache()
+
+
+def verify_token(token: str) -> dict:
+    """Return the token's claims, served from the LRU when possible"""
+    claims = verified_tokens.get(token)
+    if claims is None:
+        claims = decode_token(token)
+        verified_tokens.put(token, claims)
+    return claims
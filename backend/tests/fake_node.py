@@ -0,0 +1,154 @@
+"""
+In-process stand-in for an Ethereum JSON-RPC node.
+
+Serves keep-alive HTTP/1.1 with JSON-RPC batches, ``eth_blockNumber``,
+``eth_getBlockByNumber``, ``eth_getCode`` and ``eth_call`` against a fake
+CarbonCreditToken (``getProject``, ``isProjectActive``, ``uri``) plus
+Multicall3 ``aggregate3``. With ``multicall=False`` there is no contract at
+the Multicall3 address, as on a fresh local node. ``latency`` is added to every HTTP request to model the
+network round trip. Used by the RPC tests and benchmarks.
+"""
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services import abi
+from services.carbon_token import GET_PROJECT, IS_PROJECT_ACTIVE, URI
+from services.rpc import AGGREGATE3, MULTICALL_ADDRESS
+
+TOKEN_ADDRESS = "0x" + "11" * 20
+
+
+class Revert(Exception):
+    pass
+
+
+class FakeNode:
+    def __init__(self, projects: int = 1000, latency: float = 0.0, head: int = 100, multicall: bool = True):
+        self.latency = latency
+        self.head = head
+        self.multicall_address = MULTICALL_ADDRESS.lower() if multicall else None
+        self.projects = {i: self.make_project(i) for i in range(1, projects + 1)}
+        self.http_requests = 0
+        self.rpc_calls = 0
+        self.eth_calls = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._views = {
+            GET_PROJECT.selector: (GET_PROJECT, lambda i: self._project(i)),
+            IS_PROJECT_ACTIVE.selector: (IS_PROJECT_ACTIVE, lambda i: i in self.projects and i % 5 != 0),
+            URI.selector: (URI, lambda i: self._project(i)[9] or f"ipfs://carbonx/{i}.json"),
+        }
+
+    @staticmethod
+    def make_project(i: int, name: str = None) -> tuple:
+        return (
+            name or f"Project {i}", "VCS", 1000 + i, 12 * 10 ** 15, 1900000000,
+            "Kenya", "Forest", "0x" + f"{i:040x}", True, f"ipfs://project/{i}" if i % 2 else "",
+        )
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def reset_counters(self):
+        self.http_requests = self.rpc_calls = self.eth_calls = self.connections = 0
+
+    def __enter__(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body are written separately; don't let Nagle delay the body
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                with node._lock:
+                    node.connections += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                with node._lock:
+                    node.http_requests += 1
+                if node.latency:
+                    time.sleep(node.latency)
+                payload = json.loads(body)
+                response = [node.handle(item) for item in payload] if isinstance(payload, list) else node.handle(payload)
+                data = json.dumps(response).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    # -------------------------
+    # JSON-RPC
+    # -------------------------
+    def handle(self, request: dict) -> dict:
+        with self._lock:
+            self.rpc_calls += 1
+        method, params = request["method"], request.get("params", [])
+        try:
+            if method == "eth_blockNumber":
+                result = hex(self.head)
+            elif method == "eth_getBlockByNumber":
+                number = int(params[0], 16)
+                result = None if number > self.head else {
+                    "number": hex(number), "hash": "0x" + f"{number:064x}", "timestamp": hex(1760000000 + 12 * number),
+                }
+            elif method == "eth_getCode":
+                deployed = params[0].lower() in (TOKEN_ADDRESS, self.multicall_address)
+                result = "0x6080604052" if deployed else "0x"
+            elif method == "eth_call":
+                result = "0x" + self.eth_call(params[0]["to"].lower(), bytes.fromhex(params[0]["data"][2:])).hex()
+            else:
+                return {"jsonrpc": "2.0", "id": request.get("id"),
+                        "error": {"code": -32601, "message": f"method {method} not found"}}
+        except Revert as e:
+            return {"jsonrpc": "2.0", "id": request.get("id"), "error": {"code": 3, "message": f"execution reverted: {e}"}}
+        return {"jsonrpc": "2.0", "id": request.get("id"), "result": result}
+
+    def eth_call(self, to: str, data: bytes) -> bytes:
+        if to == self.multicall_address and data[:4] == AGGREGATE3.selector:
+            calls = abi.decode(AGGREGATE3.inputs, data[4:])[0]
+            results = []
+            for target, allow_failure, calldata in calls:
+                try:
+                    results.append((True, self.eth_call(target, calldata)))
+                except Revert:
+                    if not allow_failure:
+                        raise
+                    results.append((False, b""))
+            return abi.encode(AGGREGATE3.outputs, [results])
+
+        if to == MULTICALL_ADDRESS.lower():
+            return b""  # no contract there: calls succeed with empty data, as on a fresh node
+        with self._lock:
+            self.eth_calls += 1
+        if to != TOKEN_ADDRESS or data[:4] not in self._views:
+            raise Revert("unknown call")
+        spec, view = self._views[data[:4]]
+        (token_id,) = abi.decode(spec.inputs, data[4:])
+        return abi.encode(spec.outputs, [view(token_id)])
+
+    def _project(self, token_id: int) -> tuple:
+        if token_id not in self.projects:
+            raise Revert("Invalid project")
+        return self.projects[token_id]
@@ -0,0 +1,91 @@
+# backend/tests/test_auth.py
+import os
+import sys
+import pytest
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from main import app
+from routers import auth
+from services import passwords, tokens
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def users_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(auth, "USERS_DB_FILE", str(tmp_path / "users_db.json"))
+    monkeypatch.setattr(auth, "_users_cache", {"mtime": None, "users": {}})
+
+
+def test_password_hash_roundtrip():
+    encoded = passwords.hash_password("hunter2")
+    assert encoded.startswith("scrypt$")
+    assert passwords.verify_password("hunter2", encoded)
+    assert not passwords.verify_password("hunter3", encoded)
+    assert not passwords.verify_password("hunter2", None)
+    assert passwords.hash_password("hunter2") != encoded  # salted
+
+
+def test_token_rejects_tampering_and_expiry():
+    token = tokens.create_token("a@example.com")
+    assert tokens.decode_token(token)["sub"] == "a@example.com"
+
+    header, body, signature = token.split(".")
+    forged = tokens._b64encode(b'{"sub":"b@example.com","exp":9999999999}').decode()
+    with pytest.raises(tokens.TokenError):
+        tokens.decode_token(f"{header}.{forged}.{signature}")
+    with pytest.raises(tokens.TokenError):
+        tokens.decode_token(tokens.create_token("a@example.com", ttl=-1))
+    with pytest.raises(tokens.TokenError):
+        tokens.decode_token("not-a-token")
+
+
+def test_verified_tokens_are_cached():
+    cache = tokens.VerifiedTokenCache(maxsize=2)
+    claims = {"sub": "a", "exp": 9999999999}
+    cache.put("t1", claims)
+    cache.put("t2", claims)
+    assert cache.get("t1") is claims
+    cache.put("t3", claims)  # evicts t2, the least recently used
+    assert cache.get("t2") is None
+    assert cache.get("t1") is claims
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_secret_is_required_with_several_workers(monkeypatch):
+    monkeypatch.delenv("AUTH_SECRET_KEY", raising=False)
+    monkeypatch.delenv("REWARDS_SYNC_SOCKET", raising=False)
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert len(tokens._load_secret()) == 32
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    with pytest.raises(RuntimeError, match="AUTH_SECRET_KEY"):
+        tokens._load_secret()
+    monkeypatch.setenv("AUTH_SECRET_KEY", "shared")
+    assert tokens._load_secret() == b"shared"
+
+
+def test_signup_login_and_me():
+    r = client.post("/api/auth/signup", json={"name": "Ada", "email": "Ada@Example.com", "password": "pw1"})
+    assert r.status_code == 200
+    assert r.json()["user"]["email"] == "ada@example.com"
+
+    r = client.post("/api/auth/signup", json={"name": "Ada", "email": "ada@example.com", "password": "pw2"})
+    assert r.status_code == 409
+
+    assert client.post("/api/auth/login", json={"email": "ada@example.com", "password": "nope"}).status_code == 401
+    assert client.post("/api/auth/login", json={"email": "who@example.com", "password": "pw1"}).status_code == 401
+
+    r = client.post("/api/auth/login", json={"email": "ada@example.com", "password": "pw1"})
+    assert r.status_code == 200
+    token = r.json()["token"]
+
+    r = client.get("/api/auth/me", headers={"Authorization": f"Bearer {token}"})
+    assert r.status_code == 200
+    assert r.json()["user"] == {"name": "Ada", "email": "ada@example.com"}
+    assert client.get("/api/auth/me").status_code == 401
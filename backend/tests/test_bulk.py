@@ -0,0 +1,120 @@
+# backend/tests/test_bulk.py
+import asyncio
+import copy
+import csv
+import io
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from main import app
+from services import bulk
+from services import calculator
+from services.calculator import CalculationError, compute_footprints
+
+client = TestClient(app)
+
+INVENTORY = (
+    "facility_id,month,industry,electricity,raw_materials,cooling\n"
+    "f1,2026-01,steel,3000,1000,\n"
+    "f2,2026-01,chemical,,,500\n"
+    'f3,"2026-01",cement,,,\n'
+)
+
+
+async def stream(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def run(data: bytes, size: int = 7):
+    async def go():
+        with ThreadPoolExecutor(2) as pool:
+            f = await bulk.compute_csv_stream(stream(data, size), executor=pool)
+            return b"".join(bulk.iter_file(f)).decode()
+    return asyncio.run(go())
+
+
+def test_stream_matches_calculator_and_keeps_order(monkeypatch):
+    monkeypatch.setattr(bulk, "CHUNK_ROWS", 2)
+    rows = list(csv.DictReader(io.StringIO(run(INVENTORY.encode()))))
+    expected = compute_footprints([
+        {"industry": "steel", "inputs": {"electricity": 3000, "raw_materials": 1000}},
+        {"industry": "chemical", "inputs": {"cooling": 500}},
+        {"industry": "cement", "inputs": {}},
+    ])
+    assert [r["facility_id"] for r in rows] == ["f1", "f2", "f3"]
+    assert [r["month"] for r in rows] == ["2026-01"] * 3
+    for row, want in zip(rows, expected):
+        assert int(row["totalEmissions"]) == want["totalEmissions"]
+        assert float(row["scaleFactor"]) == want["scaleFactor"]
+
+
+def test_stream_reports_bad_rows(monkeypatch):
+    monkeypatch.setattr(bulk, "CHUNK_ROWS", 2)
+    with pytest.raises(CalculationError, match="Row 3: unknown industry 'mining'"):
+        run(b"industry,cooling\nchemical,1\nchemical,2\nmining,3\n")
+    with pytest.raises(CalculationError, match="industry"):
+        run(b"facility,cooling\nf1,1\n")
+    with pytest.raises(CalculationError, match="Row 2: 'cooling' must be a finite number"):
+        run(b"industry,cooling\nchemical,\nchemical,inf\n")
+
+
+def test_stream_rejects_overlong_lines(monkeypatch):
+    monkeypatch.setattr(bulk, "MAX_LINE_BYTES", 64)
+    with pytest.raises(CalculationError, match="Row 2 is longer than 64 bytes"):
+        run(b"facility_id,industry\nf1,steel\n" + b"f" * 200 + b",steel\n")
+    with pytest.raises(CalculationError, match="Row 1 is longer"):
+        run(b"facility_id,industry\n" + b"f" * 10_000, size=3)  # never terminated
+    with pytest.raises(CalculationError, match="Header row is longer"):
+        run(b"industry," + b"x" * 100 + b"\n", size=1000)
+    assert run(b"industry\n" + b"steel\n" * 50, size=3).count("steel") == 50
+
+
+def test_worker_processes_use_updated_factor_tables():
+    original = copy.deepcopy(calculator.INDUSTRY_DATA)
+    tables = copy.deepcopy(original)
+    tables["cement"]["typical_emissions"]["scope1"] = 6200
+    tables["cement"]["parameters"][0] = "clinker"
+    calculator.update_factor_tables(industry_data=tables)
+
+    async def go():
+        # Spawned workers import the module defaults
+        with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            f = await bulk.compute_csv_stream(stream(b"industry,clinker\ncement,2000\ncement,\n", 7), executor=pool)
+            return b"".join(bulk.iter_file(f)).decode()
+
+    try:
+        rows = list(csv.DictReader(io.StringIO(asyncio.run(go()))))
+        expected = compute_footprints([{"industry": "cement", "inputs": {"clinker": 2000}},
+                                       {"industry": "cement", "inputs": {}}])
+    finally:
+        calculator.update_factor_tables(industry_data=original)
+    assert "clinker" not in rows[0]  # a parameter column, not an echoed key
+    assert [int(r["scope1"]) for r in rows] == [e["scope1"] for e in expected] == [12400, 6200]
+
+
+def test_bulk_endpoint_streams_csv():
+    r = client.post("/api/calculator/bulk", content=INVENTORY.encode(), headers={"Content-Type": "text/csv"})
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/csv")
+    lines = r.text.splitlines()
+    assert lines[0].startswith("facility_id,month,industry,scope1")
+    assert len(lines) == 4
+
+    r = client.post("/api/calculator/bulk", content=b"industry\nmining\n")
+    assert r.status_code == 400
+
+    long_line = b"f" * (bulk.MAX_LINE_BYTES + 1)
+    r = client.post("/api/calculator/bulk", content=b"facility_id,industry\n" + long_line)
+    assert r.status_code == 400
+    assert "longer than" in r.json()["detail"]["message"]
@@ -0,0 +1,75 @@
+# backend/tests/test_calculation_cache.py
+import copy
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from main import app
+from services import calculator
+from services.calculation_cache import CalculationCache, compute_footprints_cached
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def restore_tables():
+    industry_data = copy.deepcopy(calculator.INDUSTRY_DATA)
+    yield
+    calculator.update_factor_tables(industry_data=industry_data)
+
+
+def test_equivalent_inputs_share_an_entry():
+    cache = CalculationCache(maxsize=10)
+    a = {"industry": "steel", "inputs": {"electricity": 1200.001, "raw_materials": 800}}
+    b = {"industry": "steel", "inputs": {"raw_materials": 800.0, "electricity": 1200.0}}
+    first, second = compute_footprints_cached([a, b], cache=cache)
+    assert first == second
+    assert cache.stats()["size"] == 1
+    compute_footprints_cached([b], cache=cache)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_lru_eviction_respects_maxsize():
+    cache = CalculationCache(maxsize=2)
+    for value in (1, 2, 1, 3):
+        compute_footprints_cached([{"industry": "power", "inputs": {"capacity": value}}], cache=cache)
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 1
+    # 2 was least recently used, 1 survived
+    compute_footprints_cached([{"industry": "power", "inputs": {"capacity": 1}}], cache=cache)
+    assert cache.hits == 2
+
+
+def test_factor_table_change_invalidates(restore_tables):
+    cache = CalculationCache()
+    record = {"industry": "cement", "inputs": {}}
+    [before] = compute_footprints_cached([record], cache=cache)
+
+    tables = copy.deepcopy(calculator.INDUSTRY_DATA)
+    tables["cement"]["typical_emissions"]["scope1"] = 6200
+    calculator.update_factor_tables(industry_data=tables)
+
+    [after] = compute_footprints_cached([record], cache=cache)
+    assert after["scope1"] == before["scope1"] + 1000
+    assert cache.stats()["invalidations"] == 1
+    assert cache.hits == 0
+
+
+def test_stats_endpoint():
+    record = {"industry": "chemical", "inputs": {"cooling": 4242.5}}
+    client.post("/api/calculator/compute", json={"records": [record]})
+    client.post("/api/calculator/compute", json={"records": [record]})
+    r = client.get("/api/calculator/cache/stats")
+    assert r.status_code == 200
+    stats = r.json()["cache"]
+    assert stats["hits"] >= 1
+    assert stats["factor_table_version"] == calculator.FACTOR_TABLE_VERSION
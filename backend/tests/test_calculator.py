@@ -0,0 +1,63 @@
+# backend/tests/test_calculator.py
+import os
+import sys
+import numpy as np
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from main import app
+from services.calculator import _js_round, compute_footprints
+
+client = TestClient(app)
+
+
+def test_matches_browser_calculator():
+    # Average input 2000 -> scale 2.0 on steel's typical emissions
+    [result] = compute_footprints([{
+        "industry": "steel",
+        "inputs": {"raw_materials": 1000, "furnace_operations": 2000, "electricity": 3000, "transportation": 2000},
+    }])
+    assert result["scaleFactor"] == 2.0
+    assert (result["scope1"], result["scope2"], result["scope3"]) == (9000, 2400, 5600)
+    assert result["totalEmissions"] == 17000
+    assert result["excessEmissions"] == 9500
+    assert result["creditCost"] == 809400
+
+
+def test_scale_is_clamped_and_rounds_half_up():
+    results = compute_footprints([
+        {"industry": "power", "inputs": {"capacity": 1}},
+        {"industry": "power", "inputs": {"capacity": 1e9}},
+        {"industry": "cement", "inputs": {}},
+    ])
+    assert [r["scaleFactor"] for r in results] == [0.1, 5.0, 1.0]
+    assert results[2]["totalEmissions"] == 7500
+    # Math.round rounds halves up rather than to even
+    assert _js_round(np.array([0.5, 1.5, 2.5])).tolist() == [1.0, 2.0, 3.0]
+
+
+def test_compute_endpoint_batches_and_validates():
+    records = [{"industry": "chemical", "inputs": {"cooling": i}, "id": i} for i in range(2000)]
+    r = client.post("/api/calculator/compute", json={"records": records})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["count"] == 2000
+    assert body["results"][1500]["id"] == 1500
+
+    r = client.post("/api/calculator/compute", json={"records": [{"industry": "mining", "inputs": {}}]})
+    assert r.status_code == 400
+    assert r.json()["detail"]["code"] == "VALIDATION_ERROR"
+
+
+def test_compute_rejects_non_finite_inputs():
+    # Python's json module reads and writes these non-standard literals
+    for value in ("Infinity", "-Infinity", "NaN", "1e999"):
+        body = '{"records": [{"industry": "steel", "inputs": {"electricity": %s}}]}' % value
+        r = client.post("/api/calculator/compute", content=body, headers={"Content-Type": "application/json"})
+        assert r.status_code == 400
+        assert r.json()["detail"]["code"] == "VALIDATION_ERROR"
+        assert "finite" in r.json()["detail"]["message"]
@@ -0,0 +1,105 @@
+# backend/tests/test_dashboard.py
+import os
+import sys
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import main
+from routers import rewards
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(rewards, "REWARDS_DB_FILE", str(tmp_path / "rewards_db.json"))
+    rewards.save_rewards_db({
+        f"user-{i}": {"ecoPoints": i * 100, "badges": ["carbon_saver"] if i else [], "rank": max(1, i), "actions": []}
+        for i in range(20)
+    })
+    return TestClient(main.app)
+
+
+def test_dashboard_matches_individual_endpoints(client):
+    dashboard = client.get("/api/dashboard/user-7", params={"top": 5}).json()
+    user = client.get("/api/rewards/user/user-7").json()
+    leaderboard = client.get("/api/rewards/leaderboard", params={"limit": 5}).json()
+
+    assert dashboard["profile"] == {k: v for k, v in user.items() if k != "success"}
+    assert dashboard["profile"]["position"] == 13
+    assert dashboard["leaderboard"]["entries"] == leaderboard["leaderboard"]
+    assert dashboard["leaderboard"]["total_users"] == leaderboard["total_users"] == 20
+    assert dashboard["price"] == client.get("/api/credits/price").json()
+    assert dashboard["badge_definitions"] == client.get("/api/rewards/badges").json()["badges"]
+
+
+def test_shared_parts_are_computed_once_per_version(client):
+    first = client.get("/api/dashboard/user-1").json()
+    ranking = rewards._ranking_cache["user_ids"]
+    assert client.get("/api/dashboard/user-2").json()["version"] == first["version"]
+    assert rewards._ranking_cache["user_ids"] is ranking
+
+    for _ in range(3):
+        client.post("/api/rewards/update", json={"user_id": "user-1", "action_type": "carbon_offset", "amount": 20.0})
+    after = client.get("/api/dashboard/user-1").json()
+    assert after["version"] > first["version"]
+    assert after["profile"]["position"] == 1
+    assert after["leaderboard"]["entries"][0]["user_id"] == "user-1"
+
+
+def test_profile_and_leaderboard_agree_under_writes(client, monkeypatch):
+    monkeypatch.setattr(rewards, "REWARDS_SNAPSHOT", False)
+    stop = threading.Event()
+
+    def write():
+        while not stop.is_set():
+            rewards.apply_reward_action("user-19", "calculator_use")
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(30):
+            body = client.get("/api/dashboard/user-19", params={"top": 3}).json()
+            top = body["leaderboard"]["entries"][0]
+            assert top["user_id"] == "user-19" and body["profile"]["position"] == 1
+            assert top["ecoPoints"] == body["profile"]["ecoPoints"]
+    finally:
+        stop.set()
+        writer.join()
+
+
+def test_reads_do_not_replace_entries_writers_update(client):
+    stop = threading.Event()
+    errors = []
+
+    def read():
+        created = 0
+        while not stop.is_set():
+            rewards.get_user_rewards("user-3")
+            rewards.get_user_rewards(f"new-{created}")
+            created += 1
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    try:
+        for _ in range(100):
+            before = rewards.get_user_rewards("user-3")["ecoPoints"]
+            try:
+                rewards.apply_reward_action("user-3", "calculator_use")
+            except Exception as e:  # e.g. the db changing size during a save
+                errors.append(e)
+            assert rewards.get_user_rewards("user-3")["ecoPoints"] >= before + 10
+    finally:
+        stop.set()
+        reader.join()
+    assert errors == []
+    assert rewards.get_user_rewards("user-3")["ecoPoints"] == 300 + 100 * 10
+    # Reads hand out copies; the stored entry stays the writer's object
+    entry = rewards.load_rewards_db()["user-3"]
+    rewards.get_user_rewards("user-3")["ecoPoints"] = -1
+    assert rewards.load_rewards_db()["user-3"] is entry and entry["ecoPoints"] == 1300
@@ -0,0 +1,179 @@
+# backend/tests/test_indexer.py
+import copy
+import json
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from routers import rewards
+from services import abi, indexer as indexer_module
+from services.event_store import EventStore
+from services.indexer import MarketplaceIndexer, RetirementRewards
+from services.keccak import keccak256
+from services.rpc import RpcError
+
+with open(os.path.join(HERE, "fixtures", "marketplace_logs.json"), encoding="utf-8") as f:
+    FIXTURE = json.load(f)
+
+BOB = "0x3c44cdddb6a900fa2b585dd299e03d12fa4293bc"
+ALICE = "0x70997970c51812dc3a010c7d01b50e0d17dc79c8"
+# Rewards ids the frontend uses for these wallets
+BOB_USER = f"wallet_{BOB}"
+ALICE_USER = f"wallet_{ALICE}"
+
+
+class RecordedRpc:
+    """Serves recorded blocks and logs like a JSON-RPC node would"""
+
+    def __init__(self, fixture, max_range=None):
+        self.blocks = {int(b["number"], 16): b for b in fixture["blocks"]}
+        self.logs = list(fixture["logs"])
+        self.max_range = max_range
+        self.log_queries = []
+
+    def block_number(self):
+        return max(self.blocks)
+
+    def get_block(self, number):
+        return self.blocks.get(number)
+
+    def get_blocks(self, numbers):
+        return [self.blocks.get(number) for number in numbers]
+
+    def get_logs(self, address, from_block, to_block, topics=None):
+        self.log_queries.append((from_block, to_block))
+        if self.max_range and to_block - from_block + 1 > self.max_range:
+            raise RpcError("query exceeds max block range", -32005)
+        return [
+            log for log in self.logs
+            if log["address"] == address and from_block <= int(log["blockNumber"], 16) <= to_block
+        ]
+
+    def reorg(self, from_block, drop_logs_from):
+        for number, block in self.blocks.items():
+            if number >= from_block:
+                block["hash"] = "0x" + keccak256(f"fork:{number}".encode()).hex()
+        self.logs = [log for log in self.logs if int(log["blockNumber"], 16) < drop_logs_from]
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = EventStore(str(tmp_path / "index.db"))
+    yield s
+    s.close()
+
+
+@pytest.fixture(autouse=True)
+def rewards_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(rewards, "REWARDS_DB_FILE", str(tmp_path / "rewards_db.json"))
+
+
+def test_keccak_and_abi_roundtrip():
+    assert keccak256(b"").hex() == "c5d2460186f7233c927e7db2dcc703c0e500b653ca82273b7bfad8045d85a470"
+    assert abi.function_selector("transfer(address,uint256)").hex() == "a9059cbb"
+    types = ["uint256", "string", "(address,bool,bytes)[]", "bool"]
+    values = [2 ** 200, "hello", [(ALICE, True, b"\x01\x02"), (BOB, False, b"")], True]
+    assert abi.decode(types, abi.encode(types, values)) == values
+
+
+def test_sync_decodes_checkpoints_and_rewards(store):
+    rpc = RecordedRpc(copy.deepcopy(FIXTURE))
+    indexer = MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=5,
+                                 listeners=[RetirementRewards(store)])
+    assert indexer.sync() == 7
+    assert store.checkpoint()[0] == 35
+
+    retired = store.events("CreditsRetired")
+    assert [e["args"]["retiredBy"] for e in retired] == [BOB, ALICE]
+    assert retired[0]["args"]["reason"] == "2026 travel offset"
+    assert retired[0]["block_timestamp"] == 1760000000 + 12 * 12
+    assert store.events("CreditsPurchased")[0]["args"]["totalPrice"] == 10 ** 18
+
+    assert rewards.get_user_rewards(BOB_USER)["ecoPoints"] == 40 * 50
+    assert rewards.get_user_rewards(ALICE_USER)["ecoPoints"] == 5 * 50
+    assert BOB not in rewards.load_rewards_db()
+
+    # A restart resumes from the checkpoint and never rewards twice
+    again = MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=0,
+                               listeners=[RetirementRewards(store)])
+    assert again.sync() == 0
+    assert store.checkpoint()[0] == 40
+    assert rewards.get_user_rewards(BOB_USER)["ecoPoints"] == 40 * 50
+
+
+def test_block_range_shrinks_when_rejected(store):
+    rpc = RecordedRpc(copy.deepcopy(FIXTURE), max_range=8)
+    indexer = MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=0)
+    assert indexer.sync() == 7
+    assert store.checkpoint()[0] == 40
+    # The range halves on rejection and never grows back past a rejected size
+    rejected = [to - frm + 1 for frm, to in rpc.log_queries if to - frm + 1 > 8]
+    assert len(rejected) <= 5
+    assert indexer.batch_ceiling <= 8
+
+
+def test_only_range_errors_shrink_and_the_ceiling_recovers(store, monkeypatch):
+    rpc = RecordedRpc(copy.deepcopy(FIXTURE))
+    indexer = MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=0)
+    failing = rpc.get_logs
+    rpc.get_logs = lambda *args: (_ for _ in ()).throw(RpcError("eth_getLogs failed: timed out"))
+    with pytest.raises(RpcError):
+        indexer.sync()
+    assert (indexer.batch_blocks, indexer.batch_ceiling) == (indexer_module.INITIAL_BATCH_BLOCKS,
+                                                            indexer_module.MAX_BATCH_BLOCKS)
+
+    # A ceiling lowered by an earlier rejection is raised after enough accepted queries
+    rpc.get_logs = failing
+    monkeypatch.setattr(indexer_module, "CEILING_RECOVERY_BATCHES", 2)
+    indexer.batch_blocks, indexer.batch_ceiling = 4, 4
+    assert indexer.sync() == 7
+    assert max(to - frm + 1 for frm, to in rpc.log_queries) > 4
+    assert indexer.batch_ceiling > 4
+
+
+def test_failed_reward_is_retried_on_next_sync(store, monkeypatch):
+    rpc = RecordedRpc(copy.deepcopy(FIXTURE))
+    indexer = MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=0,
+                                 listeners=[RetirementRewards(store)])
+    apply = rewards.apply_reward_action
+    failures = []
+
+    def flaky(user_id, *args, **kwargs):
+        if user_id == BOB_USER and len(failures) < 2:  # the batch and the end of the first sync
+            failures.append(user_id)
+            raise OSError("disk full")
+        return apply(user_id, *args, **kwargs)
+
+    monkeypatch.setattr(rewards, "apply_reward_action", flaky)
+    assert indexer.sync() == 7
+    assert failures == [BOB_USER, BOB_USER]
+    assert rewards.get_user_rewards(BOB_USER)["ecoPoints"] == 0
+    assert rewards.get_user_rewards(ALICE_USER)["ecoPoints"] == 5 * 50
+    assert [e["args"]["retiredBy"] for e in store.unrewarded_events("CreditsRetired")] == [BOB]
+
+    # No new blocks, but the pending retirement is awarded, and only once
+    assert indexer.sync() == 0
+    indexer.sync()
+    assert rewards.get_user_rewards(BOB_USER)["ecoPoints"] == 40 * 50
+    assert rewards.get_user_rewards(ALICE_USER)["ecoPoints"] == 5 * 50
+    assert store.unrewarded_events("CreditsRetired") == []
+
+
+def test_reorg_rolls_back_and_reindexes(store):
+    rpc = RecordedRpc(copy.deepcopy(FIXTURE))
+    indexer = MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=0, reorg_depth=16)
+    indexer.sync()
+    assert len(store.events("CreditsRetired")) == 2
+
+    # Blocks from 30 on are replaced; the retirement in block 31 disappears
+    rpc.reorg(from_block=30, drop_logs_from=30)
+    indexer.sync()
+    assert [e["args"]["retiredBy"] for e in store.events("CreditsRetired")] == [BOB]
+    assert store.checkpoint() == (40, rpc.blocks[40]["hash"])
+    assert len(store.events()) == 6
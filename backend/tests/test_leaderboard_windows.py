@@ -0,0 +1,132 @@
+# backend/tests/test_leaderboard_windows.py
+import os
+import sys
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import main
+from routers import rewards
+from services.leaderboard_windows import WindowedLeaderboard, windowed_leaderboard
+
+TODAY = date(2026, 10, 19)
+
+
+def action(day: date, points: int) -> dict:
+    return {"type": "calculator_use", "amount": 1.0, "points_earned": points,
+            "timestamp": f"{day.isoformat()}T12:00:00", "metadata": {}}
+
+
+def user(*actions) -> dict:
+    return {"ecoPoints": sum(a["points_earned"] for a in actions), "badges": [], "rank": 0,
+            "actions": list(actions), "updated_at": actions[-1]["timestamp"] if actions else "2020-01-01"}
+
+
+class Clock:
+    def __init__(self, today: date):
+        self.value = today
+
+    def __call__(self) -> date:
+        return self.value
+
+
+def days_ago(n: int) -> date:
+    return TODAY - timedelta(days=n)
+
+
+@pytest.fixture
+def board():
+    return WindowedLeaderboard(today=Clock(TODAY))
+
+
+def test_rebuild_ranks_each_window(board):
+    data = {
+        "today": user(action(days_ago(0), 30)),
+        "week": user(action(days_ago(3), 50), action(days_ago(0), 5)),
+        "month": user(action(days_ago(20), 200)),
+        "old": user(action(days_ago(40), 1000)),
+    }
+    board.rebuild(data)
+    assert board.top("day", 10) == ([("today", 30), ("week", 5)], 2)
+    assert board.top("week", 10) == ([("week", 55), ("today", 30)], 2)
+    assert board.top("month", 2) == ([("month", 200), ("week", 55)], 3)
+    assert board.standing("month", "today") == (30, 3)
+    assert board.standing("week", "old") == (0, None)
+    assert board.since("week") == days_ago(6).isoformat()
+
+
+def test_sync_user_applies_new_actions_once(board):
+    data = {"a": user(action(days_ago(1), 10)), "b": user(action(days_ago(0), 20))}
+    board.rebuild(data)
+    data["a"]["actions"].append(action(days_ago(0), 15))
+    board.sync_user(data, "a")
+    board.sync_user(data, "a")
+    assert board.top("week", 10) == ([("a", 25), ("b", 20)], 2)
+    assert board.top("day", 10) == ([("b", 20), ("a", 15)], 2)
+
+    # Changes to a database the board was not built from wait for a rebuild
+    other = {"c": user(action(days_ago(0), 99))}
+    board.sync_user(other, "c")
+    assert board.standing("day", "c") == (0, None)
+
+
+def test_windows_slide_and_old_buckets_expire(board):
+    data = {"a": user(action(days_ago(0), 10)), "b": user(action(days_ago(5), 40))}
+    board.rebuild(data)
+    assert board.top("week", 10) == ([("b", 40), ("a", 10)], 2)
+
+    board.today.value = TODAY + timedelta(days=1)
+    assert board.top("day", 10) == ([], 0)
+    assert board.top("week", 10) == ([("b", 40), ("a", 10)], 2)
+
+    board.today.value = TODAY + timedelta(days=2)
+    assert board.top("week", 10) == ([("a", 10)], 1)
+    assert board.top("month", 10) == ([("b", 40), ("a", 10)], 2)
+
+    board.today.value = TODAY + timedelta(days=40)
+    assert board.top("month", 10) == ([], 0)
+    assert board._days == {} and board._user_days == {}
+
+
+def test_trimmed_history_keeps_bucket_points(board):
+    data = {"a": user(action(days_ago(1), 10), action(days_ago(1), 10), action(days_ago(0), 10))}
+    board.rebuild(data)
+    # The oldest action falls out of the stored history
+    data["a"]["actions"] = data["a"]["actions"][1:] + [action(days_ago(0), 10)]
+    board.sync_user(data, "a")
+    assert board.top("week", 10) == ([("a", 40)], 1)
+    assert board.top("day", 10) == ([("a", 20)], 1)
+
+
+def test_windowed_leaderboard_endpoint(tmp_path, monkeypatch):
+    monkeypatch.setattr(rewards, "REWARDS_DB_FILE", str(tmp_path / "rewards_db.json"))
+    yesterday = (date.today() - timedelta(days=1)).isoformat()
+    rewards.save_rewards_db({"veteran": {
+        "ecoPoints": 500, "badges": ["carbon_saver"], "rank": 5, "updated_at": f"{yesterday}T09:00:00",
+        "actions": [{"type": "investment", "amount": 1.0, "points_earned": 30, "timestamp": f"{yesterday}T09:00:00"}],
+    }})
+    client = TestClient(main.app)
+    for _ in range(2):
+        assert client.post("/api/rewards/update", json={"user_id": "newcomer", "action_type": "ai_tool_use"}).status_code == 200
+
+    day = client.get("/api/rewards/leaderboard", params={"window": "day"}).json()
+    assert [(e["user_id"], e["points"], e["position"]) for e in day["leaderboard"]] == [("newcomer", 40, 1)]
+    assert day["window"] == "day" and day["since"] == date.today().isoformat()
+
+    week = client.get("/api/rewards/leaderboard", params={"window": "week"}).json()
+    assert [(e["user_id"], e["points"]) for e in week["leaderboard"]] == [("newcomer", 40), ("veteran", 30)]
+    assert week["leaderboard"][1]["ecoPoints"] == 500 and week["total_users"] == 2
+
+    # All-time ranking is unchanged
+    assert client.get("/api/rewards/leaderboard").json()["leaderboard"][0]["user_id"] == "veteran"
+
+    response = client.get("/api/rewards/leaderboard", params={"window": "year"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["code"] == "INVALID_WINDOW"
+    assert windowed_leaderboard.is_current(rewards.load_rewards_db())
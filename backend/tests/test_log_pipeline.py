@@ -0,0 +1,89 @@
+# backend/tests/test_log_pipeline.py
+import io
+import json
+import logging
+import os
+import sys
+import threading
+
+import pytest
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from services import log_pipeline
+
+
+@pytest.fixture
+def configure():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+
+    def setup(**kwargs):
+        stream = io.StringIO()
+        log_pipeline.configure_logging(stream=stream, **kwargs)
+        return stream
+
+    yield setup
+    log_pipeline.shutdown_logging()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+def lines(stream):
+    log_pipeline.shutdown_logging()  # flushes the queue
+    return [json.loads(line) for line in stream.getvalue().splitlines()]
+
+
+def test_json_records_are_formatted_on_the_listener_thread(configure, monkeypatch):
+    stream = configure(level="INFO", fmt="json", sample_rate=1.0)
+    formatted_on = []
+    original = log_pipeline.JsonFormatter.format
+
+    def spy(self, record):
+        formatted_on.append(threading.current_thread())
+        return original(self, record)
+
+    monkeypatch.setattr(log_pipeline.JsonFormatter, "format", spy)
+    log = logging.getLogger("carbonx.test")
+    log.info("awarded %s points", 10, extra={"user_id": "u1"})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        log.error("save failed", exc_info=True)
+    log.debug("not at this level")
+
+    info, error = lines(stream)
+    assert info["message"] == "awarded 10 points" and info["user_id"] == "u1"
+    assert info["level"] == "INFO" and info["logger"] == "carbonx.test"
+    assert "ValueError: boom" in error["exc"] and error["message"] == "save failed"
+    assert formatted_on and threading.main_thread() not in formatted_on
+
+
+def test_tagged_success_logs_are_sampled(configure):
+    stream = configure(fmt="json", sample_rate=0.0)
+    log = logging.getLogger("carbonx.test")
+    for _ in range(50):
+        log.info("updated", extra={"sample": "rewards.update"})
+    log.info("untagged")
+    log.warning("slow update", extra={"sample": "rewards.update"})
+    assert [r["message"] for r in lines(stream)] == ["untagged", "slow update"]
+
+    stream = configure(fmt="json", sample_rate=1.0)
+    log.info("updated", extra={"sample": "rewards.update"})
+    (record,) = lines(stream)
+    assert record["sample"] == "rewards.update" and record["sample_rate"] == 1.0
+
+
+def test_reconfiguring_keeps_one_handler(configure):
+    configure(fmt="text")
+    stream = configure(fmt="text")
+    assert len(logging.getLogger().handlers) == 1
+    logging.getLogger("carbonx.test").warning("once")
+    log_pipeline.shutdown_logging()
+    assert stream.getvalue().count("once") == 1
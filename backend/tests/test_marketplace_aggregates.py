@@ -0,0 +1,112 @@
+# backend/tests/test_marketplace_aggregates.py
+import copy
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from main import app
+from routers import marketplace
+from services.event_store import EventStore
+from services.indexer import MarketplaceIndexer
+from services.marketplace_aggregates import MarketplaceAggregates
+from test_indexer import ALICE, BOB, FIXTURE, RecordedRpc
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = EventStore(str(tmp_path / "index.db"))
+    yield s
+    s.close()
+
+
+@pytest.fixture
+def aggregates(store, monkeypatch):
+    agg = MarketplaceAggregates()
+    agg.attach(store)
+    monkeypatch.setattr(marketplace, "marketplace_aggregates", agg)
+    return agg
+
+
+def test_aggregates_follow_indexed_events(store, aggregates):
+    rpc = RecordedRpc(copy.deepcopy(FIXTURE))
+    MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=0, listeners=[aggregates]).sync()
+
+    assert aggregates.summary() == {"total_retired": 45, "retiring_users": 2,
+                                    "active_listings": 1, "last_event_block": 31}
+    assert aggregates.user_totals("0x" + BOB[2:].upper()) == {
+        "address": BOB, "total_retired": 40, "by_token": {"1": 40}}
+    assert aggregates.token_total(2) == 5
+    # Listing 1 was bought out and listing 2 cancelled
+    assert [listing["listingId"] for listing in aggregates.listings()] == [3]
+    assert aggregates.active_listing(3)["pricePerToken"] == str(3 * 10 ** 16)
+
+    # A fresh instance rebuilt from the store sees the same state
+    reloaded = MarketplaceAggregates()
+    reloaded.attach(store)
+    assert reloaded.summary() == aggregates.summary()
+
+
+def test_rollback_rebuilds_from_store(store, aggregates):
+    rpc = RecordedRpc(copy.deepcopy(FIXTURE))
+    indexer = MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=0,
+                                 reorg_depth=16, listeners=[aggregates])
+    indexer.sync()
+    rpc.reorg(from_block=30, drop_logs_from=30)
+    indexer.sync()
+
+    assert aggregates.user_totals(ALICE)["total_retired"] == 0
+    assert aggregates.summary()["total_retired"] == 40
+    assert aggregates.retirement_history(1)[0]["retiredBy"] == BOB
+
+
+def test_follower_matches_the_indexing_process(store, aggregates, tmp_path):
+    # A second worker reads the same index file through its own connection
+    other = EventStore(str(tmp_path / "index.db"))
+    follower = MarketplaceAggregates()
+    follower.attach(other)
+    try:
+        rpc = RecordedRpc(copy.deepcopy(FIXTURE))
+        indexer = MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=0,
+                                     reorg_depth=16, listeners=[aggregates])
+        indexer.sync()
+        follower.refresh()
+        assert follower.summary() == aggregates.summary()
+        follower.refresh()  # nothing new: applied once
+        assert follower.summary()["total_retired"] == 45
+
+        rpc.reorg(from_block=30, drop_logs_from=30)
+        indexer.sync()
+        follower.refresh()
+        assert follower.summary() == aggregates.summary()
+        assert follower.user_totals(ALICE)["total_retired"] == 0
+    finally:
+        other.close()
+
+
+def test_endpoints_serve_aggregates(store, aggregates):
+    rpc = RecordedRpc(copy.deepcopy(FIXTURE))
+    MarketplaceIndexer(rpc, store, FIXTURE["address"], confirmations=0, listeners=[aggregates]).sync()
+
+    res = client.get(f"/api/marketplace/users/{ALICE}/retired")
+    assert res.status_code == 200 and res.json()["by_token"] == {"2": 5}
+
+    history = client.get("/api/marketplace/tokens/1/retirements").json()
+    assert history["total_retired"] == 40
+    assert history["retirements"][0]["reason"] == "2026 travel offset"
+
+    assert client.get("/api/marketplace/listings", params={"token_id": 2}).json()["listings"] == []
+    assert client.get("/api/marketplace/listings/3").json()["listing"]["seller"] == BOB
+
+    res = client.get("/api/marketplace/listings/1")
+    assert res.status_code == 404
+    assert res.json()["detail"]["code"] == "LISTING_NOT_ACTIVE"
+    assert client.get("/api/marketplace/users/0x123/retired").status_code == 400
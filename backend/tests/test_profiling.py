@@ -0,0 +1,104 @@
+# backend/tests/test_profiling.py
+import os
+import sys
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from middleware import profiling
+from middleware.profiling import ProfilingMiddleware, SamplingProfiler
+from routers import profiling as profiling_router
+
+TOKEN = "secret-token"
+
+
+def burn(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+@pytest.fixture
+def client(monkeypatch):
+    profiler = SamplingProfiler(interval=0.002)
+    monkeypatch.setattr(profiling, "request_profiler", profiler)
+    monkeypatch.setattr(profiling, "PROFILING_TOKEN", TOKEN)
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def slow_sync(item_id: int):
+        burn(0.1)
+        return {"item_id": item_id}
+
+    @app.get("/fast")
+    async def fast_async():
+        burn(0.05)
+        return {"ok": True}
+
+    app.include_router(profiling_router.router, prefix="/admin/profiles")
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, token=TOKEN, sample_rate=0)
+    return TestClient(app), profiler
+
+
+def test_header_opts_in_and_stacks_aggregate_per_route(client):
+    client, profiler = client
+    client.get("/items/1")
+    client.get("/items/2", headers={"X-Profile": "wrong"})
+    assert profiler.routes == {}
+
+    client.get("/items/3", headers={"X-Profile": TOKEN})
+    client.get("/items/4", headers={"X-Profile": TOKEN})
+    client.get("/fast", headers={"X-Profile": TOKEN})
+
+    summary = profiler.summary()
+    assert summary["GET /items/{item_id}"]["requests"] == 2
+    assert summary["GET /items/{item_id}"]["avg_ms"] >= 100
+    assert summary["GET /items/{item_id}"]["samples"] > 10
+    assert summary["GET /fast"]["samples"] > 0
+
+    lines = profiler.collapsed("GET /items/{item_id}").splitlines()
+    assert lines and all(line.startswith("GET /items/{item_id};slow_sync (") for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert "burn (tests/test_profiling.py:" in stack and int(count) > 0
+    assert any(line.startswith("GET /fast;fast_async (") for line in profiler.collapsed().splitlines())
+
+
+def test_admin_endpoints_require_token(client):
+    client, profiler = client
+    client.get("/items/1", headers={"X-Profile": TOKEN})
+
+    response = client.get("/admin/profiles")
+    assert response.status_code == 403
+    assert response.json()["detail"]["code"] == "ADMIN_TOKEN_REQUIRED"
+
+    headers = {"X-Admin-Token": TOKEN}
+    body = client.get("/admin/profiles", headers=headers).json()
+    assert body["routes"]["GET /items/{item_id}"]["requests"] == 1
+
+    response = client.get("/admin/profiles/collapsed", params={"route": "GET /items/{item_id}"}, headers=headers)
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "slow_sync" in response.text
+
+    assert client.delete("/admin/profiles", headers=headers).json() == {"success": True}
+    assert profiler.collapsed() == ""
+
+
+def test_sample_rate_picks_requests_without_header():
+    profiler = SamplingProfiler()
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    app.add_middleware(ProfilingMiddleware, profiler=profiler, token="", sample_rate=1.0)
+    TestClient(app).get("/ping")
+    TestClient(app).get("/missing")
+    assert {route: p.requests for route, p in profiler.routes.items()} == {"GET /ping": 1, "GET [unmatched]": 1}
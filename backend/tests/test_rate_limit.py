@@ -0,0 +1,120 @@
+# backend/tests/test_rate_limit.py
+import os
+import sys
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from middleware.rate_limit import RateLimit, RateLimiter, RateLimitMiddleware, client_key
+from services.tokens import create_token
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_client(limiter, peer=None):
+    app = FastAPI()
+
+    @app.post("/limited")
+    def limited():
+        return {"ok": True}
+
+    @app.get("/open")
+    def open_route():
+        return {"ok": True}
+
+    app.add_middleware(
+        RateLimitMiddleware,
+        rules={"POST /limited": RateLimit(rate=1.0, burst=2)},
+        limiter=limiter,
+    )
+    if peer is None:
+        return TestClient(app)
+
+    async def from_peer(scope, receive, send):
+        # Connection arriving from ``peer``, e.g. the Next.js server
+        await app({**scope, "client": (peer, 50000)}, receive, send)
+
+    return TestClient(from_peer)
+
+
+def test_bucket_refills_over_time():
+    clock = FakeClock()
+    limiter = RateLimiter(clock=clock)
+    limit = RateLimit(rate=2.0, burst=2)
+
+    assert limiter.check("k", limit) == 0.0
+    assert limiter.check("k", limit) == 0.0
+    assert limiter.check("k", limit) == 0.5
+
+    clock.now = 0.5
+    assert limiter.check("k", limit) == 0.0
+
+
+def test_sweep_reclaims_idle_buckets():
+    clock = FakeClock()
+    limiter = RateLimiter(sweep_interval=10.0, clock=clock)
+    limit = RateLimit(rate=1.0, burst=5)
+    for i in range(100):
+        limiter.check(f"user-{i}", limit)
+    assert len(limiter) == 100
+
+    clock.now = 11.0
+    limiter.check("fresh", limit)
+    assert len(limiter) == 1
+
+
+def test_middleware_returns_429_with_retry_after():
+    client = make_client(RateLimiter(clock=FakeClock()))
+    headers = {"Authorization": f"Bearer {create_token('alice')}"}
+
+    assert client.post("/limited", headers=headers).status_code == 200
+    assert client.post("/limited", headers=headers).status_code == 200
+    r = client.post("/limited", headers=headers)
+    assert r.status_code == 429
+    assert r.headers["retry-after"] == "1"
+    assert r.json()["detail"]["code"] == "RATE_LIMITED"
+
+    # Other users and unlisted routes are unaffected
+    assert client.post("/limited", headers={"Authorization": f"Bearer {create_token('bob')}"}).status_code == 200
+    assert client.get("/open", headers=headers).status_code == 200
+
+
+def test_unverified_identity_headers_are_ignored():
+    client = make_client(RateLimiter(clock=FakeClock()))
+    # Rotating self-declared ids, bad tokens or forwarded addresses from an untrusted peer
+    attempts = [{"X-User-Id": "u1"}, {"Authorization": "Bearer forged"}, {"X-Forwarded-For": "203.0.113.9"}]
+    assert [client.post("/limited", headers=h).status_code for h in attempts] == [200, 200, 429]
+
+
+def test_trusted_proxy_keeps_one_bucket_per_browser_client():
+    client = make_client(RateLimiter(clock=FakeClock()), peer="127.0.0.1")
+
+    def post(ip):
+        # What src/app/api/rewards/update/route.ts sends for a browser at ``ip``
+        return client.post("/limited", headers={"X-Forwarded-For": f"{ip}, 127.0.0.1"}).status_code
+
+    assert [post("198.51.100.1") for _ in range(3)] == [200, 200, 429]
+    assert post("198.51.100.2") == 200
+
+    # A client cannot pick its bucket by prepending addresses
+    spoofed = {"X-Forwarded-For": "1.2.3.4, 198.51.100.1"}
+    assert client.post("/limited", headers=spoofed).status_code == 429
+
+
+def test_client_key_prefers_token_subject():
+    token = create_token("carol@example.com")
+    scope = {"headers": [(b"authorization", f"Bearer {token}".encode()), (b"x-forwarded-for", b"10.0.0.1")],
+             "client": ("127.0.0.1", 1)}
+    assert client_key(scope) == "user:carol@example.com"
+    assert client_key({"headers": [(b"x-forwarded-for", b"10.0.0.1")], "client": ("127.0.0.1", 1)}) == "ip:10.0.0.1"
+    assert client_key({"headers": [], "client": None}) == "ip:unknown"
@@ -0,0 +1,107 @@
+# backend/tests/test_rewards_recompute.py
+import json
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from routers import rewards
+from services.rewards_recompute import RecomputeError, recompute_rewards_db, recompute_user
+
+
+def action(action_type, amount=1.0, points=0):
+    return {"type": action_type, "amount": amount, "points_earned": points,
+            "timestamp": "2026-01-01T00:00:00", "metadata": {}}
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "rewards_db.json")
+    monkeypatch.setattr(rewards, "REWARDS_DB_FILE", path)
+    return path
+
+
+def test_recompute_user_reprices_history(monkeypatch):
+    monkeypatch.setitem(rewards.ACTION_POINTS, "calculator_use", 25)
+    user = {"ecoPoints": 30, "rank": 1, "badges": [], "actions": [action("calculator_use", 1, 10) for _ in range(3)]}
+    user, stats = recompute_user(json.loads(json.dumps(user)))
+    assert user["ecoPoints"] == 75
+    assert [a["points_earned"] for a in user["actions"]] == [25] * 3
+    assert stats["changed"] == 1 and stats["points_delta"] == 45
+
+    # Users at the history limit keep points from actions no longer stored
+    full = {"ecoPoints": 5000, "rank": 50, "badges": ["water_warrior"],
+            "actions": [action("calculator_use", 1, 10) for _ in range(rewards.ACTION_HISTORY_LIMIT)]}
+    full, _ = recompute_user(full)
+    assert full["ecoPoints"] == 4000 + 100 * 25
+    assert full["rank"] == rewards.calculate_rank(6500)
+    assert full["badges"][0] == "water_warrior"
+    assert "sustainability_hero" in full["badges"] and "calculator_master" in full["badges"]
+
+    # Revoking drops badges whose criteria are no longer met
+    user, stats = recompute_user({"ecoPoints": 0, "badges": ["water_warrior", "carbon_saver"],
+                                  "actions": [action("water_calculation", 1, 15)]}, revoke_badges=True)
+    assert user["badges"] == ["water_warrior"]
+    assert stats["badges_revoked"] == 1
+
+
+def test_incremental_badges_match_recompute(db_path):
+    for _ in range(10):
+        rewards.apply_reward_action("u1", "calculator_use")
+    rewards.apply_reward_action("u1", "water_calculation")
+    user = rewards.get_user_rewards("u1")
+    assert set(user["badges"]) == {"calculator_master", "water_warrior", "carbon_saver"}
+    _, stats = recompute_user(json.loads(json.dumps(user)))
+    assert stats["changed"] == 0
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_recompute_db_in_chunks(db_path, monkeypatch, workers):
+    db = {f"user-{i}": {"ecoPoints": 10 * i, "rank": 1, "badges": [],
+                        "actions": [action("ai_tool_use", 1, 10) for _ in range(i)]} for i in range(200)}
+    db["empty"] = {"ecoPoints": 0, "rank": 0, "badges": [], "actions": []}
+    rewards.save_rewards_db(db)
+    monkeypatch.setattr("services.rewards_recompute.CHUNK_BYTES", 4096)
+
+    seen = []
+    totals = recompute_rewards_db(workers=workers, progress=lambda stats: seen.append(stats["users"]))
+    assert totals["users"] == 201
+    assert totals["changed"] == 199
+    assert len(seen) > 1 and seen == sorted(seen)
+
+    with open(db_path, encoding="utf-8") as f:
+        result = json.load(f)
+    assert list(result) == list(db)
+    assert result["user-30"]["ecoPoints"] == 600
+    assert "ai_explorer" in result["user-30"]["badges"]
+    assert result["empty"] == db["empty"]
+    assert os.path.exists(f"{db_path}.backup")
+
+    # A second pass finds nothing to change, and the layout matches save_rewards_db
+    assert recompute_rewards_db(workers=0)["changed"] == 0
+    with open(db_path, encoding="utf-8") as f:
+        text = f.read()
+    rewards.save_rewards_db(result)
+    with open(db_path, encoding="utf-8") as f:
+        assert f.read() == text
+
+
+def test_dry_run_and_compact_files(db_path):
+    with open(db_path, "w", encoding="utf-8") as f:
+        json.dump({"a": {"ecoPoints": 0, "actions": [action("investment", 2)]}}, f)
+    with open(db_path, encoding="utf-8") as f:
+        original = f.read()
+    assert recompute_rewards_db(workers=0, dry_run=True)["points_delta"] == 60
+    with open(db_path, encoding="utf-8") as f:
+        assert f.read() == original
+
+    recompute_rewards_db(workers=0)
+    assert rewards.load_rewards_db()["a"]["ecoPoints"] == 60
+
+    with pytest.raises(RecomputeError):
+        recompute_rewards_db(path=db_path + ".missing", workers=0)
@@ -0,0 +1,105 @@
+# backend/tests/test_rewards_snapshot.py
+import json
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+import main
+from routers import rewards
+from services import snapshot
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / "rewards_db.json")
+    monkeypatch.setattr(rewards, "REWARDS_DB_FILE", path)
+    return path
+
+
+def cold_load():
+    rewards._rewards_cache["mtime"] = None
+    return rewards.warm_rewards_db()
+
+
+def test_cold_start_prefers_fresh_snapshot(db_path):
+    data = {f"user-{i}": {"ecoPoints": i, "badges": ["carbon_saver"], "rank": 1, "actions": []} for i in range(50)}
+    rewards.save_rewards_db(data)
+    assert not os.path.exists(snapshot.snapshot_path(db_path))
+
+    # The first warm-up parses the JSON and writes the snapshot for the next one
+    assert cold_load()["source"] == "json"
+    assert snapshot.is_current(db_path)
+    stats = cold_load()
+    assert stats == {"users": 50, "source": "snapshot", "seconds": stats["seconds"]}
+    assert rewards.load_rewards_db() == data
+
+    # Edits made directly to the JSON file win over the stale snapshot
+    data["user-0"]["ecoPoints"] = 999
+    with open(db_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    assert cold_load()["source"] == "json"
+    assert rewards.load_rewards_db()["user-0"]["ecoPoints"] == 999
+    # ... and refresh it for the next start
+    assert cold_load()["source"] == "snapshot"
+
+
+def test_saves_leave_snapshot_to_shutdown(db_path):
+    rewards.save_rewards_db({"a": {"ecoPoints": 1}})
+    cold_load()
+    rewards.save_rewards_db({"a": {"ecoPoints": 2}})
+    rewards.save_rewards_db({"a": {"ecoPoints": 3}})
+    assert not snapshot.is_current(db_path)
+
+    assert rewards.write_rewards_snapshot() is True  # as the shutdown handler does
+    assert snapshot.is_current(db_path)
+    assert snapshot.read_snapshot(db_path) == {"a": {"ecoPoints": 3}}
+    assert rewards.write_rewards_snapshot() is False  # already current
+
+
+def test_unreadable_snapshot_falls_back_to_json(db_path):
+    rewards.save_rewards_db({"a": {"ecoPoints": 5}})
+    cold_load()
+    path = snapshot.snapshot_path(db_path)
+    with open(path, "rb") as f:
+        header = f.read(len(snapshot.MAGIC) + snapshot.HEADER.size)
+    with open(path, "wb") as f:
+        f.write(header + b"\xff garbage")
+    assert snapshot.read_snapshot(db_path) is None
+    assert cold_load()["source"] == "json"
+    assert rewards.load_rewards_db() == {"a": {"ecoPoints": 5}}
+
+
+def test_ready_after_warm_up(db_path):
+    rewards.save_rewards_db({})
+    with TestClient(main.app) as client:
+        assert main._state_warmed.wait(5)
+        res = client.get("/ready")
+        assert res.status_code == 200
+        assert res.json()["checks"]["rewards_db"]["ok"] is True
+
+
+def test_ready_reports_failed_warm_up(db_path, monkeypatch):
+    rewards.save_rewards_db({})
+
+    def broken():
+        raise MemoryError("rewards DB too large")
+
+    monkeypatch.setattr(rewards, "warm_rewards_db", broken)
+    main._state_warmed.clear()
+    main._warm_state()
+    try:
+        res = TestClient(main.app).get("/ready")
+        assert res.status_code == 503
+        assert res.json()["checks"]["rewards_db"]["reason"] == "warm_failed: MemoryError: rewards DB too large"
+        assert not main._state_warmed.is_set()
+    finally:
+        monkeypatch.undo()
+        main._warm_state()
+    assert main._warm_error is None and main._state_warmed.is_set()
@@ -0,0 +1,79 @@
+# backend/tests/test_rewards_sync.py
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+WORKERS = 3
+ACTIONS = 15
+
+
+def worker(db_path, address, barrier, results):
+    """One uvicorn-like worker process: join the group, write, then read locally"""
+    from routers import rewards
+    from services import rewards_sync
+
+    rewards.REWARDS_DB_FILE = db_path
+    started = []  # single-process work, like the chain indexer
+    rewards_sync.when_owner(lambda: started.append("indexer"))
+    assert rewards_sync.start(address).wait(10)
+    role = "replica" if rewards_sync.remote() else "owner"
+    barrier.wait()
+
+    for _ in range(ACTIONS):
+        rewards.apply_reward_action("shared", "calculator_use")
+    # Reads its own writes without waiting
+    own = rewards.get_user_rewards(f"user-{os.getpid()}")
+    barrier.wait()
+
+    expected = WORKERS * ACTIONS * rewards.ACTION_POINTS["calculator_use"]
+    deadline = time.time() + 5
+    # Wait for every worker's user entry too, not only the shared points
+    while time.time() < deadline:
+        db = rewards.load_rewards_db()
+        if db["shared"]["ecoPoints"] == expected and len(db) == 1 + WORKERS:
+            break
+        time.sleep(0.05)
+    results.put((role, rewards.load_rewards_db()["shared"]["ecoPoints"], len(rewards.load_rewards_db()), own["ecoPoints"],
+                 started))
+    barrier.wait()
+    rewards_sync.stop()
+
+
+def test_workers_share_one_writer(tmp_path):
+    db_path = str(tmp_path / "rewards_db.json")
+    with open(db_path, "w", encoding="utf-8") as f:
+        json.dump({}, f)
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(WORKERS)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(db_path, str(tmp_path / "sync.sock"), barrier, results))
+             for _ in range(WORKERS)]
+    for p in procs:
+        p.start()
+    outcomes = [results.get(timeout=60) for _ in procs]
+    for p in procs:
+        p.join(10)
+        assert p.exitcode == 0
+
+    expected = WORKERS * ACTIONS * 10
+    assert sorted(role for role, *_ in outcomes) == ["owner"] + ["replica"] * (WORKERS - 1)
+    # Every replica converged on every other worker's writes
+    assert [points for _, points, _, _, _ in outcomes] == [expected] * WORKERS
+    assert [users for _, _, users, _, _ in outcomes] == [1 + WORKERS] * WORKERS
+    # Owner-only work ran in the owner and nowhere else
+    assert {role: started for role, *_, started in outcomes} == {"owner": ["indexer"], "replica": []}
+
+    # No REWARDS_SYNC_AUTHKEY: the owner generated a key readable only by this user
+    assert os.stat(str(tmp_path / "sync.sock.key")).st_mode & 0o777 == 0o600
+
+    with open(db_path, encoding="utf-8") as f:
+        stored = json.load(f)
+    assert stored["shared"]["ecoPoints"] == expected
+    assert len(stored["shared"]["actions"]) == WORKERS * ACTIONS
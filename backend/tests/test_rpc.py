@@ -0,0 +1,116 @@
+# backend/tests/test_rpc.py
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+HERE = os.path.dirname(__file__)
+ROOT = os.path.abspath(os.path.join(HERE, ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from main import app
+from services import carbon_token, rpc
+from services.carbon_token import IS_PROJECT_ACTIVE, fetch_projects
+from services.rpc import RpcClient, RpcError
+from fake_node import TOKEN_ADDRESS, FakeNode
+
+
+@pytest.fixture
+def node():
+    with FakeNode(projects=20) as n:
+        yield n
+
+
+def test_calls_reuse_one_keep_alive_connection(node):
+    client = RpcClient(node.url)
+    for _ in range(5):
+        assert client.block_number() == 100
+    assert client.get_blocks([1, 2, 500]) == [client.get_block(1), client.get_block(2), None]
+    assert node.connections == 1
+    assert client.pool.connections_opened == 1
+
+    with pytest.raises(RpcError) as e:
+        client.call("eth_mining")
+    assert e.value.code == -32601
+
+
+def test_batch_keeps_order_and_reports_errors(node):
+    client = RpcClient(node.url, batch_size=4)
+    calls = [("eth_blockNumber", ())] * 6 + [("eth_nope", ())]
+    results = client.batch(calls, raise_errors=False)
+    assert results[:6] == ["0x64"] * 6
+    assert isinstance(results[6], RpcError)
+    # 7 calls in batches of 4 -> 2 HTTP requests
+    assert node.http_requests == 2
+    with pytest.raises(RpcError):
+        client.batch(calls)
+
+
+@pytest.mark.parametrize("multicall", [True, False])
+def test_fetch_projects_in_one_round_trip(multicall):
+    with FakeNode(projects=20, multicall=multicall) as node:
+        client = RpcClient(node.url, multicall_address=rpc.MULTICALL_ADDRESS)
+        client.head()
+        # Without a deployed Multicall3 the client falls back to batched eth_call
+        assert client.resolve_multicall() == (rpc.MULTICALL_ADDRESS if multicall else None)
+        node.reset_counters()
+
+        projects = fetch_projects([1, 5, 99], client, TOKEN_ADDRESS)
+        assert node.http_requests == 1
+        assert projects[1]["name"] == "Project 1"
+        assert projects[1]["uri"] == "ipfs://project/1"
+        assert projects[1]["pricePerTonne"] == str(12 * 10 ** 15)
+        assert projects[5]["activeNow"] is False
+        assert projects[99] is None
+
+
+def test_cache_is_pinned_to_blocks(node):
+    client = RpcClient(node.url)
+    assert fetch_projects([3], client, TOKEN_ADDRESS)[3]["name"] == "Project 3"
+
+    # Same block: served from cache
+    node.reset_counters()
+    fetch_projects([3], client, TOKEN_ADDRESS, block=100)
+    assert node.eth_calls == 0
+
+    # A new head block reads fresh state; the old block stays cached
+    node.projects[3] = FakeNode.make_project(3, name="Renamed")
+    node.head = 101
+    assert fetch_projects([3], client, TOKEN_ADDRESS, block=client.head(max_age=0))[3]["name"] == "Renamed"
+    assert fetch_projects([3], client, TOKEN_ADDRESS, block=100)[3]["name"] == "Project 3"
+
+    # The node going back drops cached reads above its head
+    node.head = 99
+    client.head(max_age=0)
+    node.reset_counters()
+    assert client.multicall([(TOKEN_ADDRESS, IS_PROJECT_ACTIVE, (3,))], block=101) == [True]
+    assert node.eth_calls == 1
+
+
+def test_projects_endpoint(node, monkeypatch):
+    app_client = TestClient(app)
+    assert app_client.get("/api/credits/projects", params={"ids": "1"}).status_code == 503
+
+    monkeypatch.setattr(carbon_token, "CARBON_TOKEN_ADDRESS", TOKEN_ADDRESS)
+    monkeypatch.setattr(rpc, "_client", RpcClient(node.url))
+    res = app_client.get("/api/credits/projects", params={"ids": "2,1,2"})
+    assert res.status_code == 200
+    assert [p["tokenId"] for p in res.json()["projects"]] == [2, 1]
+    assert app_client.get("/api/credits/projects", params={"ids": "a"}).status_code == 400
+
+
+def test_undecodable_multicall_result_is_an_rpc_error(monkeypatch):
+    with FakeNode(projects=20, multicall=False) as node:
+        client = RpcClient(node.url, multicall_address=rpc.MULTICALL_ADDRESS)
+        client._multicall_checked = True  # as if the contract had been seen
+        with pytest.raises(RpcError, match="aggregate3"):
+            client.multicall([(TOKEN_ADDRESS, IS_PROJECT_ACTIVE, (3,))])
+
+        # The endpoint answers from the fallback path on a node without Multicall3
+        monkeypatch.setattr(carbon_token, "CARBON_TOKEN_ADDRESS", TOKEN_ADDRESS)
+        monkeypatch.setattr(rpc, "_client", RpcClient(node.url, multicall_address=rpc.MULTICALL_ADDRESS))
+        res = TestClient(app).get("/api/credits/projects", params={"ids": "1,2"})
+        assert res.status_code == 200
+        assert [p["name"] for p in res.json()["projects"]] == ["Project 1", "Project 2"]
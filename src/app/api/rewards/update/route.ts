@@ -67,11 +67,23 @@ export async function POST(request: NextRequest) {
       const controller = new AbortController();
       const timeoutId = setTimeout(() => controller.abort(), 30000); // 30 second timeout
 
+      // The backend rate-limits per client: forward the caller's token and
+      // address so that all browsers don't share this server's bucket
+      const headers: Record<string, string> = {
+        'Content-Type': 'application/json',
+      };
+      const authorization = request.headers.get('authorization');
+      if (authorization) {
+        headers['Authorization'] = authorization;
+      }
+      const forwardedFor = request.headers.get('x-forwarded-for') || (request as any).ip;
+      if (forwardedFor) {
+        headers['X-Forwarded-For'] = forwardedFor;
+      }
+
       response = await fetch(`${BACKEND_URL}/api/rewards/update`, {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
+        headers,
         body: JSON.stringify({
           user_id: user_id.trim(),
           action_type,